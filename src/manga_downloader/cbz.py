@@ -0,0 +1,611 @@
+"""
+Сборка CBZ без распаковки страниц.
+
+Страницы переносятся из ZIP главы в CBZ «как есть»: сжатые байты записи
+копируются напрямую, меняется только имя (``000001.jpg``, ...). Нет ни
+распаковки во временную папку, ни повторного сжатия — на страницу один
+проход чтения и один проход записи.
+
+Модуль :mod:`zipfile` не умеет копировать записи между архивами, поэтому
+локальный заголовок пишется здесь, а запись регистрируется в каталоге
+архива так же, как это делает сам ``ZipFile`` при ``writestr``.
+
+Способ хранения страницы задаёт :class:`CompressionPolicy`: уже сжатые
+форматы (JPEG, WebP, ...) хранятся без сжатия, остальные сжимаются, если
+это заметно уменьшает размер. Запись перекодируется, только когда её
+текущее сжатие не совпадает с выбранным.
+
+Перекодирование выполняет :class:`PagePacker`: страницы сжимаются в пуле
+потоков (``zlib`` отпускает GIL), а в архив их пишет один писатель в
+порядке страниц.
+
+В комментарии архива хранится оглавление (:class:`CbzIndex`): какие
+главы в нём есть и какие страницы они занимают. Дополнение читает его с
+конца файла, не разбирая список страниц.
+
+Страницы лежат либо со сквозной нумерацией (``000001.jpg``), либо по папке
+на главу (``0012_Глава 12/0001.jpg``). Во втором случае главу можно
+заменить на месте: её старые записи убираются из каталога архива, а
+занятое ими место освобождает :func:`compact` — переписыванием архива
+с копированием остальных записей как есть.
+
+Длинную серию можно делить на тома (``Название - Том 001.cbz``, ...) по
+числу глав или размеру (:class:`VolumeLimits`). Заполненный том больше не
+открывается: дописывается только последний.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from manga_downloader.config import (
+    CBZ_AUTO_MIN_SAVING,
+    CBZ_AUTO_SAMPLE_SIZE,
+    CBZ_COMPRESSION,
+    CBZ_DEFLATE_LEVEL,
+    CBZ_PACK_WORKERS,
+    CBZ_VOLUME_MAX_BYTES,
+    CBZ_VOLUME_MAX_CHAPTERS,
+    IMAGE_EXTENSIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\003\004"
+_FH_FILENAME_LENGTH = 10
+_FH_EXTRA_FIELD_LENGTH = 11
+
+_MASK_ENCRYPTED = 0x01
+# Биты 1–2 — параметры метода сжатия, их нужно сохранить вместе с данными.
+_MASK_COMPRESS_OPTIONS = 0x06
+
+_COPY_CHUNK = 1024 * 1024
+
+_END_RECORD = struct.Struct("<4s4H2LH")
+_END_RECORD_SIGNATURE = b"PK\005\006"
+_MAX_COMMENT = 0xFFFF
+
+_INDEX_MAGIC = b"manga-downloader:index:1:"
+_INDEX_JSON = b"j"
+_INDEX_ZLIB = b"z"
+
+LAYOUT_FLAT = "flat"
+LAYOUT_FOLDERS = "folders"
+
+_FLAT_PAGE_RE = re.compile(r"^(\d+)\.")
+
+_VOLUME_SUFFIX = " - Том "
+_VOLUME_RE = re.compile(r"^(?P<base>.+) - Том (?P<number>\d{3,})$")
+
+_STORE = "store"
+_DEFLATE = "deflate"
+_AUTO = "auto"
+
+
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """Выбор сжатия страницы в CBZ по расширению файла.
+
+    Режимы: ``"store"`` — без сжатия, ``"deflate"`` — сжатие уровня
+    *level*, ``"auto"`` — сжатие, если оно экономит не меньше
+    *min_saving* размера (по уже сжатой записи или по пробному сжатию
+    первых *sample_size* байт).
+    """
+
+    modes: Mapping[str, str] = field(default_factory=lambda: dict(CBZ_COMPRESSION))
+    level: int = CBZ_DEFLATE_LEVEL
+    min_saving: float = CBZ_AUTO_MIN_SAVING
+    sample_size: int = CBZ_AUTO_SAMPLE_SIZE
+
+    def choose(self, src: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+        """Метод сжатия (``ZIP_STORED``/``ZIP_DEFLATED``) для записи *info*."""
+        ext = os.path.splitext(info.filename)[1].lower()
+        mode = self.modes.get(ext, _AUTO)
+        if mode == _STORE:
+            return zipfile.ZIP_STORED
+        if mode == _DEFLATE or self._worth_compressing(src, info):
+            return zipfile.ZIP_DEFLATED
+        return zipfile.ZIP_STORED
+
+    def _worth_compressing(self, src: zipfile.ZipFile, info: zipfile.ZipInfo) -> bool:
+        if info.file_size == 0:
+            return False
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            # Выигрыш уже измерен при сжатии архива главы.
+            return 1 - info.compress_size / info.file_size >= self.min_saving
+        with src.open(info) as f:
+            sample = f.read(self.sample_size)
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        packed = len(compressor.compress(sample)) + len(compressor.flush())
+        return 1 - packed / len(sample) >= self.min_saving
+
+
+_IndexEntry = tuple  # (id главы, первая страница, кол-во страниц, папка)
+
+
+@dataclass
+class CbzIndex:
+    """Оглавление CBZ: главы и занятые ими страницы.
+
+    ``chapters`` — записи (id главы, первая страница, кол-во страниц,
+    папка) в порядке добавления; папка пустая при сквозной нумерации, а
+    номера страниц в раскладке по папкам считаются внутри папки.
+    ``next_page`` — номер следующей свободной страницы сквозной нумерации.
+    """
+
+    next_page: int = 1
+    chapters: list[_IndexEntry] = field(default_factory=list)
+    layout: str = LAYOUT_FLAT
+
+    def __contains__(self, chapter_id: object) -> bool:
+        return self._find(chapter_id) is not None
+
+    def add(
+        self, chapter_id: int | str, first_page: int, pages: int, folder: str = "",
+    ) -> None:
+        self.chapters.append((chapter_id, first_page, pages, folder))
+        if not folder:
+            self.next_page = max(self.next_page, first_page + pages)
+
+    def remove(self, chapter_id: int | str) -> _IndexEntry | None:
+        """Убирает главу из оглавления и возвращает её запись."""
+        entry = self._find(chapter_id)
+        if entry is not None:
+            self.chapters.remove(entry)
+        return entry
+
+    def _find(self, chapter_id: object) -> _IndexEntry | None:
+        key = str(chapter_id)
+        for entry in self.chapters:
+            if str(entry[0]) == key:
+                return entry
+        return None
+
+    @classmethod
+    def read(cls, cbz_path: Path) -> CbzIndex | None:
+        """Оглавление из комментария архива; ``None``, если его нет."""
+        try:
+            comment = _read_comment(cbz_path)
+        except OSError:
+            return None
+        if not comment.startswith(_INDEX_MAGIC):
+            return None
+        body = comment[len(_INDEX_MAGIC):]
+        try:
+            if body[:1] == _INDEX_ZLIB:
+                body = _INDEX_JSON + zlib.decompress(base64.b64decode(body[1:]))
+            data = json.loads(body[1:])
+            return cls(
+                next_page=int(data["next"]),
+                chapters=[
+                    (cid, int(first), int(pages), str(folder[0]) if folder else "")
+                    for cid, first, pages, *folder in data["chapters"]
+                ],
+                layout=data.get("layout", LAYOUT_FLAT),
+            )
+        except (ValueError, KeyError, TypeError, zlib.error) as exc:
+            logger.warning("Оглавление %s повреждено: %s", cbz_path.name, exc)
+            return None
+
+    def to_comment(self) -> bytes:
+        """Комментарий архива (не длиннее 64 КБ) с оглавлением."""
+        chapters = [entry if entry[3] else entry[:3] for entry in self.chapters]
+        data = json.dumps(
+            {"next": self.next_page, "layout": self.layout, "chapters": chapters},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        comment = _INDEX_MAGIC + _INDEX_JSON + data
+        if len(comment) > _MAX_COMMENT:
+            comment = _INDEX_MAGIC + _INDEX_ZLIB + base64.b64encode(zlib.compress(data, 9))
+        if len(comment) > _MAX_COMMENT:
+            logger.warning("Оглавление не помещается в комментарий архива, сохраняю без глав")
+            return CbzIndex(self.next_page, layout=self.layout).to_comment()
+        return comment
+
+
+@dataclass
+class _EncodedPage:
+    compress_type: int
+    crc: int
+    file_size: int
+    data: bytes
+
+
+class PagePacker:
+    """Перенос страниц глав в CBZ с параллельным сжатием.
+
+    Страницы, чьё сжатие в архиве главы уже совпадает с выбранным
+    политикой, копируются как есть. Остальные перекодируются в пуле из
+    *workers* потоков; в архив все страницы пишет вызывающий поток строго
+    по порядку. Одновременно в работе не больше ``2 * workers`` страниц.
+    """
+
+    def __init__(
+        self,
+        policy: CompressionPolicy | None = None,
+        workers: int = CBZ_PACK_WORKERS,
+    ) -> None:
+        self._policy = policy or CompressionPolicy()
+        self._workers = max(1, workers)
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    def add_chapter(
+        self,
+        zip_file: Path,
+        dest: zipfile.ZipFile,
+        start_index: int,
+        folder: str = "",
+    ) -> tuple[int, int]:
+        """Дописывает в *dest* изображения из ZIP главы *zip_file*.
+
+        Страницы получают имена ``{index:06}{ext}`` (или
+        ``{folder}/{index:04}{ext}``), начиная с *start_index*. Возвращает
+        (кол-во страниц, следующий индекс).
+
+        Глава добавляется целиком или никак: при ошибке уже записанные
+        страницы главы убираются из архива.
+        """
+        index = start_index
+        in_flight: deque[tuple[zipfile.ZipInfo, Future[_EncodedPage] | None]] = deque()
+        mark = (len(dest.filelist), dest.start_dir)
+
+        with zipfile.ZipFile(zip_file, "r") as src:
+            try:
+                for info in chapter_pages(src):
+                    in_flight.append((info, self._submit(src, info, dest)))
+                    if len(in_flight) >= 2 * self._workers:
+                        self._write_next(src, in_flight.popleft(), dest, folder, index)
+                        index += 1
+                while in_flight:
+                    self._write_next(src, in_flight.popleft(), dest, folder, index)
+                    index += 1
+            except BaseException:
+                _rollback(dest, *mark)
+                raise
+            finally:
+                for _, future in in_flight:
+                    if future is not None:
+                        future.cancel()
+
+        return index - start_index, index
+
+    def close(self) -> None:
+        """Останавливает пул сжатия (он создаётся заново при следующей главе)."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    # -- Внутренние методы -----------------------------------------------------
+
+    def _submit(
+        self, src: zipfile.ZipFile, info: zipfile.ZipInfo, dest: zipfile.ZipFile,
+    ) -> Future[_EncodedPage] | None:
+        """Ставит страницу на перекодирование; ``None`` — копировать как есть."""
+        compress_type = self._policy.choose(src, info)
+        if _can_copy_raw(info, dest, compress_type):
+            return None
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="cbz-pack",
+                )
+            pool = self._pool
+        return pool.submit(_encode, src, info, compress_type, self._policy.level)
+
+    @staticmethod
+    def _write_next(
+        src: zipfile.ZipFile,
+        item: tuple[zipfile.ZipInfo, Future[_EncodedPage] | None],
+        dest: zipfile.ZipFile,
+        folder: str,
+        index: int,
+    ) -> None:
+        info, future = item
+        ext = os.path.splitext(info.filename)[1].lower()
+        arcname = f"{folder}/{index:04}{ext}" if folder else f"{index:06}{ext}"
+        if future is None:
+            _copy_raw(src, info, dest, arcname)
+        else:
+            _write_encoded(dest, arcname, info.date_time, future.result())
+
+
+@dataclass(frozen=True)
+class VolumeLimits:
+    """Ограничения одного тома; 0 — без ограничения."""
+
+    max_bytes: int = CBZ_VOLUME_MAX_BYTES
+    max_chapters: int = CBZ_VOLUME_MAX_CHAPTERS
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_bytes or self.max_chapters)
+
+    def fits(self, chapters: int, size: int, chapter_size: int) -> bool:
+        """Поместится ли в том (*chapters* глав, *size* байт) ещё одна глава.
+
+        В пустой том глава помещается всегда, даже если она больше лимита.
+        """
+        if not chapters:
+            return True
+        if self.max_chapters and chapters >= self.max_chapters:
+            return False
+        return not self.max_bytes or size + chapter_size <= self.max_bytes
+
+
+def volume_path(base: Path, number: int) -> Path:
+    """Путь тома *number* серии ``base`` (``Название.cbz``)."""
+    return base.with_name(f"{base.stem}{_VOLUME_SUFFIX}{number:03}{base.suffix}")
+
+
+def volume_base(path: Path) -> Path:
+    """Путь серии по пути любого её тома (другие пути — без изменений)."""
+    m = _VOLUME_RE.match(path.stem)
+    return path.with_name(m.group("base") + path.suffix) if m else path
+
+
+def volume_paths(base: Path, suffix: str = "") -> list[Path]:
+    """Существующие тома серии *base* по возрастанию номера.
+
+    С *suffix* (например, ``".part"``) ищутся файлы ``<том>.cbz<suffix>``.
+    """
+    volumes = []
+    if base.parent.is_dir():
+        for path in base.parent.iterdir():
+            if not path.name.endswith(base.suffix + suffix):
+                continue
+            m = _VOLUME_RE.match(path.name[: len(path.name) - len(base.suffix + suffix)])
+            if m and m.group("base") == base.stem:
+                volumes.append((int(m.group("number")), path))
+    return [path for _, path in sorted(volumes)]
+
+
+def archive_files(path: Path) -> list[Path]:
+    """Файлы архива: все тома серии, к которой относится *path*, или сам файл."""
+    volumes = volume_paths(volume_base(path))
+    return volumes or ([path] if path.exists() else [])
+
+
+def volume_number(path: Path) -> int:
+    """Номер тома по его пути (0 — не том)."""
+    m = _VOLUME_RE.match(path.stem)
+    return int(m.group("number")) if m else 0
+
+
+def chapter_size(zip_file: Path) -> int:
+    """Примерный размер страниц главы в CBZ (их сжатые размеры в ZIP главы)."""
+    with zipfile.ZipFile(zip_file, "r") as src:
+        return sum(info.compress_size for info in chapter_pages(src))
+
+
+def chapter_pages(src: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """Изображения архива главы в порядке имён."""
+    return [
+        info
+        for info in sorted(src.infolist(), key=lambda i: i.filename)
+        if not info.is_dir()
+        and os.path.splitext(info.filename)[1].lower() in IMAGE_EXTENSIONS
+    ]
+
+
+@dataclass
+class DetachedChapter:
+    """Глава, убранная из каталога архива (её данные ещё в файле)."""
+
+    entry: _IndexEntry
+    infos: list[zipfile.ZipInfo]
+
+
+def detach_chapter(
+    cbz: zipfile.ZipFile, contents: CbzIndex, chapter_id: int | str,
+) -> DetachedChapter | None:
+    """Убирает страницы главы из каталога открытого на запись архива.
+
+    Данные страниц остаются в файле «мёртвым» местом до :func:`compact`.
+    Возвращает убранное (для :func:`reattach_chapter`) или ``None``, если
+    главы нет в оглавлении.
+    """
+    entry = contents.remove(chapter_id)
+    if entry is None:
+        return None
+    _, first, pages, folder = entry
+    with cbz._lock:
+        if folder:
+            infos = [i for i in cbz.filelist if i.filename.startswith(folder + "/")]
+        else:
+            infos = [i for i in cbz.filelist if _flat_page(i.filename) in range(first, first + pages)]
+        for info in infos:
+            cbz.filelist.remove(info)
+            cbz.NameToInfo.pop(info.filename, None)
+        cbz._didModify = True
+    return DetachedChapter(entry, infos)
+
+
+def reattach_chapter(
+    cbz: zipfile.ZipFile, contents: CbzIndex, detached: DetachedChapter,
+) -> None:
+    """Возвращает в каталог главу, убранную :func:`detach_chapter`."""
+    with cbz._lock:
+        for info in detached.infos:
+            cbz.filelist.append(info)
+            cbz.NameToInfo[info.filename] = info
+    contents.chapters.append(detached.entry)
+
+
+def dead_bytes(cbz: zipfile.ZipFile) -> int:
+    """Сколько байт архива занято записями, убранными из каталога."""
+    live = sum(
+        _LOCAL_HEADER.size + len(i.filename.encode("utf-8")) + len(i.extra) + i.compress_size
+        for i in cbz.filelist
+    )
+    return max(0, cbz.start_dir - live)
+
+
+def compact(cbz_path: Path) -> int:
+    """Переписывает архив без мёртвых записей; возвращает освобождённые байты.
+
+    Живые записи копируются как есть (без распаковки), так что затраты
+    пропорциональны размеру архива только по диску, не по CPU. Итоговый
+    файл заменяет исходный атомарно.
+    """
+    tmp = cbz_path.with_name(cbz_path.name + ".compact")
+    before = cbz_path.stat().st_size
+    try:
+        with zipfile.ZipFile(cbz_path, "r") as src, zipfile.ZipFile(tmp, "w") as dest:
+            for info in src.infolist():
+                _copy_raw(src, info, dest, info.filename)
+            dest.comment = src.comment
+        with open(tmp, "rb+") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, cbz_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return before - cbz_path.stat().st_size
+
+
+def _flat_page(name: str) -> int | None:
+    m = _FLAT_PAGE_RE.match(name)
+    return int(m.group(1)) if m else None
+
+
+def _can_copy_raw(info: zipfile.ZipInfo, dest: zipfile.ZipFile, compress_type: int) -> bool:
+    return (
+        compress_type == info.compress_type
+        and not info.flag_bits & _MASK_ENCRYPTED
+        and dest._seekable
+    )
+
+
+def _encode(
+    src: zipfile.ZipFile, info: zipfile.ZipInfo, compress_type: int, level: int,
+) -> _EncodedPage:
+    """Распаковывает страницу и сжимает её заново (в потоке пула)."""
+    raw = src.read(info)
+    data = raw
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        data = compressor.compress(raw) + compressor.flush()
+    return _EncodedPage(compress_type, zlib.crc32(raw), len(raw), data)
+
+
+def _copy_raw(
+    src: zipfile.ZipFile, info: zipfile.ZipInfo, dest: zipfile.ZipFile, arcname: str,
+) -> None:
+    """Переносит сжатые байты записи без распаковки."""
+    entry = zipfile.ZipInfo(arcname, date_time=info.date_time)
+    entry.compress_type = info.compress_type
+    entry.flag_bits = info.flag_bits & _MASK_COMPRESS_OPTIONS
+    entry.external_attr = info.external_attr
+    entry.CRC = info.CRC
+    entry.file_size = info.file_size
+    entry.compress_size = info.compress_size
+    _write_entry(dest, entry, _read_raw(src, info))
+
+
+def _write_encoded(
+    dest: zipfile.ZipFile, arcname: str, date_time: tuple, page: _EncodedPage,
+) -> None:
+    entry = zipfile.ZipInfo(arcname, date_time=date_time)
+    entry.compress_type = page.compress_type
+    entry.CRC = page.crc
+    entry.file_size = page.file_size
+    entry.compress_size = len(page.data)
+    _write_entry(dest, entry, (page.data,))
+
+
+def _write_entry(
+    dest: zipfile.ZipFile, entry: zipfile.ZipInfo, chunks: Iterable[bytes],
+) -> None:
+    """Записывает заголовок и готовые сжатые данные и регистрирует запись."""
+    entry.external_attr = entry.external_attr or 0o600 << 16
+    zip64 = max(entry.file_size, entry.compress_size) > zipfile.ZIP64_LIMIT
+    with dest._lock:
+        if dest._writing:
+            raise ValueError("В архив уже идёт запись другой страницы")
+        dest._writecheck(entry)
+        dest.fp.seek(dest.start_dir)
+        entry.header_offset = dest.fp.tell()
+        dest._didModify = True
+        dest.fp.write(entry.FileHeader(zip64))
+        for chunk in chunks:
+            dest.fp.write(chunk)
+        dest.start_dir = dest.fp.tell()
+        dest.filelist.append(entry)
+        dest.NameToInfo[entry.filename] = entry
+
+
+def _rollback(dest: zipfile.ZipFile, entries: int, start_dir: int) -> None:
+    """Убирает из архива записи, добавленные после отметки."""
+    with dest._lock:
+        for info in dest.filelist[entries:]:
+            dest.NameToInfo.pop(info.filename, None)
+        del dest.filelist[entries:]
+        dest.start_dir = start_dir
+        dest.fp.seek(start_dir)
+        dest.fp.truncate()
+
+
+def _read_comment(path: Path) -> bytes:
+    """Комментарий ZIP-архива — из записи о конце каталога, без чтения каталога."""
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        f.seek(max(0, size - _END_RECORD.size - _MAX_COMMENT))
+        tail = f.read()
+    pos = tail.rfind(_END_RECORD_SIGNATURE)
+    while pos >= 0:
+        record = tail[pos:pos + _END_RECORD.size]
+        if len(record) == _END_RECORD.size:
+            comment_length = _END_RECORD.unpack(record)[-1]
+            if pos + _END_RECORD.size + comment_length == len(tail):
+                return tail[pos + _END_RECORD.size:]
+        pos = tail.rfind(_END_RECORD_SIGNATURE, 0, pos)
+    return b""
+
+
+def _read_raw(src: zipfile.ZipFile, info: zipfile.ZipInfo) -> Iterable[bytes]:
+    """Сжатые данные записи по кускам (с блокировкой *src* на каждый кусок,
+    чтобы не мешать параллельному чтению других страниц)."""
+    position = _data_offset(src, info)
+    remaining = info.compress_size
+    while remaining:
+        with src._lock:
+            src.fp.seek(position)
+            chunk = src.fp.read(min(_COPY_CHUNK, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Запись {info.filename} обрезана")
+        position += len(chunk)
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _data_offset(src: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+    """Смещение сжатых данных записи (сразу за её локальным заголовком)."""
+    with src._lock:
+        src.fp.seek(info.header_offset)
+        header = src.fp.read(_LOCAL_HEADER.size)
+    if len(header) != _LOCAL_HEADER.size:
+        raise zipfile.BadZipFile(f"Запись {info.filename} обрезана")
+    fields = _LOCAL_HEADER.unpack(header)
+    if fields[0] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Неверный заголовок записи {info.filename}")
+    return (
+        info.header_offset
+        + _LOCAL_HEADER.size
+        + fields[_FH_FILENAME_LENGTH]
+        + fields[_FH_EXTRA_FIELD_LENGTH]
+    )
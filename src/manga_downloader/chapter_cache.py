@@ -0,0 +1,258 @@
+"""
+Постоянный кэш скачанных архивов глав.
+
+Архивы хранятся по содержимому (``objects/<sha256>.zip``), а индекс
+``index.json`` связывает с ними пары ``(news_id, chapter_id)``. Кэш
+переживает перезапуски и отменённые задачи: уже скачанная глава больше не
+запрашивается у API. Общий размер ограничен ``CHAPTER_CACHE_MAX_BYTES``,
+при превышении удаляются давно не использованные главы (LRU).
+
+Кроме глав кэш помнит метаданные манги (название, news_id, список глав),
+чтобы CBZ можно было пересобрать без доступа к сайту. Они растут вместе с
+библиотекой, поэтому лежат отдельно от индекса, в ``manga.json``, и
+переписываются, только когда меняются.
+
+Индекс записывается сразу только при добавлении главы (чтобы после падения
+скачанная глава не потерялась). Время использования глав обновляется в
+памяти и записывается один раз — в :meth:`ChapterCache.evict` или
+:meth:`ChapterCache.flush`.
+
+Главы текущей задачи, ещё не попавшие в CBZ, закрепляются (``pin=True`` в
+:meth:`ChapterCache.get`/:meth:`ChapterCache.put`): вытеснение их не
+трогает, поэтому лимит можно соблюдать прямо по ходу задачи.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from manga_downloader.config import CACHE_DIR, CHAPTER_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+_CURRENT_VERSION = 1
+_HASH_CHUNK = 1024 * 1024
+
+
+class ChapterCache:
+    """Кэш архивов глав с вытеснением по давности использования."""
+
+    def __init__(self, root: Path | None = None, max_bytes: int = CHAPTER_CACHE_MAX_BYTES) -> None:
+        self._root = root or CACHE_DIR
+        self._objects = self._root / "objects"
+        self._index_path = self._root / "index.json"
+        self._manga_path = self._root / "manga.json"
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] = {"version": _CURRENT_VERSION, "chapters": {}}
+        self._manga: dict[str, Any] = {}
+        self._dirty = False  # в памяти есть незаписанные изменения индекса
+        self._pinned: dict[str, int] = {}  # sha256 -> число закреплений
+        self._load()
+
+    # -- Главы -----------------------------------------------------------------
+
+    def get(self, news_id: int | str, chapter_id: int | str, *, pin: bool = False) -> Path | None:
+        """Путь к архиву главы из кэша или ``None``.
+
+        С ``pin=True`` архив закрепляется до :meth:`unpin`.
+        """
+        key = _chapter_key(news_id, chapter_id)
+        with self._lock:
+            entry = self._chapters.get(key)
+            if entry is None:
+                return None
+            path = self._object_path(entry["sha256"])
+            try:
+                valid = path.stat().st_size == entry["size"]
+            except OSError:
+                valid = False
+            if not valid:
+                logger.debug("Запись кэша %s повреждена, удаляю", key)
+                del self._chapters[key]
+                self._remove_object_if_unused(entry["sha256"])
+                self._dirty = True
+                return None
+            entry["last_used"] = time.time()
+            self._dirty = True
+            if pin:
+                self._pin(entry["sha256"])
+            return path
+
+    def put(self, news_id: int | str, chapter_id: int | str, src: Path, *, pin: bool = False) -> Path:
+        """Переносит скачанный архив *src* в кэш и возвращает путь к нему.
+
+        Одинаковые по содержимому архивы хранятся один раз. С ``pin=True``
+        архив закрепляется до :meth:`unpin`.
+        """
+        digest = _file_sha256(src)
+        size = src.stat().st_size
+        dest = self._object_path(digest)
+        with self._lock:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if dest.exists():
+                src.unlink()
+            else:
+                os.replace(src, dest)
+            self._chapters[_chapter_key(news_id, chapter_id)] = {
+                "sha256": digest,
+                "size": size,
+                "last_used": time.time(),
+            }
+            if pin:
+                self._pin(digest)
+            self._save()
+        return dest
+
+    def unpin(self, path: Path) -> None:
+        """Снимает одно закрепление с архива *path*."""
+        digest = path.stem
+        with self._lock:
+            count = self._pinned.get(digest, 0) - 1
+            if count > 0:
+                self._pinned[digest] = count
+            else:
+                self._pinned.pop(digest, None)
+
+    def unpin_all(self) -> None:
+        """Снимает все закрепления (конец задачи)."""
+        with self._lock:
+            self._pinned.clear()
+
+    def evict(self, *, flush: bool = True) -> int:
+        """Удаляет давно не использованные главы сверх лимита размера.
+
+        Закреплённые архивы не удаляются. С ``flush=True`` заодно записывает
+        накопленные изменения индекса, иначе индекс пишется, только если
+        что-то удалено. Возвращает число освобождённых байт.
+        """
+        with self._lock:
+            sizes = {e["sha256"]: e["size"] for e in self._chapters.values()}
+            total = sum(sizes.values())
+            if total <= self._max_bytes and not (flush and self._dirty):
+                return 0
+            freed = 0
+            for key, entry in sorted(self._chapters.items(), key=lambda kv: kv[1]["last_used"]):
+                if total <= self._max_bytes:
+                    break
+                if entry["sha256"] in self._pinned:
+                    continue
+                del self._chapters[key]
+                if self._remove_object_if_unused(entry["sha256"]):
+                    total -= entry["size"]
+                    freed += entry["size"]
+            if freed:
+                logger.info("Кэш глав: освобождено %.1f МБ", freed / 1024 / 1024)
+                self._dirty = True
+                self._save()
+            elif flush and self._dirty:
+                self._save()
+            return freed
+
+    def flush(self) -> None:
+        """Записывает накопленные изменения индекса (время использования глав)."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    # -- Метаданные манги ------------------------------------------------------
+
+    def remember_manga(
+        self, url: str, title: str, news_id: str, chapters: list[dict[str, Any]],
+    ) -> None:
+        """Запоминает название и список глав манги для офлайн-пересборки."""
+        meta = {
+            "title": title,
+            "news_id": news_id,
+            "chapters": [{"id": ch["id"], "title": ch["title"]} for ch in chapters],
+        }
+        with self._lock:
+            if self._manga.get(url) != meta:
+                self._manga[url] = meta
+                self._save_manga()
+
+    def manga(self, url: str) -> dict[str, Any] | None:
+        """Сохранённые метаданные манги по URL."""
+        return self._manga.get(url)
+
+    # -- Внутренние методы -----------------------------------------------------
+
+    @property
+    def _chapters(self) -> dict[str, Any]:
+        return self._data.setdefault("chapters", {})
+
+    def _object_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / f"{digest}.zip"
+
+    def _pin(self, digest: str) -> None:
+        self._pinned[digest] = self._pinned.get(digest, 0) + 1
+
+    def _remove_object_if_unused(self, digest: str) -> bool:
+        if any(e["sha256"] == digest for e in self._chapters.values()):
+            return False
+        self._object_path(digest).unlink(missing_ok=True)
+        return True
+
+    def _load(self) -> None:
+        if self._manga_path.exists():
+            try:
+                with open(self._manga_path, encoding="utf-8") as f:
+                    self._manga = json.load(f)
+            except Exception as exc:
+                logger.error("Ошибка чтения метаданных манги в кэше: %s", exc)
+        if not self._index_path.exists():
+            return
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        except Exception as exc:
+            logger.error("Ошибка чтения индекса кэша глав: %s", exc)
+            return
+        legacy = self._data.pop("manga", None)
+        if legacy is not None:
+            # Старый формат: метаданные манги хранились в самом индексе.
+            self._manga = {**legacy, **self._manga}
+            self._save_manga()
+            self._save()
+
+    def _save(self) -> None:
+        if _write_json(self._index_path, self._data):
+            self._dirty = False
+
+    def _save_manga(self) -> None:
+        _write_json(self._manga_path, self._manga)
+
+
+def _write_json(path: Path, data: Any) -> bool:
+    """Атомарно и с ``fsync`` записывает *data* в *path*."""
+    tmp = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return True
+    except Exception as exc:
+        logger.error("Ошибка записи кэша глав (%s): %s", path.name, exc)
+        return False
+
+
+def _chapter_key(news_id: int | str, chapter_id: int | str) -> str:
+    return f"{news_id}/{chapter_id}"
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
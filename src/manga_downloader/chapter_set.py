@@ -0,0 +1,150 @@
+"""
+Компактное множество номеров глав.
+
+Номера хранятся непересекающимися отрезками ``[start, end]`` по
+возрастанию: серия из 2000 глав, скачанная целиком, — это один отрезок,
+а не список из 2000 чисел. Объединение сливает отрезки за линейное время,
+проверка номера — двоичный поиск. В истории множество хранится строкой
+вида ``"1-120,125,130-200"``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+from typing import Iterable, Iterator
+
+
+class ChapterSet:
+    """Множество номеров глав в виде отрезков."""
+
+    __slots__ = ("_ranges",)
+
+    def __init__(self, chapters: Iterable[int] = ()) -> None:
+        self._ranges: list[tuple[int, int]] = _merge((n, n) for n in sorted(set(chapters)))
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[tuple[int, int]]) -> ChapterSet:
+        result = cls()
+        result._ranges = _merge(sorted((start, end) for start, end in ranges if start <= end))
+        return result
+
+    @classmethod
+    def parse(cls, text: str) -> ChapterSet:
+        """Разбирает строку ``"1-120,125"`` (см. :meth:`__str__`)."""
+        ranges = []
+        for part in text.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, _, end = part.partition("-")
+            ranges.append((int(start), int(end or start)))
+        return cls.from_ranges(ranges)
+
+    @classmethod
+    def load(cls, value: object) -> ChapterSet:
+        """Множество из сохранённого значения любого формата.
+
+        Принимает строку отрезков, JSON-список номеров (старый формат
+        истории) или сам список.
+        """
+        if isinstance(value, ChapterSet):
+            return value
+        if isinstance(value, str):
+            if value.lstrip().startswith("["):
+                return cls(json.loads(value))
+            return cls.parse(value)
+        return cls(value or ())
+
+    # -- Запросы ---------------------------------------------------------------
+
+    @property
+    def ranges(self) -> list[tuple[int, int]]:
+        return list(self._ranges)
+
+    @property
+    def last(self) -> int:
+        """Наибольший номер (0 для пустого множества)."""
+        return self._ranges[-1][1] if self._ranges else 0
+
+    def missing(self, total: int, start: int = 1) -> list[tuple[int, int]]:
+        """Отрезки номеров от *start* до *total*, которых нет в множестве."""
+        gaps = []
+        expected = start
+        for lo, hi in self._ranges:
+            if hi < expected:
+                continue
+            if lo > total:
+                break
+            if lo > expected:
+                gaps.append((expected, lo - 1))
+            expected = hi + 1
+        if expected <= total:
+            gaps.append((expected, total))
+        return gaps
+
+    def __contains__(self, chapter: object) -> bool:
+        if not isinstance(chapter, int):
+            return False
+        i = bisect.bisect_right(self._ranges, (chapter, float("inf"))) - 1
+        return i >= 0 and self._ranges[i][1] >= chapter
+
+    def __len__(self) -> int:
+        return sum(end - start + 1 for start, end in self._ranges)
+
+    def __bool__(self) -> bool:
+        return bool(self._ranges)
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in self._ranges:
+            yield from range(start, end + 1)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ChapterSet) and self._ranges == other._ranges
+
+    def __repr__(self) -> str:
+        return f"ChapterSet({str(self)!r})"
+
+    def __str__(self) -> str:
+        return ",".join(
+            str(start) if start == end else f"{start}-{end}" for start, end in self._ranges
+        )
+
+    # -- Изменение -------------------------------------------------------------
+
+    def __or__(self, other: ChapterSet | Iterable[int]) -> ChapterSet:
+        if not isinstance(other, ChapterSet):
+            other = ChapterSet(other)
+        result = ChapterSet()
+        result._ranges = _merge(_merge_sorted(self._ranges, other._ranges))
+        return result
+
+    union = __or__
+
+
+def _merge_sorted(
+    a: list[tuple[int, int]], b: list[tuple[int, int]],
+) -> Iterator[tuple[int, int]]:
+    """Сливает два отсортированных списка отрезков в один поток."""
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] <= b[j]:
+            yield a[i]
+            i += 1
+        else:
+            yield b[j]
+            j += 1
+    yield from a[i:]
+    yield from b[j:]
+
+
+def _merge(ranges: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Объединяет отсортированные отрезки, склеивая пересекающиеся и соседние."""
+    merged: list[tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
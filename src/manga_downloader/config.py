@@ -2,6 +2,7 @@
 Константы и конфигурация приложения.
 """
 
+import os
 import sys
 from pathlib import Path
 
@@ -14,9 +15,12 @@ else:
     BASE_DIR = Path(__file__).parent.parent.parent
 COOKIE_FILE = BASE_DIR / "comx_life_cookies_v3.json"
 HISTORY_FILE = BASE_DIR / "manga_history.json"
+HISTORY_DB = BASE_DIR / "manga_history.db"
+JOURNAL_FILE = BASE_DIR / "job_journal.json"
 DOWNLOADS_DIR = BASE_DIR / "downloads"
-TEMP_DIR = BASE_DIR / "combined_cbz_temp"
+TEMP_DIR = BASE_DIR / "combined_cbz_temp"  # папка распаковки старых версий, удаляется
 OUTPUT_DIR = BASE_DIR / "output"
+CACHE_DIR = BASE_DIR / "chapter_cache"
 
 # --- Сайт ---
 BASE_URL = "https://com-x.life"
@@ -65,16 +69,108 @@ DOWNLOAD_TIMEOUT = 60
 LOGIN_WAIT_TIMEOUT = 300  # 5 минут на ручной логин
 PAGE_LOAD_DELAY = 3
 POLL_INTERVAL = 0.5
-REQUEST_DELAY = 1.5
-FALLBACK_DELAY = 1
+
+# --- Пул HTTP-сессий ---
+HTTP_POOL_SIZE = 4  # сессий (keep-alive соединений) на набор cookies и профиль
+# Остаток страницы манги после window.__DATA__, который по HTTP/1.1
+# дочитывается ради сохранения соединения (больший — обрыв передачи).
+PAGE_DRAIN_MAX_BYTES = 256 * 1024
+
+# --- Адаптивное ограничение частоты запросов к сайту ---
+RATE_LIMIT_INITIAL = 1.0  # запросов в секунду на старте
+RATE_LIMIT_MIN = 0.2
+RATE_LIMIT_MAX = 8.0
+RATE_LIMIT_BURST = 3  # ёмкость корзины токенов
+RATE_LIMIT_INCREASE = 0.1  # прибавка к скорости за каждый успешный ответ
+RATE_LIMIT_DECREASE = 0.5  # множитель скорости при 429/403/5xx
+RATE_LIMIT_MAX_RETRY_AFTER = 120  # верхняя граница паузы по Retry-After
+
+# --- Потоковая запись архивов ---
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # размер чанка при чтении ответа
+WRITE_BUFFER_SIZE = 1024 * 1024  # буфер записи файла на диск
+
+# --- Параллельная загрузка ---
+MAX_PARALLEL_DOWNLOADS = 3  # одновременно скачиваемых глав
+CANCEL_POLL_INTERVAL = 0.5  # как часто пул проверяет флаг отмены
+PREFETCH_DEPTH = 3  # на сколько глав вперёд заранее получать ссылки на архивы
+PREFETCH_URL_TTL = 300  # через сколько секунд готовая ссылка считается устаревшей
+CBZ_REORDER_WINDOW = 8  # на сколько глав скачивание может опережать сборку CBZ
+
+# --- Журнал задачи ---
+JOURNAL_COMPACT_EVERY = 200  # строк лога состояний глав до свёртки в снимок журнала
+
+# --- Кэш глав ---
+CHAPTER_CACHE_MAX_BYTES = 2 * 1024 ** 3  # лимит размера кэша архивов глав (2 ГБ)
+
+# --- История ---
+# "sqlite" — база HISTORY_DB (WAL, обновление одной строки на мангу),
+# "json" — прежний файл HISTORY_FILE. JSON импортируется в базу однократно.
+HISTORY_BACKEND = "sqlite"
+HISTORY_FLUSH_DELAY = 2.0  # сек. без изменений до записи накопленных изменений
+HISTORY_FLUSH_BATCH = 500  # изменений, после которых запись не откладывается
+
+# --- Здоровье методов загрузки ---
+HEALTH_WINDOW = 20  # сколько последних попыток учитывается в доле успехов
+CIRCUIT_FAILURE_THRESHOLD = 3  # ошибок подряд до временного отключения метода
+CIRCUIT_COOLDOWN = 120  # на сколько секунд отключается метод
+
+# --- Повторы загрузки ---
+# Бюджет повторов тем же методом по классу ошибки (ErrorKind):
+# (повторов, базовая пауза, макс. пауза), паузы в секундах.
+RETRY_BUDGETS = {
+    "TIMEOUT": (2, 1.0, 8.0),
+    "TLS": (1, 0.5, 2.0),
+    # Повтор с теми же cookies редко проходит Cloudflare: одна попытка на
+    # случай кратковременной блокировки, дальше — другой метод.
+    "CLOUDFLARE": (1, 2.0, 5.0),
+    # Паузу по Retry-After дополнительно выдерживает общий лимитер.
+    "RATE_LIMITED": (3, 2.0, 30.0),
+    "SERVER": (2, 1.0, 15.0),
+    "BAD_ZIP": (1, 0.5, 2.0),
+    "NO_DATA": (1, 1.0, 3.0),
+    "OTHER": (0, 1.0, 10.0),
+}
 
 # --- Selenium ---
 SELENIUM_WAIT_TIMEOUT = 10
+BROWSER_IDLE_TIMEOUT = 180  # через сколько секунд простоя закрыть тёплый браузер
 COOKIE_DOMAIN = ".com-x.life"
 
 # --- Форматы изображений ---
 IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"})
 
+# --- Сжатие страниц в CBZ ---
+# "store" — без сжатия (JPEG/PNG/WebP/GIF уже сжаты, deflate даёт <1%),
+# "deflate" — всегда сжимать, "auto" — сжимать, если пробное сжатие
+# выигрывает не меньше CBZ_AUTO_MIN_SAVING. Неизвестные расширения — "auto".
+CBZ_COMPRESSION = {
+    ".jpg": "store",
+    ".jpeg": "store",
+    ".png": "store",
+    ".gif": "store",
+    ".webp": "store",
+    ".bmp": "auto",
+}
+CBZ_DEFLATE_LEVEL = 6
+CBZ_AUTO_MIN_SAVING = 0.05  # доля размера, которую должно сэкономить сжатие
+CBZ_AUTO_SAMPLE_SIZE = 64 * 1024  # байт страницы для пробного сжатия
+CBZ_PACK_WORKERS = min(8, os.cpu_count() or 1)  # потоков сжатия страниц
+
+# --- Раскладка страниц в CBZ ---
+# "flat" — сквозная нумерация (000001.jpg), "folders" — папка на главу
+# (0012_Глава 12/0001.jpg): главы можно заменять в архиве на месте.
+# Раскладка дополняемого архива берётся из его оглавления.
+CBZ_LAYOUT = "flat"
+CBZ_COMPACT_THRESHOLD = 0.25  # доля «мёртвого» места, после которой архив сжимается
+
+# --- Тома ---
+# Длинная серия делится на тома «Название - Том 001.cbz», ... Новый том
+# начинается, когда в текущем уже CBZ_VOLUME_MAX_CHAPTERS глав или
+# следующая глава не помещается в CBZ_VOLUME_MAX_BYTES. 0 — без ограничения
+# (оба 0 — один архив без томов).
+CBZ_VOLUME_MAX_BYTES = 0
+CBZ_VOLUME_MAX_CHAPTERS = 0
+
 # --- Cookies для авторизации ---
 AUTH_COOKIES = ("dle_user_id", "dle_password")
 IMPORTANT_COOKIE_NAMES = (
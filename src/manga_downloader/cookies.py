@@ -1,19 +1,28 @@
 """
 Менеджер cookies: загрузка, сохранение и применение к HTTP-сессиям.
+
+Каждое изменение набора cookies увеличивает номер поколения
+(:attr:`CookieManager.generation`). Долгоживущие сессии запоминают
+поколение, с которым применили cookies, и переприменяют их, как только
+оно устарело, — так обновление cookies через Selenium сразу подхватывается
+всеми загрузчиками. Подписчики (:meth:`CookieManager.subscribe`)
+дополнительно получают уведомление о смене поколения.
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from manga_downloader.config import AUTH_COOKIES, COOKIE_FILE, IMPORTANT_COOKIE_NAMES
 
 logger = logging.getLogger(__name__)
 
 CookieList = list[dict[str, Any]]
+CookieListener = Callable[[int], None]
 
 
 class CookieManager:
@@ -22,6 +31,9 @@ class CookieManager:
     def __init__(self, path: Path | None = None) -> None:
         self.path = path or COOKIE_FILE
         self._cookies: CookieList = []
+        self._generation = 0
+        self._listeners: list[CookieListener] = []
+        self._lock = threading.Lock()
 
     # -- Публичный интерфейс --------------------------------------------------
 
@@ -32,6 +44,25 @@ class CookieManager:
     @cookies.setter
     def cookies(self, value: CookieList) -> None:
         self._cookies = value
+        self._bump_generation()
+
+    @property
+    def generation(self) -> int:
+        """Номер текущего набора cookies; растёт при каждом изменении."""
+        return self._generation
+
+    def subscribe(self, listener: CookieListener) -> None:
+        """Подписывает *listener* на смену cookies (получает новое поколение).
+
+        Вызывается в потоке, который изменил cookies.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: CookieListener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
 
     def load(self) -> bool:
         """Загружает cookies из JSON-файла.
@@ -47,6 +78,7 @@ class CookieManager:
                 self._cookies = [
                     {"name": k, "value": v} for k, v in raw.items()
                 ]
+            self._bump_generation()
             logger.info("Загружено %d cookies из %s", len(self._cookies), self.path)
             return True
         except Exception as exc:
@@ -78,15 +110,34 @@ class CookieManager:
         """Сохраняет все cookies (без фильтрации)."""
         return self.save(only_important=False)
 
-    def apply_to_session(self, session: Any) -> None:
-        """Устанавливает cookies в HTTP-сессию (curl_cffi / requests)."""
+    def apply_to_session(self, session: Any) -> int:
+        """Устанавливает cookies в HTTP-сессию (curl_cffi / requests).
+
+        Возвращает поколение применённых cookies.
+        """
+        generation = self._generation
         for cookie in self._cookies:
             session.cookies.set(cookie["name"], cookie["value"])
+        return generation
 
-    def apply_to_scraper(self, scraper: Any) -> None:
-        """Устанавливает cookies в cloudscraper."""
+    def apply_to_scraper(self, scraper: Any) -> int:
+        """Устанавливает cookies в cloudscraper. Возвращает их поколение."""
+        generation = self._generation
         cookies_dict = {c["name"]: c["value"] for c in self._cookies}
         scraper.cookies.update(cookies_dict)
+        return generation
+
+    def sync_session(self, session: Any, applied_generation: int) -> int:
+        """Переприменяет cookies к живой сессии, если они обновились.
+
+        *applied_generation* — поколение, с которым сессия получила cookies
+        в прошлый раз. Старый cookie jar очищается целиком, чтобы в сессии
+        не осталось удалённых сайтом значений. Возвращает актуальное поколение.
+        """
+        if applied_generation == self._generation:
+            return applied_generation
+        session.cookies.clear()
+        return self.apply_to_session(session)
 
     def apply_to_driver(self, driver: Any, domain: str = ".com-x.life") -> None:
         """Добавляет cookies в Selenium WebDriver."""
@@ -106,6 +157,7 @@ class CookieManager:
     def update_from_driver(self, driver: Any) -> None:
         """Обновляет cookies из Selenium WebDriver."""
         self._cookies = driver.get_cookies()
+        self._bump_generation()
 
     def has_auth(self, driver: Any | None = None) -> bool:
         """Проверяет наличие авторизационных cookies.
@@ -116,3 +168,16 @@ class CookieManager:
             return all(driver.get_cookie(name) for name in AUTH_COOKIES)
         names = {c.get("name") for c in self._cookies}
         return all(name in names for name in AUTH_COOKIES)
+
+    # -- Поколения ------------------------------------------------------------
+
+    def _bump_generation(self) -> None:
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(generation)
+            except Exception as exc:
+                logger.warning("Ошибка подписчика cookies: %s", exc)
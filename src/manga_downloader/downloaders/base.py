@@ -2,17 +2,30 @@
 Базовый класс загрузчика глав.
 
 Содержит общую логику: формирование payload, парсинг URL ответа,
-скачивание файла и валидацию ZIP.
+скачивание файла, валидацию ZIP и повторы по классам ошибок — в синхронном
+и асинхронном вариантах.
 """
 
 from __future__ import annotations
 
 import abc
+import asyncio
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable
 
 from manga_downloader.config import DEFAULT_HEADERS
+from manga_downloader.downloaders.errors import (
+    BadArchiveError,
+    HttpStatusError,
+    MissingDataError,
+    RetryBudget,
+    classify,
+)
+from manga_downloader.downloaders.streaming import ProgressCallback
+from manga_downloader.rate_limiter import site_rate_limiter
 from manga_downloader.utils import get_file_size_kb, parse_download_url, validate_zip_file
 
 logger = logging.getLogger(__name__)
@@ -23,14 +36,26 @@ LogCallback = Callable[[str], None]
 class BaseDownloader(abc.ABC):
     """Абстрактный загрузчик одной главы.
 
-    Подклассы реализуют :meth:`_create_session` и :meth:`_post` / :meth:`_get`.
+    Подклассы реализуют :meth:`_api_request` и :meth:`_download_file`.
+    Их асинхронные варианты по умолчанию выполняют эти шаги в пуле потоков
+    цикла событий. Загрузчики с нативной поддержкой asyncio выставляют
+    ``is_async = True`` и переопределяют :meth:`_api_request_async` и
+    :meth:`_download_file_async`.
     """
 
     name: str = "base"
+    is_async: bool = False
+    # Методы восстановления (дорогие, например с запуском браузера) всегда
+    # стоят в конце цепочки и не переупорядочиваются по статистике.
+    is_recovery: bool = False
 
     def __init__(self, referer_url: str, log_fn: LogCallback | None = None) -> None:
         self.referer_url = referer_url
         self._log_fn = log_fn
+        # Синхронные шаги вызываются из потоков цикла событий; сессии
+        # загрузчиков не потокобезопасны, поэтому запросы одного экземпляра
+        # сериализуются. Паузы между повторами блокировку не держат.
+        self._sync_lock = threading.Lock()
 
     # -- Логирование -----------------------------------------------------------
 
@@ -48,29 +73,135 @@ class BaseDownloader(abc.ABC):
         news_id: int | str,
         zip_path: Path,
         title: str,
+        progress_fn: ProgressCallback | None = None,
     ) -> bool:
-        """Скачивает главу. Возвращает ``True`` при успехе."""
-        try:
-            self.log(f"  🔄 Метод {self.name} для {title}...")
+        """Скачивает главу. Возвращает ``True`` при успехе.
 
-            api_response = self._api_request(chapter_id, news_id)
-            raw_url = api_response.get("data")
-            if not raw_url:
-                raise ValueError("Нет URL в ответе API")
+        При ошибке повторяет попытку тем же методом в пределах бюджета
+        класса ошибки (см. :mod:`manga_downloader.downloaders.errors`).
+        *progress_fn* получает число уже записанных на диск байт архива.
+        """
+        self.log(f"  🔄 Метод {self.name} для {title}...")
+        return self._run_with_retries(
+            lambda: self._download_once(chapter_id, news_id, zip_path, progress_fn),
+        )
 
-            download_url = parse_download_url(raw_url)
-            self._download_file(download_url, zip_path)
+    async def download_async(
+        self,
+        chapter_id: int | str,
+        news_id: int | str,
+        zip_path: Path,
+        title: str,
+        progress_fn: ProgressCallback | None = None,
+    ) -> bool:
+        """Асинхронный вариант :meth:`download`.
+
+        Запросы синхронных загрузчиков выполняются в пуле потоков цикла
+        событий, асинхронных — прямо в цикле, не занимая поток на запрос.
+        Паузы между повторами в обоих случаях — ``asyncio.sleep``.
+        """
+        self.log(f"  🔄 Метод {self.name} для {title}...")
+        return await self._run_with_retries_async(
+            lambda: self._download_once_async(chapter_id, news_id, zip_path, progress_fn),
+        )
 
-            if not validate_zip_file(zip_path):
-                raise ValueError("Скачанный файл не является ZIP-архивом")
+    def _download_once(
+        self,
+        chapter_id: int | str,
+        news_id: int | str,
+        zip_path: Path,
+        progress_fn: ProgressCallback | None,
+    ) -> None:
+        api_response = self._api_request(chapter_id, news_id)
+        download_url = self._extract_download_url(api_response)
+        self._download_file(download_url, zip_path, progress_fn)
+        self._verify_download(zip_path)
+
+    async def _download_once_async(
+        self,
+        chapter_id: int | str,
+        news_id: int | str,
+        zip_path: Path,
+        progress_fn: ProgressCallback | None,
+    ) -> None:
+        api_response = await self._api_request_async(chapter_id, news_id)
+        download_url = self._extract_download_url(api_response)
+        await self._download_file_async(download_url, zip_path, progress_fn)
+        await asyncio.to_thread(self._verify_download, zip_path)
+
+    # -- Раздельные шаги (для предзагрузки ссылок) -----------------------------
+
+    async def resolve_url_async(self, chapter_id: int | str, news_id: int | str) -> str:
+        """Только запрос к API: возвращает подписанный URL архива главы.
+
+        Без повторов: при ошибке глава просто скачается обычной цепочкой.
+
+        Raises:
+            Exception: ошибка запроса или нет URL в ответе.
+        """
+        api_response = await self._api_request_async(chapter_id, news_id)
+        return self._extract_download_url(api_response)
+
+    async def fetch_async(
+        self,
+        url: str,
+        zip_path: Path,
+        title: str,
+        progress_fn: ProgressCallback | None = None,
+    ) -> bool:
+        """Только скачивание архива по уже полученному URL (без API)."""
+        self.log(f"  🔄 Метод {self.name}: {title} по готовой ссылке...")
 
-            size = get_file_size_kb(zip_path)
-            self.log(f"  ✅ Метод {self.name} успешен ({size:.1f} KB)")
-            return True
+        async def attempt() -> None:
+            await self._download_file_async(url, zip_path, progress_fn)
+            await asyncio.to_thread(self._verify_download, zip_path)
 
-        except Exception as exc:
-            self.log(f"  ⚠️ Метод {self.name} не сработал: {str(exc)[:100]}")
-            return False
+        return await self._run_with_retries_async(attempt, "Готовая ссылка не сработала")
+
+    # -- Повторы ---------------------------------------------------------------
+
+    def _run_with_retries(
+        self, attempt: Callable[[], None], failure: str | None = None,
+    ) -> bool:
+        """Выполняет *attempt*, повторяя его по политике класса ошибки."""
+        budget = RetryBudget()
+        while True:
+            try:
+                with self._sync_lock:
+                    attempt()
+                return True
+            except Exception as exc:
+                delay = self._retry_delay(budget, exc, failure)
+                if delay is None:
+                    return False
+            time.sleep(delay)
+
+    async def _run_with_retries_async(
+        self, attempt: Callable[[], Awaitable[None]], failure: str | None = None,
+    ) -> bool:
+        budget = RetryBudget()
+        while True:
+            try:
+                await attempt()
+                return True
+            except Exception as exc:
+                delay = self._retry_delay(budget, exc, failure)
+                if delay is None:
+                    return False
+            await asyncio.sleep(delay)
+
+    def _retry_delay(
+        self, budget: RetryBudget, exc: Exception, failure: str | None,
+    ) -> float | None:
+        """Пишет ошибку в лог и возвращает паузу до повтора (``None`` — сдаться)."""
+        kind = classify(exc)
+        delay = budget.next_delay(kind)
+        if delay is None:
+            prefix = failure or f"Метод {self.name} не сработал"
+            self.log(f"  ⚠️ {prefix} ({kind.value}): {str(exc)[:100]}")
+        else:
+            self.log(f"  ⏳ Метод {self.name}: {kind.value}, повтор через {delay:.1f} с")
+        return delay
 
     # -- Абстрактные методы (реализуются в подклассах) -------------------------
 
@@ -79,11 +210,74 @@ class BaseDownloader(abc.ABC):
         """Отправляет POST-запрос к API и возвращает JSON-ответ."""
 
     @abc.abstractmethod
-    def _download_file(self, url: str, dest: Path) -> None:
-        """Скачивает файл по URL и сохраняет в *dest*."""
+    def _download_file(
+        self, url: str, dest: Path, progress_fn: ProgressCallback | None = None,
+    ) -> None:
+        """Скачивает файл по URL потоково и сохраняет в *dest*."""
+
+    async def _api_request_async(
+        self, chapter_id: int | str, news_id: int | str,
+    ) -> dict[str, Any]:
+        """Асинхронный POST к API; по умолчанию :meth:`_api_request` в потоке."""
+        return await asyncio.to_thread(self._locked, self._api_request, chapter_id, news_id)
+
+    async def _download_file_async(
+        self, url: str, dest: Path, progress_fn: ProgressCallback | None = None,
+    ) -> None:
+        """Асинхронное скачивание файла; по умолчанию :meth:`_download_file` в потоке."""
+        await asyncio.to_thread(self._locked, self._download_file, url, dest, progress_fn)
+
+    def _locked(self, step: Callable[..., Any], *args: Any) -> Any:
+        with self._sync_lock:
+            return step(*args)
 
     # -- Вспомогательные -------------------------------------------------------
 
+    @staticmethod
+    def _extract_download_url(api_response: dict[str, Any]) -> str:
+        """Достаёт URL архива из ответа API."""
+        raw_url = api_response.get("data")
+        if not raw_url:
+            raise MissingDataError("Нет URL в ответе API")
+        return parse_download_url(raw_url)
+
+    def _verify_download(self, zip_path: Path) -> None:
+        """Проверяет скачанный архив и пишет итог в лог.
+
+        Битый файл удаляется, чтобы следующий метод скачал главу заново,
+        а не докачивал мусор.
+        """
+        if not validate_zip_file(zip_path):
+            zip_path.unlink(missing_ok=True)
+            raise BadArchiveError("Скачанный файл не является ZIP-архивом")
+        size = get_file_size_kb(zip_path)
+        self.log(f"  ✅ Метод {self.name} успешен ({size:.1f} KB)")
+
+    @staticmethod
+    def _throttle(url: str) -> None:
+        """Ждёт разрешения общего лимитера, если *url* ведёт на сайт."""
+        if site_rate_limiter.applies_to(url):
+            site_rate_limiter.acquire()
+
+    @staticmethod
+    async def _throttle_async(url: str) -> None:
+        if site_rate_limiter.applies_to(url):
+            await site_rate_limiter.acquire_async()
+
+    @staticmethod
+    def _check_status(response: Any) -> None:
+        """Проверяет статус ответа API: не 200 — :class:`HttpStatusError`."""
+        if response.status_code != 200:
+            raise HttpStatusError(response.status_code)
+
+    @staticmethod
+    def _report_response(url: str, response: Any) -> None:
+        """Сообщает лимитеру статус ответа сайта (и ``Retry-After``)."""
+        if site_rate_limiter.applies_to(url):
+            site_rate_limiter.record(
+                response.status_code, response.headers.get("Retry-After"),
+            )
+
     def _make_headers(self, extra: dict[str, str] | None = None) -> dict[str, str]:
         """Возвращает заголовки с Referer и опциональными дополнениями."""
         headers = {**DEFAULT_HEADERS, "Referer": self.referer_url}
@@ -100,6 +294,10 @@ class BaseDownloader(abc.ABC):
     def close(self) -> None:
         """Освобождает ресурсы. Переопределяется в подклассах."""
 
+    async def aclose(self) -> None:
+        """Освобождает ресурсы, созданные в цикле событий."""
+        self.close()
+
     def __enter__(self) -> "BaseDownloader":
         return self
 
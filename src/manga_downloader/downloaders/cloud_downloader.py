@@ -9,9 +9,14 @@ from typing import Any
 
 import cloudscraper
 
-from manga_downloader.config import API_URL, HTTP_TIMEOUT, DOWNLOAD_TIMEOUT
+from manga_downloader.config import API_URL, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_TIMEOUT, HTTP_TIMEOUT
 from manga_downloader.cookies import CookieManager
 from manga_downloader.downloaders.base import BaseDownloader, LogCallback
+from manga_downloader.downloaders.streaming import (
+    PartialDownload,
+    ProgressCallback,
+    write_stream,
+)
 
 
 class CloudscraperDownloader(BaseDownloader):
@@ -28,6 +33,7 @@ class CloudscraperDownloader(BaseDownloader):
         super().__init__(referer_url, log_fn)
         self._cookie_manager = cookie_manager
         self._scraper: cloudscraper.CloudScraper | None = None
+        self._scraper_cookies = 0  # поколение cookies в self._scraper
 
     def _ensure_scraper(self) -> cloudscraper.CloudScraper:
         if self._scraper is None:
@@ -40,32 +46,49 @@ class CloudscraperDownloader(BaseDownloader):
                 }
             )
             self._scraper.headers.update(self._make_headers())
-            self._cookie_manager.apply_to_scraper(self._scraper)
+            self._scraper_cookies = self._cookie_manager.apply_to_scraper(self._scraper)
+        else:
+            self._scraper_cookies = self._cookie_manager.sync_session(
+                self._scraper, self._scraper_cookies,
+            )
         return self._scraper
 
     def _api_request(self, chapter_id: int | str, news_id: int | str) -> dict[str, Any]:
         scraper = self._ensure_scraper()
         payload = self._make_payload(chapter_id, news_id)
+        self._throttle(API_URL)
         response = scraper.post(API_URL, data=payload, timeout=HTTP_TIMEOUT)
-        if response.status_code != 200:
-            raise RuntimeError(f"HTTP {response.status_code}")
+        self._report_response(API_URL, response)
+        self._check_status(response)
         return response.json()
 
-    def _download_file(self, url: str, dest: Path) -> None:
+    def _download_file(
+        self, url: str, dest: Path, progress_fn: ProgressCallback | None = None,
+    ) -> None:
         scraper = self._ensure_scraper()
+        partial = PartialDownload(dest)
+        self._throttle(url)
         response = scraper.get(
             url,
             timeout=DOWNLOAD_TIMEOUT,
             allow_redirects=True,
+            stream=True,
             headers={
                 "Referer": self.referer_url,
                 "Accept": "application/zip,*/*",
+                **partial.request_headers(),
             },
         )
-        if response.status_code != 200:
-            raise RuntimeError(f"Ошибка скачивания: HTTP {response.status_code}")
-        with open(dest, "wb") as fh:
-            fh.write(response.content)
+        self._report_response(url, response)
+        with response:
+            offset = partial.accept(response.status_code, response.headers)
+            write_stream(
+                response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE),
+                partial.path,
+                progress_fn,
+                offset,
+            )
+        partial.commit()
 
     def close(self) -> None:
         if self._scraper is not None:
@@ -1,5 +1,10 @@
 """
 Загрузчик на основе curl_cffi с эмуляцией Chrome.
+
+Поддерживает два режима: синхронный (сессии из общего пула
+:mod:`manga_downloader.http_pool`) и нативный asyncio
+(``curl_cffi.AsyncSession``), в котором все запросы глав идут корутинами
+в одном цикле событий.
 """
 
 from __future__ import annotations
@@ -9,66 +14,145 @@ from typing import Any
 
 import curl_cffi
 
-from manga_downloader.config import API_URL, HTTP_TIMEOUT, DOWNLOAD_TIMEOUT
+from manga_downloader.config import (
+    API_URL,
+    DOWNLOAD_TIMEOUT,
+    HTTP_TIMEOUT,
+    MAX_PARALLEL_DOWNLOADS,
+    PREFETCH_DEPTH,
+)
 from manga_downloader.cookies import CookieManager
 from manga_downloader.downloaders.base import BaseDownloader, LogCallback
+from manga_downloader.downloaders.streaming import (
+    PartialDownload,
+    ProgressCallback,
+    write_stream,
+    write_stream_async,
+)
+from manga_downloader.http_pool import http_pool
 
 
 class CurlCffiDownloader(BaseDownloader):
     """Метод 1: curl_cffi с ``impersonate="chrome"``."""
 
     name = "curl_cffi"
+    is_async = True
 
     def __init__(
         self,
         referer_url: str,
         cookie_manager: CookieManager,
         log_fn: LogCallback | None = None,
+        max_clients: int | None = None,
     ) -> None:
         super().__init__(referer_url, log_fn)
         self._cookie_manager = cookie_manager
-        self._session: curl_cffi.Session | None = None
+        # AsyncSession привязана к циклу событий задачи, поэтому она своя,
+        # а не из общего пула; внутри неё curl-хэндлы тоже переиспользуются.
+        self._async_session: curl_cffi.AsyncSession | None = None
+        # Лимит одновременных запросов AsyncSession: загрузки глав плюс
+        # API-запросы предзагрузки ссылок.
+        self._max_clients = max_clients or MAX_PARALLEL_DOWNLOADS + PREFETCH_DEPTH
+        self._async_session_cookies = 0
 
-    def _ensure_session(self) -> curl_cffi.Session:
-        if self._session is None:
-            self._session = curl_cffi.Session()
-            self._session.headers.update(self._make_headers())
-            self._cookie_manager.apply_to_session(self._session)
-        return self._session
+    def _ensure_async_session(self) -> curl_cffi.AsyncSession:
+        if self._async_session is None:
+            self._async_session = curl_cffi.AsyncSession(max_clients=self._max_clients)
+            self._async_session.headers.update(self._make_headers())
+            self._async_session_cookies = self._cookie_manager.apply_to_session(
+                self._async_session,
+            )
+        else:
+            self._async_session_cookies = self._cookie_manager.sync_session(
+                self._async_session, self._async_session_cookies,
+            )
+        return self._async_session
 
     def _api_request(self, chapter_id: int | str, news_id: int | str) -> dict[str, Any]:
-        session = self._ensure_session()
         payload = self._make_payload(chapter_id, news_id)
-        response = session.post(
+        self._throttle(API_URL)
+        with http_pool.session(self._cookie_manager) as session:
+            response = session.post(
+                API_URL,
+                data=payload,
+                headers=self._make_headers(),
+                impersonate="chrome",
+                timeout=HTTP_TIMEOUT,
+            )
+        self._report_response(API_URL, response)
+        self._check_status(response)
+        return response.json()
+
+    def _download_file(
+        self, url: str, dest: Path, progress_fn: ProgressCallback | None = None,
+    ) -> None:
+        partial = PartialDownload(dest)
+        self._throttle(url)
+        with http_pool.session(self._cookie_manager) as session:
+            response = session.get(
+                url,
+                headers=self._make_headers(partial.request_headers()),
+                impersonate="chrome",
+                allow_redirects=True,
+                timeout=DOWNLOAD_TIMEOUT,
+                # Потоковый ответ идёт на копии хэндла: соединение
+                # сессии пула здесь не переиспользуется.
+                stream=True,
+            )
+            self._report_response(url, response)
+            try:
+                offset = partial.accept(response.status_code, response.headers)
+                write_stream(response.iter_content(), partial.path, progress_fn, offset)
+            finally:
+                response.close()
+        partial.commit()
+
+    async def _api_request_async(
+        self, chapter_id: int | str, news_id: int | str,
+    ) -> dict[str, Any]:
+        session = self._ensure_async_session()
+        payload = self._make_payload(chapter_id, news_id)
+        await self._throttle_async(API_URL)
+        response = await session.post(
             API_URL,
             data=payload,
             impersonate="chrome",
             timeout=HTTP_TIMEOUT,
         )
-        if response.status_code != 200:
-            raise RuntimeError(f"HTTP {response.status_code}")
+        self._report_response(API_URL, response)
+        self._check_status(response)
         return response.json()
 
-    def _download_file(self, url: str, dest: Path) -> None:
-        session = self._ensure_session()
-        response = session.get(
+    async def _download_file_async(
+        self, url: str, dest: Path, progress_fn: ProgressCallback | None = None,
+    ) -> None:
+        session = self._ensure_async_session()
+        partial = PartialDownload(dest)
+        await self._throttle_async(url)
+        response = await session.get(
             url,
+            headers=partial.request_headers(),
             impersonate="chrome",
             allow_redirects=True,
             timeout=DOWNLOAD_TIMEOUT,
+            stream=True,
         )
-        if response.status_code != 200:
-            raise RuntimeError(f"Ошибка скачивания: HTTP {response.status_code}")
-        with open(dest, "wb") as fh:
-            fh.write(response.content)
+        self._report_response(url, response)
+        try:
+            offset = partial.accept(response.status_code, response.headers)
+            await write_stream_async(
+                response.aiter_content(), partial.path, progress_fn, offset,
+            )
+        finally:
+            await response.aclose()
+        partial.commit()
 
     def reset_session(self, cookie_manager: CookieManager | None = None) -> None:
-        """Пересоздаёт сессию (например, после обновления cookies)."""
-        self.close()
+        """Переключает загрузчик на другой набор cookies."""
         if cookie_manager is not None:
             self._cookie_manager = cookie_manager
 
-    def close(self) -> None:
-        if self._session is not None:
-            self._session.close()
-            self._session = None
+    async def aclose(self) -> None:
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
@@ -0,0 +1,121 @@
+"""
+Классификация ошибок загрузки и политика повторов.
+
+Каждая ошибка метода относится к одному из классов :class:`ErrorKind`.
+У класса свой бюджет повторов тем же методом с экспоненциальной
+задержкой и случайным разбросом (full jitter); только когда бюджет
+исчерпан, :class:`FallbackDownloader` переходит к следующему методу.
+Так кратковременный таймаут не стоит переключения метода или запуска
+браузера, а постоянная ошибка (например, 404) не тратит время на повторы.
+"""
+
+from __future__ import annotations
+
+import enum
+import random
+import ssl
+from dataclasses import dataclass
+
+import requests.exceptions
+from cloudscraper.exceptions import CloudflareException
+from curl_cffi.requests import exceptions as curl_exceptions
+
+from manga_downloader.config import RETRY_BUDGETS
+
+_TIMEOUT_ERRORS = (
+    TimeoutError,
+    curl_exceptions.Timeout,
+    requests.exceptions.Timeout,
+)
+_TLS_ERRORS = (
+    ssl.SSLError,
+    curl_exceptions.SSLError,
+    curl_exceptions.CertificateVerifyError,
+    requests.exceptions.SSLError,
+)
+
+
+class ErrorKind(enum.Enum):
+    """Класс ошибки загрузки (значение — подпись для лога)."""
+
+    TIMEOUT = "таймаут"
+    TLS = "ошибка TLS"
+    CLOUDFLARE = "403 / Cloudflare"
+    RATE_LIMITED = "429 Too Many Requests"
+    SERVER = "ошибка сервера"
+    BAD_ZIP = "битый архив"
+    NO_DATA = "нет ссылки в ответе API"
+    OTHER = "ошибка"
+
+
+class HttpStatusError(RuntimeError):
+    """Сайт ответил неуспешным HTTP-статусом."""
+
+    def __init__(self, status_code: int, message: str | None = None) -> None:
+        super().__init__(message or f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class MissingDataError(ValueError):
+    """В ответе API нет ссылки на архив."""
+
+
+class BadArchiveError(ValueError):
+    """Скачанный файл не является ZIP-архивом."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Бюджет повторов тем же методом для одного класса ошибок."""
+
+    retries: int
+    base_delay: float = 1.0
+    max_delay: float = 10.0
+
+    def delay(self, attempt: int) -> float:
+        """Задержка перед повтором номер *attempt* (с 0), full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+RETRY_POLICIES: dict[ErrorKind, RetryPolicy] = {
+    kind: RetryPolicy(*RETRY_BUDGETS[kind.name]) for kind in ErrorKind
+}
+
+
+def classify(exc: BaseException) -> ErrorKind:
+    """Определяет класс ошибки загрузки."""
+    if isinstance(exc, HttpStatusError):
+        if exc.status_code == 403:
+            return ErrorKind.CLOUDFLARE
+        if exc.status_code == 429:
+            return ErrorKind.RATE_LIMITED
+        if exc.status_code >= 500:
+            return ErrorKind.SERVER
+        return ErrorKind.OTHER
+    if isinstance(exc, CloudflareException):
+        return ErrorKind.CLOUDFLARE
+    if isinstance(exc, _TIMEOUT_ERRORS):
+        return ErrorKind.TIMEOUT
+    if isinstance(exc, _TLS_ERRORS):
+        return ErrorKind.TLS
+    if isinstance(exc, BadArchiveError):
+        return ErrorKind.BAD_ZIP
+    if isinstance(exc, MissingDataError):
+        return ErrorKind.NO_DATA
+    return ErrorKind.OTHER
+
+
+class RetryBudget:
+    """Учёт повторов одного вызова метода по классам ошибок."""
+
+    def __init__(self) -> None:
+        self._attempts: dict[ErrorKind, int] = {}
+
+    def next_delay(self, kind: ErrorKind) -> float | None:
+        """Задержка перед следующим повтором или ``None``, если бюджет исчерпан."""
+        attempt = self._attempts.get(kind, 0)
+        policy = RETRY_POLICIES[kind]
+        if attempt >= policy.retries:
+            return None
+        self._attempts[kind] = attempt + 1
+        return policy.delay(attempt)
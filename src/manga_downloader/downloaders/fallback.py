@@ -1,38 +1,63 @@
 """
 Оркестратор загрузки с цепочкой fallback-методов.
+
+Порядок методов не фиксирован: по статистике :mod:`health` первым идёт
+метод, который надёжнее всего работал в последних главах, а метод с серией
+ошибок временно пропускается (circuit breaker).
+
+Синхронный загрузчик обслуживает один запрос за раз, поэтому параллельные
+главы берут каждая свой экземпляр такого метода (:meth:`FallbackDownloader._lease`).
 """
 
 from __future__ import annotations
 
+import contextlib
 import logging
 import time
 from pathlib import Path
+from typing import AsyncIterator
 
-from manga_downloader.config import FALLBACK_DELAY
+from manga_downloader.config import CIRCUIT_COOLDOWN
 from manga_downloader.cookies import CookieManager
-from manga_downloader.downloaders.base import LogCallback
+from manga_downloader.downloaders.base import BaseDownloader, LogCallback
 from manga_downloader.downloaders.curl_downloader import CurlCffiDownloader
 from manga_downloader.downloaders.cloud_downloader import CloudscraperDownloader
+from manga_downloader.downloaders.health import MethodHealth
 from manga_downloader.downloaders.selenium_downloader import SeleniumRecoveryDownloader
+from manga_downloader.downloaders.streaming import ProgressCallback
 
 logger = logging.getLogger(__name__)
 
 
 class FallbackDownloader:
-    """Пробует загрузчики по цепочке: curl_cffi -> cloudscraper -> Selenium."""
+    """Пробует загрузчики по цепочке: curl_cffi -> cloudscraper -> Selenium.
+
+    Цепочка переупорядочивается по здоровью методов; Selenium как метод
+    восстановления всегда остаётся последним. *max_clients* — лимит
+    одновременных запросов ``AsyncSession`` у :class:`CurlCffiDownloader`.
+    """
 
     def __init__(
         self,
         referer_url: str,
         cookie_manager: CookieManager,
         log_fn: LogCallback | None = None,
+        max_clients: int | None = None,
     ) -> None:
         self._log_fn = log_fn
+        self._referer_url = referer_url
         self._downloaders = [
-            CurlCffiDownloader(referer_url, cookie_manager, log_fn),
+            CurlCffiDownloader(referer_url, cookie_manager, log_fn, max_clients),
             CloudscraperDownloader(referer_url, cookie_manager, log_fn),
             SeleniumRecoveryDownloader(referer_url, cookie_manager, log_fn),
         ]
+        self._health = {dl.name: MethodHealth(dl.name) for dl in self._downloaders}
+        # Свободные экземпляры синхронных методов; дополнительные создаются,
+        # когда все заняты параллельными главами.
+        self._idle = {dl.name: [dl] for dl in self._downloaders if not dl.is_async}
+        self._spawned: list[BaseDownloader] = []
+        self._cookie_manager = cookie_manager
+        cookie_manager.subscribe(self._on_cookies_refreshed)
 
     def log(self, msg: str) -> None:
         if self._log_fn:
@@ -40,29 +65,138 @@ class FallbackDownloader:
         else:
             logger.info(msg)
 
-    def download(
+    async def download_async(
         self,
         chapter_id: int | str,
         news_id: int | str,
         zip_path: Path,
         title: str,
+        progress_fn: ProgressCallback | None = None,
+        url: str | None = None,
     ) -> bool:
-        """Пробует все методы по очереди, возвращает ``True`` при первом успехе."""
-        for i, dl in enumerate(self._downloaders):
-            if dl.download(chapter_id, news_id, zip_path, title):
+        """Пробует методы по очереди, возвращает ``True`` при первом успехе.
+
+        Нативные async-методы выполняются в цикле событий, синхронные — в
+        его пуле потоков. Паузы между методами не нужны: темп запросов
+        задаёт общий адаптивный лимитер (:mod:`manga_downloader.rate_limiter`).
+
+        Если передан заранее полученный *url*, сначала архив скачивается по
+        нему лучшим из обычных методов без запроса к API (если все обычные
+        методы отключены, шаг пропускается). Если ссылка устарела,
+        выполняется обычная цепочка с новым запросом к API (уже скачанная
+        часть архива при этом докачивается, а не качается заново).
+        """
+        chain = self._ordered()
+        regular = [dl for dl in chain if not dl.is_recovery]
+        if url and regular:
+            started = time.monotonic()
+            async with self._lease(regular[0]) as dl:
+                ok = await dl.fetch_async(url, zip_path, title, progress_fn)
+            self._record(regular[0], ok, time.monotonic() - started)
+            if ok:
+                return True
+            self.log("  🔁 Запрашиваю новую ссылку на архив...")
+
+        for dl in chain:
+            started = time.monotonic()
+            async with self._lease(dl) as instance:
+                ok = await instance.download_async(chapter_id, news_id, zip_path, title, progress_fn)
+            self._record(dl, ok, time.monotonic() - started)
+            if ok:
                 return True
-            if i < len(self._downloaders) - 1:
-                time.sleep(FALLBACK_DELAY)
 
         self.log(f"  ❌ Все методы не сработали для {title}")
         return False
 
-    def close(self) -> None:
+    async def resolve_url_async(self, chapter_id: int | str, news_id: int | str) -> str:
+        """Получает ссылку на архив главы лучшим из обычных методов (для предзагрузки)."""
+        chain = [dl for dl in self._ordered() if not dl.is_recovery]
+        if not chain:
+            raise RuntimeError("Нет доступных методов для получения ссылки")
+        async with self._lease(chain[0]) as dl:
+            return await dl.resolve_url_async(chapter_id, news_id)
+
+    @contextlib.asynccontextmanager
+    async def _lease(self, dl: BaseDownloader) -> AsyncIterator[BaseDownloader]:
+        """Экземпляр метода *dl* на один вызов (вызывать из цикла событий).
+
+        Асинхронный метод общий. Синхронный отдаётся свободным экземпляром,
+        а если все заняты — новым, который потом переиспользуется.
+        """
+        if dl.is_async:
+            yield dl
+            return
+        idle = self._idle[dl.name]
+        if idle:
+            instance = idle.pop()
+        else:
+            instance = type(dl)(self._referer_url, self._cookie_manager, self._log_fn)
+            self._spawned.append(instance)
+        try:
+            yield instance
+        finally:
+            idle.append(instance)
+
+    # -- Здоровье методов ------------------------------------------------------
+
+    def _ordered(self) -> list[BaseDownloader]:
+        """Доступные методы в порядке попыток.
+
+        Обычные методы сортируются по здоровью (стабильно, поэтому при
+        равной статистике сохраняется исходный приоритет), методы
+        восстановления идут последними. Отключённые методы пропускаются;
+        если отключены все, пробуется тот, чей перерыв закончится раньше.
+        """
+        regular = [dl for dl in self._downloaders if not dl.is_recovery]
+        regular.sort(key=lambda dl: self._health[dl.name].sort_key())
+        recovery = [dl for dl in self._downloaders if dl.is_recovery]
+
+        now = time.monotonic()
+        chain = [dl for dl in regular + recovery if not self._health[dl.name].is_open(now)]
+        if not chain:
+            chain = [min(self._downloaders, key=lambda dl: self._health[dl.name].open_until)]
+        return chain
+
+    def _record(self, dl: BaseDownloader, ok: bool, elapsed: float) -> None:
+        health = self._health[dl.name]
+        if ok:
+            health.record_success(elapsed)
+        elif health.record_failure():
+            self.log(
+                f"  ⛔ Метод {dl.name} отключён на {CIRCUIT_COOLDOWN} с "
+                f"после {health.consecutive_failures} ошибок подряд"
+            )
+
+    def _on_cookies_refreshed(self, generation: int) -> None:
+        """Свежие cookies — повод снова попробовать отключённые методы.
+
+        Живые сессии загрузчиков сами переприменят cookies нового поколения
+        при следующем запросе.
+        """
         for dl in self._downloaders:
+            if not dl.is_recovery:
+                self._health[dl.name].reset_circuit()
+        logger.debug("Cookies обновлены (поколение %d)", generation)
+
+    def close(self) -> None:
+        self._cookie_manager.unsubscribe(self._on_cookies_refreshed)
+        for dl in self._downloaders + self._spawned:
             dl.close()
 
+    async def aclose(self) -> None:
+        """Закрывает ресурсы, в том числе async-сессии (вызывать из цикла)."""
+        self._cookie_manager.unsubscribe(self._on_cookies_refreshed)
+        for dl in self._downloaders + self._spawned:
+            await dl.aclose()
+
     def __enter__(self) -> "FallbackDownloader":
         return self
 
     def __exit__(self, *exc: object) -> None:
         self.close()
+
+    async def __aenter__(self) -> "FallbackDownloader":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
@@ -0,0 +1,82 @@
+"""
+Статистика здоровья методов загрузки и circuit breaker.
+
+:class:`FallbackDownloader` ведёт по объекту :class:`MethodHealth` на каждый
+метод: доля успехов в последних попытках, ошибки подряд и средняя
+длительность. По ним цепочка переупорядочивается, а метод, который
+``CIRCUIT_FAILURE_THRESHOLD`` раз подряд не сработал, пропускается
+``CIRCUIT_COOLDOWN`` секунд.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from manga_downloader.config import (
+    CIRCUIT_COOLDOWN,
+    CIRCUIT_FAILURE_THRESHOLD,
+    HEALTH_WINDOW,
+)
+
+_LATENCY_SMOOTHING = 0.3  # вес нового замера в скользящем среднем
+
+
+@dataclass
+class MethodHealth:
+    """Здоровье одного метода загрузки."""
+
+    name: str
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency: float | None = None
+    open_until: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=HEALTH_WINDOW))
+
+    @property
+    def success_rate(self) -> float:
+        """Доля успехов в последних попытках (со сглаживанием Лапласа).
+
+        Без данных — 0.5, поэтому непроверенный метод не обгоняет
+        работающий и не отстаёт от сломанного.
+        """
+        return (sum(self.recent) + 1) / (len(self.recent) + 2)
+
+    def is_open(self, now: float | None = None) -> bool:
+        """``True``, пока метод отключён после серии ошибок."""
+        return (now if now is not None else time.monotonic()) < self.open_until
+
+    def sort_key(self) -> tuple[float, float]:
+        """Ключ сортировки: сначала надёжные, при равенстве — быстрые."""
+        latency = self.latency if self.latency is not None else math.inf
+        return (-round(self.success_rate, 1), latency)
+
+    def record_success(self, elapsed: float) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.recent.append(True)
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += _LATENCY_SMOOTHING * (elapsed - self.latency)
+
+    def reset_circuit(self) -> None:
+        """Снимает отключение (например, после обновления cookies)."""
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_failure(self) -> bool:
+        """Учитывает ошибку. Возвращает ``True``, если метод только что отключён."""
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.recent.append(False)
+        if self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+            now = time.monotonic()
+            was_open = self.is_open(now)
+            self.open_until = now + CIRCUIT_COOLDOWN
+            return not was_open
+        return False
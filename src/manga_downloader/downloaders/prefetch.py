@@ -0,0 +1,84 @@
+"""
+Предзагрузка подписанных ссылок на архивы глав.
+
+Пока скачивается архив текущей главы, запросы к API для следующих
+``PREFETCH_DEPTH`` глав уже выполняются в фоне. На критическом пути главы
+остаётся только GET архива. Устаревшие ссылки (старше ``PREFETCH_URL_TTL``
+или отвергнутые сервером) запрашиваются заново обычной fallback-цепочкой.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from manga_downloader.config import PREFETCH_DEPTH, PREFETCH_URL_TTL
+
+if TYPE_CHECKING:
+    from manga_downloader.downloaders.fallback import FallbackDownloader
+
+logger = logging.getLogger(__name__)
+
+
+class UrlPrefetcher:
+    """Получает ссылки на архивы глав с опережением на *depth* глав.
+
+    Работает внутри цикла событий; индексы глав — 0-based позиции в
+    списке *chapter_ids*.
+    """
+
+    def __init__(
+        self,
+        downloader: FallbackDownloader,
+        news_id: int | str,
+        chapter_ids: list[int | str],
+        depth: int = PREFETCH_DEPTH,
+    ) -> None:
+        self._downloader = downloader
+        self._news_id = news_id
+        self._chapter_ids = chapter_ids
+        self._depth = depth
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._next = 0  # первая глава, для которой ещё не запущен запрос
+
+    async def take(self, index: int) -> str | None:
+        """Возвращает готовую ссылку для главы *index* или ``None``.
+
+        Заодно запускает запросы для следующих *depth* глав.
+        """
+        self._schedule_until(index + self._depth)
+        task = self._tasks.pop(index, None)
+        if task is None:
+            return None
+        try:
+            url, resolved_at = await task
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.debug("Предзагрузка ссылки для главы %d не удалась: %s", index + 1, exc)
+            return None
+        if time.monotonic() - resolved_at > PREFETCH_URL_TTL:
+            logger.debug("Ссылка для главы %d устарела до начала загрузки", index + 1)
+            return None
+        return url
+
+    def close(self) -> None:
+        """Отменяет незавершённые запросы."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    def _schedule_until(self, last: int) -> None:
+        last = min(last, len(self._chapter_ids) - 1)
+        while self._next <= last:
+            index = self._next
+            self._tasks[index] = asyncio.ensure_future(self._resolve(index))
+            self._next += 1
+
+    async def _resolve(self, index: int) -> tuple[str, float]:
+        url = await self._downloader.resolve_url_async(
+            self._chapter_ids[index], self._news_id,
+        )
+        return url, time.monotonic()
@@ -2,18 +2,20 @@
 Загрузчик с восстановлением сессии через Selenium.
 
 Используется как последний fallback при ошибках 403.
-Открывает Chrome, обновляет cookies и повторяет запрос через curl_cffi.
+Обновляет cookies в общем «тёплом» браузере (:data:`~manga_downloader.driver.shared_browser`)
+и повторяет запрос через curl_cffi. Браузер не закрывается после главы,
+поэтому повторное восстановление не ждёт запуска Chrome.
 """
 
 from __future__ import annotations
 
+import asyncio
 import time
 from pathlib import Path
 from typing import Any
 
 import curl_cffi
 from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 
 from manga_downloader.config import (
     API_URL,
@@ -21,17 +23,23 @@ from manga_downloader.config import (
     COOKIE_DOMAIN,
     DOWNLOAD_TIMEOUT,
     HTTP_TIMEOUT,
-    USER_AGENT,
 )
 from manga_downloader.cookies import CookieManager
 from manga_downloader.downloaders.base import BaseDownloader, LogCallback
-from manga_downloader.utils import get_file_size_kb, parse_download_url, validate_zip_file
+from manga_downloader.downloaders.streaming import (
+    PartialDownload,
+    ProgressCallback,
+    write_stream,
+)
+from manga_downloader.driver import shared_browser
+from manga_downloader.http_pool import http_pool
 
 
 class SeleniumRecoveryDownloader(BaseDownloader):
     """Метод 3: восстановление сессии через Selenium + curl_cffi."""
 
     name = "Selenium recovery"
+    is_recovery = True
 
     def __init__(
         self,
@@ -43,62 +51,73 @@ class SeleniumRecoveryDownloader(BaseDownloader):
         self._cookie_manager = cookie_manager
 
     # Переопределяем download целиком, т.к. логика сильно отличается:
-    # нужно открыть браузер, обновить cookies, затем скачать через curl_cffi.
+    # нужно взять браузер, обновить cookies, затем скачать через curl_cffi.
     def download(
         self,
         chapter_id: int | str,
         news_id: int | str,
         zip_path: Path,
         title: str,
+        progress_fn: ProgressCallback | None = None,
     ) -> bool:
-        driver = None
-        session = None
+        self.log(f"  🔄 Метод {self.name} для {title}...")
         try:
-            self.log(f"  🔄 Метод {self.name} для {title}...")
-
-            driver = self._open_browser()
-            self._refresh_cookies(driver)
-
-            session = self._build_session()
-            json_data = self._api_post(session, chapter_id, news_id)
-
-            raw_url = json_data.get("data")
-            if not raw_url:
-                raise ValueError("Нет URL в ответе API")
-
-            download_url = parse_download_url(raw_url)
-            self._fetch_file(session, download_url, zip_path)
-
-            if not validate_zip_file(zip_path):
-                raise ValueError("Скачанный файл не является ZIP-архивом")
-
-            size = get_file_size_kb(zip_path)
-            self.log(f"  ✅ Метод {self.name} успешен ({size:.1f} KB)")
+            with shared_browser.session() as driver:
+                self._open_site(driver)
+                self._refresh_cookies(driver)
+        except Exception as exc:
+            self.log(f"  ⚠️ Метод {self.name} не сработал: {str(exc)[:100]}")
+            return False
 
+        # Повторы по политике ошибок касаются только HTTP-части:
+        # свежие cookies уже получены, браузер второй раз не нужен.
+        ok = self._run_with_retries(
+            lambda: self._download_with_session(chapter_id, news_id, zip_path, progress_fn),
+        )
+        if ok:
             self._cookie_manager.save_all()
             self.log("  💾 Обновленные куки сохранены")
-            return True
+        return ok
 
-        except Exception as exc:
-            self.log(f"  ⚠️ Метод {self.name} не сработал: {str(exc)[:100]}")
-            return False
-        finally:
-            if session is not None:
-                session.close()
-            if driver is not None:
-                driver.quit()
+    async def download_async(
+        self,
+        chapter_id: int | str,
+        news_id: int | str,
+        zip_path: Path,
+        title: str,
+        progress_fn: ProgressCallback | None = None,
+    ) -> bool:
+        # Браузер управляется синхронно, поэтому восстановление целиком
+        # выполняется в пуле потоков цикла событий.
+        return await asyncio.to_thread(
+            self.download, chapter_id, news_id, zip_path, title, progress_fn,
+        )
 
     # -- Внутренние методы -----------------------------------------------------
 
-    def _open_browser(self) -> webdriver.Chrome:
-        options = Options()
-        options.add_argument(f"--user-agent={USER_AGENT}")
-        options.add_argument("--log-level=3")
-        options.add_experimental_option("detach", False)
-        options.add_experimental_option("excludeSwitches", ["enable-logging"])
-        driver = webdriver.Chrome(options=options)
+    def _download_with_session(
+        self,
+        chapter_id: int | str,
+        news_id: int | str,
+        zip_path: Path,
+        progress_fn: ProgressCallback | None,
+    ) -> None:
+        # Сессия из пула сама подхватит cookies нового поколения.
+        with http_pool.session(self._cookie_manager) as session:
+            json_data = self._api_post(session, chapter_id, news_id)
+            download_url = self._extract_download_url(json_data)
+            self._fetch_file(session, download_url, zip_path, progress_fn)
+        self._verify_download(zip_path)
+
+    def _open_site(self, driver: webdriver.Chrome) -> None:
+        """Открывает сайт, если тёплый браузер ещё не на нём.
+
+        Cookies можно выставить только для домена текущей страницы.
+        """
+        if driver.current_url.startswith(BASE_URL):
+            return
+        self._throttle(BASE_URL)
         driver.get(BASE_URL)
-        return driver
 
     def _refresh_cookies(self, driver: webdriver.Chrome) -> None:
         self._cookie_manager.apply_to_driver(driver, COOKIE_DOMAIN)
@@ -107,12 +126,6 @@ class SeleniumRecoveryDownloader(BaseDownloader):
         self._cookie_manager.update_from_driver(driver)
         self.log("  🔄 Повторная попытка с обновленными куками...")
 
-    def _build_session(self) -> curl_cffi.Session:
-        session = curl_cffi.Session()
-        session.headers.update(self._make_headers())
-        self._cookie_manager.apply_to_session(session)
-        return session
-
     def _api_post(
         self,
         session: curl_cffi.Session,
@@ -120,32 +133,50 @@ class SeleniumRecoveryDownloader(BaseDownloader):
         news_id: int | str,
     ) -> dict[str, Any]:
         payload = self._make_payload(chapter_id, news_id)
+        self._throttle(API_URL)
         response = session.post(
             API_URL,
             data=payload,
+            headers=self._make_headers(),
             impersonate="chrome",
             timeout=HTTP_TIMEOUT,
         )
-        if response.status_code != 200:
-            raise RuntimeError(f"HTTP {response.status_code}")
+        self._report_response(API_URL, response)
+        self._check_status(response)
         return response.json()
 
-    @staticmethod
-    def _fetch_file(session: curl_cffi.Session, url: str, dest: Path) -> None:
+    def _fetch_file(
+        self,
+        session: curl_cffi.Session,
+        url: str,
+        dest: Path,
+        progress_fn: ProgressCallback | None = None,
+    ) -> None:
+        partial = PartialDownload(dest)
+        self._throttle(url)
         response = session.get(
             url,
+            headers=self._make_headers(partial.request_headers()),
             impersonate="chrome",
             allow_redirects=True,
             timeout=DOWNLOAD_TIMEOUT,
+            # Потоковый ответ идёт на копии хэндла: соединение
+            # сессии пула здесь не переиспользуется.
+            stream=True,
         )
-        if response.status_code != 200:
-            raise RuntimeError(f"Ошибка скачивания: HTTP {response.status_code}")
-        with open(dest, "wb") as fh:
-            fh.write(response.content)
+        self._report_response(url, response)
+        try:
+            offset = partial.accept(response.status_code, response.headers)
+            write_stream(response.iter_content(), partial.path, progress_fn, offset)
+        finally:
+            response.close()
+        partial.commit()
 
     # Не используются в Selenium-загрузчике, но нужны для ABC
     def _api_request(self, chapter_id: int | str, news_id: int | str) -> dict[str, Any]:
         raise NotImplementedError  # pragma: no cover
 
-    def _download_file(self, url: str, dest: Path) -> None:
+    def _download_file(
+        self, url: str, dest: Path, progress_fn: ProgressCallback | None = None,
+    ) -> None:
         raise NotImplementedError  # pragma: no cover
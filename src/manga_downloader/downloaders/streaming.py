@@ -0,0 +1,220 @@
+"""
+Потоковая запись ответа на диск.
+
+Архив главы не собирается в памяти целиком: данные пишутся чанками
+через буфер фиксированного размера, поэтому потребление памяти не зависит
+от размера главы и числа параллельных загрузок.
+
+Недокачанный архив хранится рядом с целевым как ``<имя>.zip.part``;
+следующая попытка (в том числе другим методом fallback-цепочки) докачивает
+его через ``Range`` / ``If-Range``, если сервер это поддерживает.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, AsyncIterable, BinaryIO, Callable, Iterable, Mapping
+
+from manga_downloader.config import WRITE_BUFFER_SIZE
+from manga_downloader.downloaders.errors import HttpStatusError
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int], None]
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+
+class StreamWriter:
+    """Пишет чанки в файл и сообщает о количестве записанных байт.
+
+    При *offset* > 0 дописывает в конец существующего файла.
+    *progress_fn* получает общее число байт в файле, включая *offset*.
+    """
+
+    def __init__(
+        self,
+        dest: Path,
+        progress_fn: ProgressCallback | None = None,
+        offset: int = 0,
+    ) -> None:
+        self._dest = dest
+        self._progress_fn = progress_fn
+        self._offset = offset
+        self._fh: BinaryIO | None = None
+        self.bytes_written = offset
+
+    def __enter__(self) -> "StreamWriter":
+        mode = "ab" if self._offset else "wb"
+        self._fh = open(self._dest, mode, buffering=WRITE_BUFFER_SIZE)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self._fh.write(chunk)
+        self.bytes_written += len(chunk)
+        if self._progress_fn:
+            self._progress_fn(self.bytes_written)
+
+
+def write_stream(
+    chunks: Iterable[bytes],
+    dest: Path,
+    progress_fn: ProgressCallback | None = None,
+    offset: int = 0,
+) -> int:
+    """Записывает итератор чанков в *dest*. Возвращает размер в байтах."""
+    with StreamWriter(dest, progress_fn, offset) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.bytes_written
+
+
+async def write_stream_async(
+    chunks: AsyncIterable[bytes],
+    dest: Path,
+    progress_fn: ProgressCallback | None = None,
+    offset: int = 0,
+) -> int:
+    """Асинхронный вариант :func:`write_stream`.
+
+    Диск не трогается из цикла событий: чанки копятся в памяти блоками по
+    ``WRITE_BUFFER_SIZE``, а открытие файла и запись блоков идут в пуле
+    потоков, пока цикл обслуживает другие загрузки.
+    """
+    fh = await asyncio.to_thread(open, dest, "ab" if offset else "wb")
+    total = offset
+    block = bytearray()
+    try:
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            block += chunk
+            total += len(chunk)
+            if progress_fn:
+                progress_fn(total)
+            if len(block) >= WRITE_BUFFER_SIZE:
+                data, block = block, bytearray()
+                await asyncio.to_thread(fh.write, data)
+        if block:
+            await asyncio.to_thread(fh.write, block)
+    finally:
+        await asyncio.to_thread(fh.close)
+    return total
+
+
+class PartialDownload:
+    """Докачиваемый файл: ``<dest>.part`` и его валидаторы в ``<dest>.part.json``.
+
+    Использование в загрузчике::
+
+        partial = PartialDownload(dest)
+        response = session.get(url, headers=partial.request_headers(), stream=True)
+        offset = partial.accept(response.status_code, response.headers)
+        write_stream(response.iter_content(), partial.path, progress_fn, offset)
+        partial.commit()
+
+    При обрыве ``.part`` остаётся на диске, и следующая попытка запросит
+    только недостающий хвост. Если сервер не поддерживает ``Range`` или файл
+    изменился (ответ 200 вместо 206), загрузка начинается с нуля.
+    """
+
+    def __init__(self, dest: Path) -> None:
+        self.dest = dest
+        self.path = dest.with_name(dest.name + ".part")
+        self._meta_path = dest.with_name(dest.name + ".part.json")
+
+    # -- Запрос ----------------------------------------------------------------
+
+    @property
+    def offset(self) -> int:
+        """Сколько байт уже скачано."""
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
+
+    def request_headers(self) -> dict[str, str]:
+        """Заголовки для докачки (пустые, если докачивать нечего)."""
+        offset = self.offset
+        if not offset:
+            return {}
+        headers = {"Range": f"bytes={offset}-"}
+        validator = self._load_meta().get("validator")
+        if validator:
+            headers["If-Range"] = validator
+        return headers
+
+    # -- Ответ -----------------------------------------------------------------
+
+    def accept(self, status_code: int, headers: Mapping[str, Any]) -> int:
+        """Проверяет ответ сервера и возвращает смещение для записи.
+
+        Raises:
+            HttpStatusError: статус не 200/206.
+            RuntimeError: некорректный ``Content-Range``.
+        """
+        if status_code == 206:
+            offset = self.offset
+            meta = self._load_meta()
+            match = _CONTENT_RANGE_RE.match(str(headers.get("Content-Range", "")))
+            total = match.group(3) if match else None
+            if (
+                match
+                and int(match.group(1)) == offset
+                and (not meta.get("total") or total == str(meta["total"]))
+            ):
+                logger.debug("Докачка %s с %d байт", self.dest.name, offset)
+                return offset
+            self.discard()
+            raise RuntimeError("Сервер вернул неожиданный диапазон, докачка сброшена")
+
+        if status_code == 200:
+            # Полный ответ: сервер не умеет Range или файл изменился.
+            self._save_meta(headers)
+            return 0
+
+        if status_code == 416:
+            self.discard()
+        raise HttpStatusError(status_code, f"Ошибка скачивания: HTTP {status_code}")
+
+    def commit(self) -> None:
+        """Переименовывает докачанный ``.part`` в итоговый файл."""
+        os.replace(self.path, self.dest)
+        self._meta_path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        """Удаляет частичный файл и его метаданные."""
+        self.path.unlink(missing_ok=True)
+        self._meta_path.unlink(missing_ok=True)
+
+    # -- Метаданные ------------------------------------------------------------
+
+    def _load_meta(self) -> dict[str, Any]:
+        try:
+            with open(self._meta_path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self, headers: Mapping[str, Any]) -> None:
+        etag = headers.get("ETag") or ""
+        # If-Range допускает только сильный ETag; иначе — Last-Modified.
+        validator = etag if etag and not etag.startswith("W/") else headers.get("Last-Modified")
+        meta = {"validator": validator, "total": headers.get("Content-Length")}
+        try:
+            with open(self._meta_path, "w", encoding="utf-8") as fh:
+                json.dump(meta, fh)
+        except OSError as exc:
+            logger.debug("Не удалось сохранить метаданные докачки: %s", exc)
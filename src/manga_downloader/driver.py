@@ -4,11 +4,19 @@
 Единая точка создания драйвера для всех модулей приложения.
 Использует webdriver-manager для скачивания ChromeDriver —
 работает надёжно и из обычного скрипта, и из PyInstaller-бандла.
+
+Для восстановления сессии есть «тёплый» браузер :data:`shared_browser`:
+он запускается при первой необходимости, переиспользуется между главами
+и задачами и закрывается после ``BROWSER_IDLE_TIMEOUT`` секунд простоя.
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator
 
 from selenium import webdriver
 from selenium.common.exceptions import (
@@ -19,7 +27,7 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
-from manga_downloader.config import USER_AGENT
+from manga_downloader.config import BROWSER_IDLE_TIMEOUT, USER_AGENT
 
 logger = logging.getLogger(__name__)
 
@@ -67,3 +75,98 @@ def _raise_with_hint(summary: str, cause: Exception) -> None:
         f"Техническая информация: {short_cause}"
     )
     raise ChromeDriverError(hint) from cause
+
+
+class ManagedBrowser:
+    """Переиспользуемый Chrome с ленивым запуском и закрытием по простою.
+
+    Использование::
+
+        with shared_browser.session() as driver:
+            driver.get(...)
+
+    Одновременно браузером пользуется только один вызывающий; перед выдачей
+    драйвер проверяется и при необходимости перезапускается.
+    """
+
+    def __init__(self, idle_timeout: float = BROWSER_IDLE_TIMEOUT) -> None:
+        self._idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._driver: webdriver.Chrome | None = None
+        self._idle_timer: threading.Timer | None = None
+
+    @contextmanager
+    def session(self) -> Iterator[webdriver.Chrome]:
+        """Выдаёт живой драйвер на время блока ``with``.
+
+        Raises:
+            ChromeDriverError: браузер не удалось запустить.
+        """
+        with self._lock:
+            self._cancel_idle_timer()
+            try:
+                yield self._ensure_driver()
+            finally:
+                self._start_idle_timer()
+
+    def shutdown(self) -> None:
+        """Закрывает браузер (при выходе из приложения)."""
+        with self._lock:
+            self._cancel_idle_timer()
+            self._quit()
+
+    @property
+    def is_running(self) -> bool:
+        return self._driver is not None
+
+    # -- Внутренние методы -----------------------------------------------------
+
+    def _ensure_driver(self) -> webdriver.Chrome:
+        if self._driver is not None and not self._is_healthy(self._driver):
+            logger.info("Браузер не отвечает, перезапускаю")
+            self._quit()
+        if self._driver is None:
+            self._driver = create_chrome_driver(detach=False)
+        return self._driver
+
+    @staticmethod
+    def _is_healthy(driver: webdriver.Chrome) -> bool:
+        try:
+            driver.current_url  # noqa: B018 — запрос к драйверу как health check
+            return True
+        except Exception:
+            return False
+
+    def _quit(self) -> None:
+        if self._driver is None:
+            return
+        try:
+            self._driver.quit()
+        except Exception as exc:
+            logger.debug("Ошибка при закрытии браузера: %s", exc)
+        self._driver = None
+
+    def _start_idle_timer(self) -> None:
+        self._idle_timer = threading.Timer(self._idle_timeout, self._on_idle)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _cancel_idle_timer(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _on_idle(self) -> None:
+        # Если браузер как раз занят, таймер перезапустит следующий release.
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            logger.info("Браузер простаивает %s с, закрываю", self._idle_timeout)
+            self._idle_timer = None
+            self._quit()
+        finally:
+            self._lock.release()
+
+
+shared_browser = ManagedBrowser()
+atexit.register(shared_browser.shutdown)
@@ -1,8 +1,9 @@
 """
 Модальный диалог выбора глав перед скачиванием.
 
-Показывает информацию о манге, позволяет выбрать диапазон глав
-и режим скачивания (новый архив / дополнить существующий).
+Показывает информацию о манге, позволяет выбрать диапазон глав (или
+только новые главы, найденные проверкой обновлений) и режим скачивания
+(новый архив / дополнить существующий).
 """
 
 from __future__ import annotations
@@ -22,6 +23,8 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
+from manga_downloader.chapter_set import ChapterSet
+
 
 class ChapterSelectDialog(QDialog):
     """Модальное окно выбора глав и режима скачивания."""
@@ -35,6 +38,8 @@ class ChapterSelectDialog(QDialog):
         url: str = "",
         last_chapter: int = 0,
         existing_cbz_path: str = "",
+        new_chapter_ids: list[int] | None = None,
+        new_chapter_numbers: ChapterSet | None = None,
     ) -> None:
         super().__init__(parent)
         self.setWindowTitle("Выбор глав для скачивания")
@@ -46,8 +51,9 @@ class ChapterSelectDialog(QDialog):
         self._total = total_chapters
         self._existing_cbz_path = existing_cbz_path
         self._cbz_exists = bool(existing_cbz_path) and Path(existing_cbz_path).exists()
+        self._new_chapter_ids = list(new_chapter_ids or [])
 
-        self._build_ui(title, total_chapters, url, last_chapter)
+        self._build_ui(title, total_chapters, url, last_chapter, new_chapter_numbers)
 
     # -- Построение UI ---------------------------------------------------------
 
@@ -57,6 +63,7 @@ class ChapterSelectDialog(QDialog):
         total: int,
         url: str,
         last_chapter: int,
+        new_numbers: ChapterSet | None,
     ) -> None:
         layout = QVBoxLayout(self)
         layout.setSpacing(12)
@@ -87,10 +94,16 @@ class ChapterSelectDialog(QDialog):
         self._radio_all.setChecked(False)
         self._radio_range = QRadioButton("Диапазон глав:")
         self._radio_range.setChecked(False)
+        self._radio_new = QRadioButton(f"Только новые ({len(self._new_chapter_ids)})")
+        self._radio_new.setChecked(False)
+        if new_numbers:
+            self._radio_new.setToolTip(f"Главы на сайте: {new_numbers}")
 
         mode_row = QHBoxLayout()
         mode_row.addWidget(self._radio_all)
         mode_row.addWidget(self._radio_range)
+        if self._new_chapter_ids:
+            mode_row.addWidget(self._radio_new)
         mode_row.addStretch()
 
         spin_row = QHBoxLayout()
@@ -132,10 +145,17 @@ class ChapterSelectDialog(QDialog):
         self._radio_mode_new.setChecked(False)
         self._radio_mode_append = QRadioButton("Дополнить существующий")
         self._radio_mode_append.setChecked(False)
+        self._radio_mode_replace = QRadioButton("Заменить главы")
+        self._radio_mode_replace.setChecked(False)
+        self._radio_mode_replace.setToolTip(
+            "Скачать выбранные главы заново и заменить их в архиве\n"
+            "(только для архивов с папкой на главу)"
+        )
 
         mode_dl_row.addWidget(QLabel("Режим:"))
         mode_dl_row.addWidget(self._radio_mode_new)
         mode_dl_row.addWidget(self._radio_mode_append)
+        mode_dl_row.addWidget(self._radio_mode_replace)
         mode_dl_row.addStretch()
 
         self._mode_widget = self._wrap_layout(mode_dl_row)
@@ -160,7 +180,13 @@ class ChapterSelectDialog(QDialog):
         self._hint_label.setWordWrap(True)
         self._hint_label.hide()
 
-        if has_new:
+        if self._new_chapter_ids:
+            self._hint_label.setText(
+                f"💡 Проверка нашла глав, которых нет в архиве: {len(self._new_chapter_ids)}"
+                + (f" (главы на сайте: {new_numbers})." if new_numbers else ".")
+            )
+            self._hint_label.show()
+        elif has_new:
             self._hint_label.setText(
                 f"💡 Ранее скачано до главы {last_chapter}. "
                 f"Предложен диапазон {last_chapter + 1}–{total}."
@@ -192,13 +218,17 @@ class ChapterSelectDialog(QDialog):
         # --- Сигналы ---
         self._radio_all.toggled.connect(self._on_chapter_mode_changed)
         self._radio_range.toggled.connect(self._on_chapter_mode_changed)
+        self._radio_new.toggled.connect(self._on_chapter_mode_changed)
         self._radio_mode_new.toggled.connect(self._on_archive_mode_changed)
         self._radio_mode_append.toggled.connect(self._on_archive_mode_changed)
+        self._radio_mode_replace.toggled.connect(self._on_archive_mode_changed)
         self._btn_download.clicked.connect(self.accept)
         self._btn_cancel.clicked.connect(self.reject)
 
         # --- Установка дефолтов ---
-        if has_new:
+        if self._new_chapter_ids:
+            self._radio_new.setChecked(True)
+        elif has_new:
             self._radio_range.setChecked(True)
             self._spin_start.setValue(last_chapter + 1)
             self._spin_end.setValue(total)
@@ -224,12 +254,12 @@ class ChapterSelectDialog(QDialog):
         self._spin_start.setEnabled(is_range)
         self._spin_end.setEnabled(is_range)
 
-        if is_range and self._cbz_exists:
-            # Диапазон + архив есть → показать выбор режима, дефолт "Дополнить"
+        if (is_range or self._radio_new.isChecked()) and self._cbz_exists:
+            # Часть глав + архив есть → показать выбор режима, дефолт "Дополнить"
             self._mode_widget.show()
             self._radio_mode_append.setChecked(True)
         else:
-            # Все главы или диапазон без архива → скрыть, всегда новый
+            # Все главы или часть глав без архива → скрыть, всегда новый
             self._mode_widget.hide()
             self._radio_mode_new.setChecked(True)
 
@@ -242,29 +272,37 @@ class ChapterSelectDialog(QDialog):
         """Показывает предупреждение если будет создан новый архив при существующем."""
         will_overwrite = self._cbz_exists and (
             self._radio_all.isChecked()
-            or (self._radio_range.isChecked() and self._radio_mode_new.isChecked())
+            or (not self._radio_all.isChecked() and self._radio_mode_new.isChecked())
         )
         self._warning_label.setVisible(will_overwrite)
 
     # -- Публичный API ---------------------------------------------------------
 
     def get_chapter_range(self) -> tuple[int, int] | None:
-        """Возвращает ``(start, end)`` или ``None`` если выбраны все главы."""
-        if self._radio_all.isChecked():
+        """Возвращает ``(start, end)`` или ``None`` если выбраны все или новые главы."""
+        if not self._radio_range.isChecked():
             return None
         return (self._spin_start.value(), self._spin_end.value())
 
+    def get_chapter_ids(self) -> list[int] | None:
+        """Возвращает id новых глав на сайте, если выбраны только они, иначе ``None``."""
+        if self._radio_new.isChecked() and self._new_chapter_ids:
+            return list(self._new_chapter_ids)
+        return None
+
     def get_download_mode(self) -> str:
-        """Возвращает ``'new'`` или ``'append'``."""
-        if self._radio_all.isChecked():
+        """Возвращает ``'new'``, ``'append'`` или ``'replace'``."""
+        if self._radio_all.isChecked() or not self._cbz_exists:
             return "new"
-        if self._radio_mode_append.isChecked() and self._cbz_exists:
+        if self._radio_mode_append.isChecked():
             return "append"
+        if self._radio_mode_replace.isChecked():
+            return "replace"
         return "new"
 
     def get_existing_cbz_path(self) -> str | None:
-        """Возвращает путь к CBZ для дополнения, или ``None``."""
-        if self.get_download_mode() == "append" and self._existing_cbz_path:
+        """Возвращает путь к CBZ для дополнения или замены глав, или ``None``."""
+        if self.get_download_mode() != "new" and self._existing_cbz_path:
             return self._existing_cbz_path
         return None
 
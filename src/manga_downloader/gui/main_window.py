@@ -32,7 +32,12 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
+from manga_downloader.cbz import archive_files
+from manga_downloader.chapter_set import ChapterSet
 from manga_downloader.config import OUTPUT_DIR
+from manga_downloader.driver import shared_browser
+from manga_downloader.http_pool import http_pool
+from manga_downloader.job_journal import ARCHIVED, DOWNLOADED, JobJournal
 from manga_downloader.gui.chapter_dialog import ChapterSelectDialog
 from manga_downloader.gui.donation_dialog import DonationDialog
 from manga_downloader.gui.styles import (
@@ -43,7 +48,7 @@ from manga_downloader.gui.styles import (
     LOG_COLOR_SUCCESS,
     LOG_COLOR_WARNING,
 )
-from manga_downloader.gui.update_checker import UpdateChecker
+from manga_downloader.gui.update_checker import ChapterDiff, UpdateChecker
 from manga_downloader.history import DownloadHistory
 from manga_downloader.manga.chapter_worker import ChapterWorker
 
@@ -61,7 +66,10 @@ class DownloaderApp(QWidget):
         self._update_checker: UpdateChecker | None = None
         self._last_cbz_path: str | None = None
         self._history = DownloadHistory()
-        self._new_chapters: dict[str, int] = {}
+        # Результаты проверки обновлений: URL -> главы, которых нет в истории.
+        self._chapter_diffs: dict[str, ChapterDiff] = {}
+        self._progress_text = ""
+        self._bytes_text = ""
 
         self._build_ui()
         self._apply_theme()
@@ -73,6 +81,8 @@ class DownloaderApp(QWidget):
         self._update_timer.start(5 * 60 * 1000)
         self._start_update_check()
 
+        QTimer.singleShot(0, self._offer_resume_interrupted_job)
+
     # -- Построение интерфейса -------------------------------------------------
 
     def _build_ui(self) -> None:
@@ -183,6 +193,10 @@ class DownloaderApp(QWidget):
             self._worker.cancel()
             self._worker.wait(5000)
 
+        # Отложенные изменения истории (итоги проверки обновлений).
+        self._history.close()
+        shared_browser.shutdown()
+        http_pool.close()
         super().closeEvent(event)
 
     # -- Вспомогательные -------------------------------------------------------
@@ -220,6 +234,12 @@ class DownloaderApp(QWidget):
                 label_text = f"{title}  —  {last_ch}/{known_total} глав  —  {date}"
             else:
                 label_text = f"{title}  —  скачано {last_ch} глав  —  {date}"
+            # Главы до последней скачанной, которых нет в архиве.
+            gaps = ChapterSet.from_ranges(
+                ChapterSet.load(entry.get("downloaded_chapters")).missing(last_ch)
+            )
+            if gaps:
+                label_text += f"  —  пропущено {len(gaps)}"
 
             row_widget = QWidget()
             row_layout = QHBoxLayout(row_widget)
@@ -228,14 +248,17 @@ class DownloaderApp(QWidget):
 
             label = QLabel(label_text)
             label.setObjectName("library_item_label")
+            if gaps:
+                label.setToolTip(f"Не скачаны главы: {gaps}")
             label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
 
-            new_count = self._new_chapters.get(url, 0)
-            if new_count == 0 and known_total > last_ch:
-                new_count = known_total - last_ch
+            new_count = self._new_chapter_count(entry)
             badge = QLabel(f"+{new_count}")
             badge.setObjectName("badge_new_chapters")
             badge.setVisible(new_count > 0)
+            diff = self._chapter_diffs.get(url)
+            if diff and diff.missing_numbers:
+                badge.setToolTip(f"Главы на сайте: {diff.missing_numbers}")
 
             btn_download = QPushButton("Скачать")
             btn_download.setObjectName("btn_lib_download")
@@ -266,11 +289,13 @@ class DownloaderApp(QWidget):
         """Удаление манги из истории и архива с подтверждением."""
         entry = self._history.get(url)
         cbz_path = entry.get("cbz_path", "") if entry else ""
-        cbz_exists = bool(cbz_path) and Path(cbz_path).exists()
+        cbz_files = archive_files(Path(cbz_path)) if cbz_path else []
 
         msg = f'Удалить "{title}" из библиотеки?'
-        if cbz_exists:
-            msg += f"\n\nАрхив тоже будет удалён:\n{Path(cbz_path).name}"
+        if len(cbz_files) > 1:
+            msg += f"\n\nАрхив тоже будет удалён ({len(cbz_files)} томов):\n{cbz_files[0].name}, ..."
+        elif cbz_files:
+            msg += f"\n\nАрхив тоже будет удалён:\n{cbz_files[0].name}"
 
         reply = QMessageBox.question(
             self,
@@ -282,10 +307,10 @@ class DownloaderApp(QWidget):
         if reply != QMessageBox.Yes:
             return
 
-        if cbz_exists:
+        for path in cbz_files:
             try:
-                Path(cbz_path).unlink()
-                self._append_log(f'🗑️ Архив удалён: {Path(cbz_path).name}')
+                path.unlink()
+                self._append_log(f'🗑️ Архив удалён: {path.name}')
             except Exception as exc:
                 self._append_log(f'⚠️ Не удалось удалить архив: {exc}')
 
@@ -303,7 +328,7 @@ class DownloaderApp(QWidget):
         if self._update_checker and self._update_checker.isRunning():
             return
 
-        self._new_chapters.clear()
+        self._chapter_diffs.clear()
         self._append_log("🔄 Проверка обновлений библиотеки...")
 
         self._update_checker = UpdateChecker(entries, self)
@@ -311,20 +336,35 @@ class DownloaderApp(QWidget):
         self._update_checker.finished_all.connect(self._on_update_check_finished)
         self._update_checker.start()
 
-    def _on_update_check_result(self, url: str, total_on_site: int) -> None:
+    def _on_update_check_result(self, url: str, total_on_site: int, diff: ChapterDiff) -> None:
         """Получен результат проверки одного тайтла -- сохраняем данные."""
         entry = self._history.get(url)
         if not entry:
             return
         self._history.update_total(url, total_on_site)
-        last_ch = entry.get("last_chapter_downloaded", 0)
-        new_count = max(0, total_on_site - last_ch)
-        if new_count > 0:
-            self._new_chapters[url] = new_count
+        if diff.restored:
+            self._history.set_chapter_ids(url, diff.known_ids)
+        if diff.removed:
+            self._append_log(
+                f'⚠️ "{entry.get("title", url)}": на сайте больше нет {diff.removed} скачанных глав'
+            )
+        self._chapter_diffs[url] = diff
+
+    def _new_chapter_count(self, entry: dict) -> int:
+        """Число глав на сайте, которых нет в истории.
+
+        После проверки обновлений — точное (по id глав), до неё — оценка
+        по последнему известному числу глав на сайте.
+        """
+        diff = self._chapter_diffs.get(entry.get("url", ""))
+        if diff is not None:
+            return len(diff.missing_ids)
+        return max(0, entry.get("last_known_total", 0) - entry.get("last_chapter_downloaded", 0))
 
     def _on_update_check_finished(self) -> None:
-        """Все проверки завершены -- обновляем UI один раз."""
-        total_new = sum(self._new_chapters.values())
+        """Все проверки завершены -- сохраняем историю и обновляем UI один раз."""
+        self._history.flush()
+        total_new = sum(len(diff.missing_ids) for diff in self._chapter_diffs.values())
         if total_new > 0:
             self._append_log(f"✅ Найдено новых глав: {total_new}")
         else:
@@ -371,6 +411,7 @@ class DownloaderApp(QWidget):
         *,
         initial_url: str | None = None,
         chapter_range: tuple[int, int] | None = None,
+        chapter_ids: list[int] | None = None,
         download_mode: str | None = None,
         cbz_path: str | None = None,
         library_mode: bool = False,
@@ -382,6 +423,8 @@ class DownloaderApp(QWidget):
         self._progress_bar.setValue(0)
         self._progress_bar.hide()
         self._label_progress.setText("")
+        self._progress_text = ""
+        self._bytes_text = ""
         self._last_cbz_path = None
 
         worker = ChapterWorker()
@@ -390,7 +433,9 @@ class DownloaderApp(QWidget):
 
         if download_mode:
             worker.set_download_mode(download_mode, cbz_path or "")
-        if chapter_range:
+        if chapter_ids:
+            worker.set_chapter_ids(chapter_ids)
+        elif chapter_range:
             worker.set_chapter_range(*chapter_range)
 
         if library_mode:
@@ -405,6 +450,7 @@ class DownloaderApp(QWidget):
         worker.manga_info_ready.connect(self._on_manga_info_ready)
         worker.cancellation_info.connect(self._on_cancellation_info)
         worker.chapter_progress.connect(self._on_chapter_progress)
+        worker.bytes_downloaded.connect(self._on_bytes_downloaded)
         worker.cbz_ready.connect(self._on_cbz_ready)
         worker.download_complete_info.connect(self._on_download_complete_info)
 
@@ -430,27 +476,65 @@ class DownloaderApp(QWidget):
         existing_cbz = entry.get("cbz_path", "")
         known_total = entry.get("last_known_total", 0)
 
-        new_count = self._new_chapters.get(url, 0)
-        if new_count == 0 and known_total > last_chapter:
-            new_count = known_total - last_chapter
-        total = last_chapter + new_count if new_count > 0 else known_total
+        diff = self._chapter_diffs.get(url)
+        new_count = self._new_chapter_count(entry)
+        if diff is not None:
+            # Число глав на сайте известно точно, номера могли сдвинуться.
+            total = known_total
+        else:
+            total = last_chapter + new_count if new_count > 0 else known_total
         if total <= 0:
             total = last_chapter
 
-        result = self._show_chapter_dialog(title, total, url, last_chapter, existing_cbz)
+        result = self._show_chapter_dialog(title, total, url, last_chapter, existing_cbz, diff)
         if result is None:
             return
 
-        chapter_range, download_mode, cbz_path = result
+        chapter_range, chapter_ids, download_mode, cbz_path = result
         self._append_log(f'▶️ Скачивание из библиотеки: "{title}"')
         self._create_and_start_worker(
             initial_url=url,
             chapter_range=chapter_range,
+            chapter_ids=chapter_ids,
             download_mode=download_mode,
             cbz_path=cbz_path,
             library_mode=True,
         )
 
+    def _offer_resume_interrupted_job(self) -> None:
+        """Предлагает продолжить задачу, прерванную падением приложения."""
+        journal = JobJournal()
+        job = journal.job
+        if not job:
+            return
+
+        title = job.get("title", job.get("url", ""))
+        total = len(job.get("chapters", []))
+        done = journal.count(DOWNLOADED, ARCHIVED)
+        reply = QMessageBox.question(
+            self,
+            "Прерванное скачивание",
+            f'Скачивание "{title}" было прервано (готово {done} из {total} глав).'
+            "\n\nПродолжить с места остановки?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.Yes,
+        )
+        if reply != QMessageBox.Yes:
+            journal.discard()
+            self._append_log(f'🗑️ Прерванное скачивание "{title}" отменено')
+            return
+
+        chapter_range = job.get("chapter_range")
+        self._append_log(f'♻️ Продолжение прерванного скачивания: "{title}"')
+        self._create_and_start_worker(
+            initial_url=job["url"],
+            chapter_range=tuple(chapter_range) if chapter_range else None,
+            chapter_ids=job.get("chapter_ids"),
+            download_mode=job.get("download_mode", "new"),
+            cbz_path=job.get("cbz_path"),
+            library_mode=True,
+        )
+
     def _on_cancel(self) -> None:
         if self._worker:
             self._worker.cancel()
@@ -500,11 +584,15 @@ class DownloaderApp(QWidget):
         url: str,
         last_chapter: int,
         existing_cbz: str,
-    ) -> tuple[tuple[int, int] | None, str, str | None] | None:
+        diff: ChapterDiff | None = None,
+    ) -> tuple[tuple[int, int] | None, list[int] | None, str, str | None] | None:
         """Показывает диалог выбора глав.
 
-        Возвращает ``(chapter_range, download_mode, cbz_path)`` или ``None``
-        если пользователь отменил.
+        *diff* — результат проверки обновлений: с ним диалог предлагает
+        скачать ровно недостающие главы.
+
+        Возвращает ``(chapter_range, chapter_ids, download_mode, cbz_path)``
+        или ``None`` если пользователь отменил.
         """
         dialog = ChapterSelectDialog(
             self,
@@ -513,6 +601,8 @@ class DownloaderApp(QWidget):
             url=url,
             last_chapter=last_chapter,
             existing_cbz_path=existing_cbz,
+            new_chapter_ids=diff.missing_ids if diff else None,
+            new_chapter_numbers=diff.missing_numbers if diff else None,
         )
         dialog.setStyleSheet(APP_STYLE)
 
@@ -520,16 +610,16 @@ class DownloaderApp(QWidget):
             return None
 
         chapter_range = dialog.get_chapter_range()
+        chapter_ids = dialog.get_chapter_ids()
         download_mode = dialog.get_download_mode()
         cbz_path = dialog.get_existing_cbz_path()
 
         if dialog.should_delete_old_cbz():
-            old_path = Path(existing_cbz)
-            if old_path.exists():
+            for old_path in archive_files(Path(existing_cbz)):
                 old_path.unlink()
                 self._append_log(f"🗑️ Старый архив удалён: {old_path.name}")
 
-        return chapter_range, download_mode, cbz_path
+        return chapter_range, chapter_ids, download_mode, cbz_path
 
     # -- Слоты от воркера (через сигналы) --------------------------------------
 
@@ -550,15 +640,19 @@ class DownloaderApp(QWidget):
             last_chapter = entry.get("last_chapter_downloaded", 0)
             existing_cbz = entry.get("cbz_path", "")
 
-        result = self._show_chapter_dialog(title, total, url, last_chapter, existing_cbz)
+        result = self._show_chapter_dialog(
+            title, total, url, last_chapter, existing_cbz, self._chapter_diffs.get(url),
+        )
         if result is None:
             self._append_log("⏹️ Скачивание отменено.")
             self._worker.cancel()
             return
 
-        chapter_range, download_mode, cbz_path = result
+        chapter_range, chapter_ids, download_mode, cbz_path = result
         self._worker.set_download_mode(download_mode, cbz_path)
-        if chapter_range:
+        if chapter_ids:
+            self._worker.set_chapter_ids(chapter_ids)
+        elif chapter_range:
             self._worker.set_chapter_range(*chapter_range)
         else:
             self._worker.set_chapter_range()
@@ -573,24 +667,40 @@ class DownloaderApp(QWidget):
         self._progress_bar.setMaximum(total)
         self._progress_bar.setValue(current)
         self._progress_bar.setFormat("%v/%m")
-        self._label_progress.setText(f"Глава {current}/{total} — {title}")
+        self._progress_text = f"Глава {current}/{total} — {title}"
+        self._update_progress_label()
+
+    def _on_bytes_downloaded(self, total_bytes: int) -> None:
+        self._bytes_text = f"{total_bytes / (1024 * 1024):.1f} МБ"
+        self._update_progress_label()
+
+    def _update_progress_label(self) -> None:
+        parts = [p for p in (self._progress_text, self._bytes_text) if p]
+        self._label_progress.setText("  •  ".join(parts))
 
     def _on_cbz_ready(self, path: str) -> None:
         self._last_cbz_path = path
         self._btn_open_folder.show()
 
     def _on_download_complete_info(
-        self, url: str, title: str, news_id: str, indices_json: str, total_on_site: int,
+        self,
+        url: str,
+        title: str,
+        news_id: str,
+        indices_json: str,
+        total_on_site: int,
+        ids_json: str,
     ) -> None:
         """Обновляет историю после завершения скачивания."""
         try:
             indices = json.loads(indices_json)
+            chapter_ids = json.loads(ids_json)
         except (json.JSONDecodeError, TypeError):
-            indices = []
+            indices, chapter_ids = [], []
 
         cbz_path = self._last_cbz_path or ""
-        self._history.upsert(url, title, news_id, indices, cbz_path, total_on_site)
-        self._new_chapters.pop(url, None)
+        self._history.upsert(url, title, news_id, indices, cbz_path, total_on_site, chapter_ids)
+        self._chapter_diffs.pop(url, None)
 
     def _on_cancellation_info(self, skipped: int) -> None:
         self._append_log(f"\n⚠️ Завершено с пропусками ({skipped} глав не скачано)")
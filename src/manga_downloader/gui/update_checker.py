@@ -1,38 +1,62 @@
 """
 Фоновый поток проверки новых глав для тайтлов в библиотеке.
 
-Парсит страницу каждой манги и сравнивает total_chapters с last_chapter_downloaded.
-Результаты отправляются по одному через сигнал.
+Парсит страницу каждой манги и сравнивает id глав на сайте с id скачанных
+глав из истории: результат — точный набор новых и пропущенных глав, даже
+если сайт вставил или убрал главы и их номера сдвинулись. Результаты
+отправляются по одному через сигнал.
+
+У старых записей истории id глав нет; для них id восстанавливаются по
+номерам скачанных глав (как было принято раньше) и возвращаются вместе
+с результатом, чтобы история их запомнила.
 """
 
 from __future__ import annotations
 
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from threading import Event
+from typing import Any
 
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from manga_downloader.chapter_set import ChapterSet
 from manga_downloader.cookies import CookieManager
-from manga_downloader.manga.parser import MangaParser
+from manga_downloader.manga.parser import MangaInfo, MangaParser
 
 logger = logging.getLogger(__name__)
 
 _MAX_WORKERS = 3
 
 
+@dataclass(frozen=True)
+class ChapterDiff:
+    """Расхождение глав на сайте с историей для одного тайтла."""
+
+    missing_ids: list[int]  # id глав на сайте, которых нет в истории (по порядку сайта)
+    missing_numbers: ChapterSet  # номера этих глав на сайте
+    known_ids: ChapterSet  # id скачанных глав
+    removed: int = 0  # скачанных глав, которых на сайте больше нет
+    restored: bool = False  # known_ids восстановлены по номерам (старая запись истории)
+
+
 class UpdateChecker(QThread):
     """Проверяет наличие новых глав для списка манг.
 
-    Использует пул потоков для параллельных запросов.
+    Использует пул потоков для параллельных запросов; темп запросов к сайту
+    задаёт общий адаптивный лимитер, через который ходит :class:`MangaParser`.
+    Соединения берутся из общего HTTP-пула, так что повторные проверки
+    не повторяют TLS handshake.
     Тихо пропускает тайтлы, если cookies невалидны или сайт недоступен.
 
     Сигналы:
-        result(str, int): (url, total_chapters_on_site) — результат для одной манги.
+        result(str, int, object): (url, total_chapters_on_site, :class:`ChapterDiff`) —
+            результат для одной манги.
         finished_all(): все проверки завершены.
     """
 
-    result = pyqtSignal(str, int)
+    result = pyqtSignal(str, int, object)
     finished_all = pyqtSignal()
 
     def __init__(self, entries: list[dict], parent: object | None = None) -> None:
@@ -57,18 +81,19 @@ class UpdateChecker(QThread):
             self.finished_all.emit()
             return
 
-        urls = [e.get("url", "") for e in self._entries if e.get("url")]
-        if not urls:
+        entries = [e for e in self._entries if e.get("url")]
+        if not entries:
             self.finished_all.emit()
             return
 
-        logger.debug("UpdateChecker: проверяю %d тайтлов", len(urls))
-        workers = min(_MAX_WORKERS, len(urls))
+        logger.debug("UpdateChecker: проверяю %d тайтлов", len(entries))
+        workers = min(_MAX_WORKERS, len(entries))
 
+        parser = MangaParser(cookie_mgr)
         with ThreadPoolExecutor(max_workers=workers) as pool:
             futures = {
-                pool.submit(self._check_one, url, cookie_mgr): url
-                for url in urls
+                pool.submit(self._check_one, entry, parser): entry["url"]
+                for entry in entries
             }
             for future in as_completed(futures):
                 if self._stop_event.is_set():
@@ -76,21 +101,50 @@ class UpdateChecker(QThread):
                     break
                 url = futures[future]
                 try:
-                    total = future.result()
-                    if total is not None:
-                        logger.debug("UpdateChecker: %s -> %d глав", url, total)
-                        self.result.emit(url, total)
+                    checked = future.result()
+                    if checked is not None:
+                        total, diff = checked
+                        logger.debug(
+                            "UpdateChecker: %s -> %d глав, новых %d",
+                            url, total, len(diff.missing_ids),
+                        )
+                        self.result.emit(url, total, diff)
                 except Exception as exc:
                     logger.debug("Ошибка проверки %s: %s", url, exc)
 
         self.finished_all.emit()
 
     @staticmethod
-    def _check_one(url: str, cookie_mgr: CookieManager) -> int | None:
+    def _check_one(
+        entry: dict[str, Any], parser: MangaParser,
+    ) -> tuple[int, ChapterDiff] | None:
         """Проверяет один тайтл (выполняется в потоке пула)."""
-        parser = MangaParser(cookie_mgr)
-        try:
-            info = parser.fetch_quick(url)
-            return info.total_chapters if info else None
-        finally:
-            parser.close()
+        info = parser.fetch_quick(entry["url"])
+        if not info:
+            return None
+        return info.total_chapters, diff_chapters(entry, info)
+
+
+def diff_chapters(entry: dict[str, Any], info: MangaInfo) -> ChapterDiff:
+    """Сравнивает главы на сайте (*info*) с записью истории *entry*."""
+    site_ids = [int(ch["id"]) for ch in info.chapters]
+    known = ChapterSet.load(entry.get("chapter_ids"))
+    restored = not known
+    if restored:
+        downloaded = ChapterSet.load(entry.get("downloaded_chapters"))
+        known = ChapterSet(
+            chapter_id for number, chapter_id in enumerate(site_ids, 1) if number in downloaded
+        )
+    missing = [
+        (number, chapter_id)
+        for number, chapter_id in enumerate(site_ids, 1)
+        if chapter_id not in known
+    ]
+    on_site = ChapterSet(site_ids)
+    return ChapterDiff(
+        missing_ids=[chapter_id for _, chapter_id in missing],
+        missing_numbers=ChapterSet(number for number, _ in missing),
+        known_ids=known,
+        removed=sum(1 for chapter_id in known if chapter_id not in on_site),
+        restored=restored,
+    )
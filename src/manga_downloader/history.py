@@ -1,73 +1,164 @@
 """
 Хранилище истории скачанных манг.
 
-Сохраняет метаданные в JSON-файл для быстрого доступа к ранее скачанным мангам
-и определения новых глав для докачки.
+Сохраняет метаданные для быстрого доступа к ранее скачанным мангам и
+определения новых глав для докачки.
+
+Способ хранения выбирается ``HISTORY_BACKEND``:
+
+* ``"sqlite"`` — база ``manga_history.db`` в режиме WAL: запись по URL
+  ищется по первичному ключу, а изменение одной манги обновляет одну
+  строку. Чтения идут через свои соединения и не ждут записи пачки
+  изменений. При первом запуске существующий ``manga_history.json``
+  импортируется в базу.
+* ``"json"`` — прежний JSON-файл, который переписывается целиком
+  (через временный файл и ``os.replace``).
+
+Скачанные главы (``downloaded_chapters``) — :class:`ChapterSet`; в
+хранилище они лежат строкой отрезков (``"1-120,125"``). Записи старого
+формата со списком номеров переводятся в новый при открытии истории.
+Рядом хранятся id скачанных глав на сайте (``chapter_ids``, тоже
+:class:`ChapterSet`): по ним проверка обновлений находит точный набор
+новых и пропущенных глав, даже если сайт вставил или убрал главы и их
+номера сдвинулись.
+
+Запись отложенная: изменения копятся в памяти и уходят в хранилище одной
+пачкой — через ``HISTORY_FLUSH_DELAY`` секунд после последнего изменения
+или сразу по накоплении ``HISTORY_FLUSH_BATCH`` изменений. Так проверка
+обновлений большой библиотеки стоит одной записи, а не записи на тайтл.
+Скачивание и удаление манги записываются сразу; перед выходом
+приложение вызывает :meth:`DownloadHistory.close`.
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import os
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-from manga_downloader.config import HISTORY_FILE
+from manga_downloader.chapter_set import ChapterSet
+from manga_downloader.config import (
+    HISTORY_BACKEND,
+    HISTORY_DB,
+    HISTORY_FILE,
+    HISTORY_FLUSH_BATCH,
+    HISTORY_FLUSH_DELAY,
+)
 
 logger = logging.getLogger(__name__)
 
-_CURRENT_VERSION = 1
+_CURRENT_VERSION = 2  # 2: downloaded_chapters — строка отрезков
+_SCHEMA_VERSION = 2  # PRAGMA user_version базы; 2: столбец chapter_ids
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manga (
+    url TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    news_id TEXT NOT NULL,
+    downloaded_chapters TEXT NOT NULL,
+    last_chapter_downloaded INTEGER NOT NULL DEFAULT 0,
+    last_known_total INTEGER NOT NULL DEFAULT 0,
+    cbz_path TEXT NOT NULL DEFAULT '',
+    last_download_date TEXT NOT NULL DEFAULT '',
+    download_count INTEGER NOT NULL DEFAULT 0,
+    chapter_ids TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS manga_last_download ON manga (last_download_date);
+"""
+
+_COLUMNS = (
+    "url",
+    "title",
+    "news_id",
+    "downloaded_chapters",
+    "last_chapter_downloaded",
+    "last_known_total",
+    "cbz_path",
+    "last_download_date",
+    "download_count",
+    "chapter_ids",
+)
 
 
 class DownloadHistory:
-    """Управляет JSON-файлом с историей скачанных манг."""
+    """Управляет историей скачанных манг.
 
-    def __init__(self, path: Path | None = None) -> None:
-        self._path = path or HISTORY_FILE
-        self._data: dict[str, Any] = {"version": _CURRENT_VERSION, "manga": {}}
+    Несохранённые изменения (``None`` — удаление) лежат в ``_pending`` и
+    видны всем методам чтения. Пачка записывается вне ``_lock``: на время
+    записи она переносится в ``_writing``, поэтому чтение не ждёт записи,
+    а видит хранилище с наложенными поверх незаписанными изменениями.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        backend: str = HISTORY_BACKEND,
+        flush_delay: float = HISTORY_FLUSH_DELAY,
+        flush_batch: int = HISTORY_FLUSH_BATCH,
+    ) -> None:
+        self._flush_delay = flush_delay
+        self._flush_batch = max(1, flush_batch)
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()  # пачки пишутся по одной, по порядку
+        self._pending: dict[str, dict[str, Any] | None] = {}
+        self._writing: dict[str, dict[str, Any] | None] = {}
+        self._flush_timer: threading.Timer | None = None
+        if backend == "json":
+            self._store: _JsonStore | _SqliteStore = _JsonStore(path or HISTORY_FILE)
+        elif backend == "sqlite":
+            legacy = HISTORY_FILE if path is None else path.with_suffix(".json")
+            self._store = _SqliteStore(path or HISTORY_DB, legacy)
+        else:
+            raise ValueError(f"Неизвестное хранилище истории: {backend}")
         self.load()
 
     # -- Чтение / запись -------------------------------------------------------
 
     def load(self) -> bool:
-        """Загружает историю из файла. Возвращает ``True`` при успехе."""
-        if not self._path.exists():
-            return False
-        try:
-            with open(self._path, encoding="utf-8") as f:
-                self._data = json.load(f)
-            return True
-        except Exception as exc:
-            logger.error("Ошибка чтения истории: %s", exc)
-            return False
+        """Загружает (открывает) историю. Возвращает ``True`` при успехе."""
+        return self._store.load()
 
     def save(self) -> bool:
-        """Сохраняет историю в файл. Возвращает ``True`` при успехе."""
-        try:
-            self._path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self._path, "w", encoding="utf-8") as f:
-                json.dump(self._data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception as exc:
-            logger.error("Ошибка записи истории: %s", exc)
-            return False
+        """Сразу записывает накопленные изменения. Возвращает ``True`` при успехе."""
+        with self._write_lock:
+            return self._write_pending()
 
-    # -- Доступ к данным -------------------------------------------------------
+    flush = save
 
-    @property
-    def _manga(self) -> dict[str, Any]:
-        return self._data.setdefault("manga", {})
+    def close(self) -> None:
+        """Записывает накопленные изменения и закрывает хранилище."""
+        with self._write_lock:
+            self._write_pending()
+            self._store.close()
+
+    # -- Доступ к данным -------------------------------------------------------
 
     def get_all(self) -> list[dict[str, Any]]:
         """Все записи, отсортированные по дате последнего скачивания (новые первые)."""
-        entries = list(self._manga.values())
-        entries.sort(key=lambda e: e.get("last_download_date", ""), reverse=True)
-        return entries
+        overlay = self._overlay()
+        if not overlay:
+            return self._store.get_all()
+        entries = {e["url"]: e for e in self._store.get_all()}
+        for url, entry in overlay.items():
+            if entry is None:
+                entries.pop(url, None)
+            else:
+                entries[url] = entry
+        result = list(entries.values())
+        result.sort(key=lambda e: e.get("last_download_date", ""), reverse=True)
+        return result
 
     def get(self, url: str) -> dict[str, Any] | None:
         """Запись по URL манги."""
-        return self._manga.get(url)
+        overlay = self._overlay()
+        if url in overlay:
+            return overlay[url]
+        return self._store.get(url)
 
     def upsert(
         self,
@@ -77,39 +168,395 @@ class DownloadHistory:
         downloaded_chapters: list[int],
         cbz_path: str,
         total_on_site: int = 0,
+        chapter_ids: list[int] | None = None,
     ) -> None:
-        """Создаёт или обновляет запись о манге и сохраняет файл."""
-        existing = self._manga.get(url, {})
-        prev_chapters: list[int] = existing.get("downloaded_chapters", [])
-        merged = sorted(set(prev_chapters) | set(downloaded_chapters))
-
-        known_total = total_on_site or existing.get("last_known_total", 0)
-
-        self._manga[url] = {
-            "title": title,
-            "url": url,
-            "news_id": news_id,
-            "downloaded_chapters": merged,
-            "last_chapter_downloaded": max(merged) if merged else 0,
-            "last_known_total": known_total,
-            "cbz_path": cbz_path,
-            "last_download_date": datetime.now().isoformat(timespec="seconds"),
-            "download_count": existing.get("download_count", 0) + 1,
-        }
+        """Создаёт или обновляет запись о манге и сразу сохраняет её.
+
+        *chapter_ids* — id скачанных глав на сайте; они добавляются к уже
+        известным, как и номера глав.
+        """
+        with self._lock:
+            existing = self.get(url) or {}
+            prev_chapters = ChapterSet.load(existing.get("downloaded_chapters"))
+            merged = prev_chapters | downloaded_chapters
+            ids = ChapterSet.load(existing.get("chapter_ids"))
+            # Старой записи без id неполный набор хуже пустого: id всех
+            # глав восстановит проверка обновлений по номерам.
+            if ids or not prev_chapters:
+                ids = ids | (chapter_ids or ())
+
+            known_total = total_on_site or existing.get("last_known_total", 0)
+
+            self._stage(url, {
+                "title": title,
+                "url": url,
+                "news_id": news_id,
+                "downloaded_chapters": merged,
+                "last_chapter_downloaded": merged.last,
+                "last_known_total": known_total,
+                "cbz_path": cbz_path,
+                "last_download_date": datetime.now().isoformat(timespec="seconds"),
+                "download_count": existing.get("download_count", 0) + 1,
+                "chapter_ids": ids,
+            })
         self.save()
 
     def update_total(self, url: str, total_on_site: int) -> None:
-        """Обновляет ``last_known_total`` для манги (из фоновой проверки)."""
-        entry = self._manga.get(url)
-        if entry and total_on_site > 0:
-            entry["last_known_total"] = total_on_site
+        """Обновляет ``last_known_total`` для манги (из фоновой проверки).
+
+        Изменение записывается отложенно, вместе с соседними.
+        """
+        with self._lock:
+            entry = self.get(url)
+            if not (entry and total_on_site > 0 and entry.get("last_known_total") != total_on_site):
+                return
+            full = self._stage(url, {**entry, "last_known_total": total_on_site})
+        if full:
+            self.save()
+
+    def set_chapter_ids(self, url: str, chapter_ids: ChapterSet) -> None:
+        """Задаёт id скачанных глав для записи, где их ещё нет.
+
+        Используется для старых записей, id глав которых восстановлены
+        проверкой обновлений по номерам. Запись отложенная, как у
+        :meth:`update_total`.
+        """
+        with self._lock:
+            entry = self.get(url)
+            if not (entry and chapter_ids and not entry.get("chapter_ids")):
+                return
+            full = self._stage(url, {**entry, "chapter_ids": ChapterSet.load(chapter_ids)})
+        if full:
             self.save()
 
     def delete(self, url: str) -> bool:
         """Удаляет запись. Возвращает ``True`` если запись существовала."""
-        if url in self._manga:
-            del self._manga[url]
-            self.save()
+        with self._lock:
+            if self.get(url) is None:
+                return False
+            self._stage(url, None)
+        self.save()
+        return True
+
+    # -- Отложенная запись -----------------------------------------------------
+
+    def _stage(self, url: str, entry: dict[str, Any] | None) -> bool:
+        """Запоминает изменение и заводит таймер записи (под ``_lock``).
+
+        Возвращает ``True``, если пачка набрана и её пора записать —
+        вызывающий делает это через :meth:`save`, уже отпустив ``_lock``.
+        """
+        self._pending[url] = entry
+        if len(self._pending) >= self._flush_batch:
             return True
+        self._cancel_flush_timer()
+        self._flush_timer = threading.Timer(self._flush_delay, self._on_flush_timer)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
         return False
 
+    def _write_pending(self) -> bool:
+        """Записывает накопленную пачку (под ``_write_lock``, но не ``_lock``)."""
+        with self._lock:
+            self._cancel_flush_timer()
+            if not self._pending:
+                return True
+            batch, self._pending = self._pending, {}
+            self._writing = batch
+        ok = self._store.write(batch)
+        with self._lock:
+            self._writing = {}
+            if not ok:
+                # Более новые изменения тех же манг важнее неудавшейся пачки.
+                self._pending = {**batch, **self._pending}
+        return ok
+
+    def _overlay(self) -> dict[str, dict[str, Any] | None]:
+        """Ещё не записанные в хранилище изменения: записываемые и новые."""
+        with self._lock:
+            return {**self._writing, **self._pending}
+
+    def _cancel_flush_timer(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+    def _on_flush_timer(self) -> None:
+        with self._lock:
+            self._flush_timer = None
+        if not self.save():
+            logger.warning("История не записана, повтор при следующем изменении")
+
+
+class _JsonStore:
+    """История в одном JSON-файле (переписывается целиком).
+
+    Блокировка защищает только данные в памяти: файл пишется уже без неё,
+    чтобы чтение не ждало записи.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._data: dict[str, Any] = {"version": _CURRENT_VERSION, "manga": {}}
+
+    def load(self) -> bool:
+        if not self._path.exists():
+            return False
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        except Exception as exc:
+            logger.error("Ошибка чтения истории: %s", exc)
+            return False
+        for entry in self._manga.values():
+            entry["downloaded_chapters"] = ChapterSet.load(entry.get("downloaded_chapters"))
+            entry["chapter_ids"] = ChapterSet.load(entry.get("chapter_ids"))
+        if self._data.get("version", 1) < _CURRENT_VERSION:
+            self._data["version"] = _CURRENT_VERSION
+            if self._save():
+                logger.info("История переведена в формат версии %d", _CURRENT_VERSION)
+        return True
+
+    def close(self) -> None:
+        pass
+
+    def write(self, changes: dict[str, dict[str, Any] | None]) -> bool:
+        with self._lock:
+            for url, entry in changes.items():
+                if entry is None:
+                    self._manga.pop(url, None)
+                else:
+                    self._manga[url] = entry
+        return self._save()
+
+    def _save(self) -> bool:
+        tmp = self._path.with_name(self._path.name + ".tmp")
+        with self._lock:
+            data = {
+                **self._data,
+                "manga": {url: _serialize(e) for url, e in self._manga.items()},
+            }
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._path)
+            return True
+        except Exception as exc:
+            logger.error("Ошибка записи истории: %s", exc)
+            return False
+
+    @property
+    def _manga(self) -> dict[str, Any]:
+        return self._data.setdefault("manga", {})
+
+    def get_all(self) -> list[dict[str, Any]]:
+        with self._lock:
+            entries = list(self._manga.values())
+        entries.sort(key=lambda e: e.get("last_download_date", ""), reverse=True)
+        return entries
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        with self._lock:
+            return self._manga.get(url)
+
+
+class _SqliteStore:
+    """История в SQLite (WAL): одна строка на мангу.
+
+    Пишет одно соединение под блокировкой. Чтения идут через отдельные
+    соединения из небольшого пула (по одному на одновременное чтение):
+    в режиме WAL они видят последнюю зафиксированную версию и не ждут,
+    пока пишется пачка изменений.
+    """
+
+    def __init__(self, path: Path, legacy_json: Path) -> None:
+        self._path = path
+        self._legacy_json = legacy_json
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._readers_lock = threading.Lock()
+        self._readers: list[sqlite3.Connection] = []  # свободные соединения для чтения
+        self._open = False
+
+    def load(self) -> bool:
+        with self._lock:
+            if self._conn is not None:
+                return True
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self._path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                with conn:
+                    conn.executescript(_SCHEMA)
+                _migrate(conn)
+            except sqlite3.Error as exc:
+                logger.error("Ошибка открытия базы истории: %s", exc)
+                return False
+            self._conn = conn
+            self._import_legacy()
+            with self._readers_lock:
+                self._open = True
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            with self._readers_lock:
+                self._open = False
+                readers, self._readers = self._readers, []
+            for reader in readers:
+                reader.close()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def write(self, changes: dict[str, dict[str, Any] | None]) -> bool:
+        """Записывает пачку изменений одной транзакцией."""
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        puts = [_entry_to_row(e) for e in changes.values() if e is not None]
+        deletes = [(url,) for url, e in changes.items() if e is None]
+        with self._lock:
+            if self._conn is None:
+                return False
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO manga ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                        puts,
+                    )
+                    self._conn.executemany("DELETE FROM manga WHERE url = ?", deletes)
+                return True
+            except sqlite3.Error as exc:
+                logger.error("Ошибка записи истории: %s", exc)
+                return False
+
+    def get_all(self) -> list[dict[str, Any]]:
+        return [
+            _row_to_entry(row)
+            for row in self._query("SELECT * FROM manga ORDER BY last_download_date DESC")
+        ]
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        rows = self._query("SELECT * FROM manga WHERE url = ?", (url,))
+        return _row_to_entry(rows[0]) if rows else None
+
+    # -- Внутренние методы -----------------------------------------------------
+
+    def _query(self, sql: str, params: tuple = ()) -> list[sqlite3.Row]:
+        try:
+            conn = self._acquire_reader()
+            if conn is None:
+                return []
+            try:
+                return conn.execute(sql, params).fetchall()
+            finally:
+                self._release_reader(conn)
+        except sqlite3.Error as exc:
+            logger.error("Ошибка чтения истории: %s", exc)
+            return []
+
+    def _acquire_reader(self) -> sqlite3.Connection | None:
+        """Свободное соединение для чтения; при нехватке открывает новое."""
+        with self._readers_lock:
+            if not self._open:
+                return None
+            if self._readers:
+                return self._readers.pop()
+        conn = sqlite3.connect(self._path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _release_reader(self, conn: sqlite3.Connection) -> None:
+        with self._readers_lock:
+            if self._open:
+                self._readers.append(conn)
+                return
+        conn.close()
+
+    def _import_legacy(self) -> None:
+        """Однократно переносит в базу историю из JSON-файла.
+
+        После импорта файл переименовывается в ``*.json.imported``, чтобы
+        не импортироваться повторно.
+        """
+        if not self._legacy_json.exists():
+            return
+        try:
+            with open(self._legacy_json, encoding="utf-8") as f:
+                entries = list(json.load(f).get("manga", {}).values())
+            placeholders = ", ".join("?" for _ in _COLUMNS)
+            with self._conn:
+                # Записи, уже бывшие в базе, не перезаписываются.
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO manga ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                    [_entry_to_row(e) for e in entries],
+                )
+            self._legacy_json.replace(
+                self._legacy_json.with_name(self._legacy_json.name + ".imported")
+            )
+            logger.info("История импортирована из %s: %d манг", self._legacy_json.name, len(entries))
+        except Exception as exc:
+            logger.error("Ошибка импорта истории из JSON: %s", exc)
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Переводит базу на текущую схему.
+
+    Версия 1 — списки глав переведены в строки отрезков, версия 2 —
+    добавлен столбец ``chapter_ids`` (пустой у старых записей).
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= _SCHEMA_VERSION:
+        return
+    rows = []
+    with conn:
+        if version < 1:
+            rows = conn.execute(
+                "SELECT url, downloaded_chapters FROM manga WHERE downloaded_chapters LIKE '[%'"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE manga SET downloaded_chapters = ? WHERE url = ?",
+                [(str(ChapterSet.load(chapters)), url) for url, chapters in rows],
+            )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(manga)")}
+        if "chapter_ids" not in columns:
+            conn.execute("ALTER TABLE manga ADD COLUMN chapter_ids TEXT NOT NULL DEFAULT ''")
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+    if rows:
+        logger.info("История: списки глав переведены в отрезки (%d манг)", len(rows))
+
+
+def _serialize(entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        **entry,
+        "downloaded_chapters": str(ChapterSet.load(entry.get("downloaded_chapters"))),
+        "chapter_ids": str(ChapterSet.load(entry.get("chapter_ids"))),
+    }
+
+
+def _entry_to_row(entry: dict[str, Any]) -> tuple:
+    return (
+        entry["url"],
+        entry.get("title", ""),
+        str(entry.get("news_id", "")),
+        str(ChapterSet.load(entry.get("downloaded_chapters"))),
+        entry.get("last_chapter_downloaded", 0),
+        entry.get("last_known_total", 0),
+        entry.get("cbz_path", ""),
+        entry.get("last_download_date", ""),
+        entry.get("download_count", 0),
+        str(ChapterSet.load(entry.get("chapter_ids"))),
+    )
+
+
+def _row_to_entry(row: sqlite3.Row) -> dict[str, Any]:
+    entry = dict(row)
+    entry["downloaded_chapters"] = ChapterSet.load(entry["downloaded_chapters"])
+    entry["chapter_ids"] = ChapterSet.load(entry["chapter_ids"])
+    return entry
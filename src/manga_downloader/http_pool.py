@@ -0,0 +1,157 @@
+"""
+Общий пул HTTP-сессий curl_cffi для всего процесса.
+
+Парсер, загрузчики и фоновая проверка обновлений берут сессии отсюда, а не
+создают свои: соединения с сайтом живут между запросами, тайтлами и
+задачами (keep-alive), и TLS handshake не повторяется на каждый запрос.
+
+Это верно только для запросов без ``stream=True``. Потоковый ответ
+curl_cffi читает на копии curl-хэндла без соединения, так что каждый
+такой запрос открывает новое. Поэтому страницы манги парсер читает через
+``content_callback``. Синхронные потоковые загрузки архивов (резервный
+путь curl_cffi и Selenium-восстановление) соединение не переиспользуют;
+основной асинхронный путь держит соединения в своей ``AsyncSession``.
+
+Сессии группируются по ключу «файл cookies + профиль impersonate». Одна
+сессия в каждый момент выдаётся только одному потоку; число сессий на ключ
+ограничено ``HTTP_POOL_SIZE`` — при исчерпании следующий поток ждёт
+освобождения.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+
+import curl_cffi
+
+from manga_downloader.config import HTTP_POOL_SIZE
+from manga_downloader.cookies import CookieManager
+
+logger = logging.getLogger(__name__)
+
+_PoolKey = Tuple[Optional[str], str]
+
+
+@dataclass
+class _PooledSession:
+    session: curl_cffi.Session
+    # Чьи cookies сейчас в jar сессии и какого поколения.
+    cookie_owner: CookieManager | None = None
+    cookie_generation: int = 0
+    discarded: bool = False
+
+
+class SessionPool:
+    """Потокобезопасный пул синхронных ``curl_cffi.Session``.
+
+    Использование::
+
+        with http_pool.session(cookie_manager) as session:
+            session.get(url, headers=...)
+
+    Заголовки передаются в каждом запросе: сессии общие для модулей
+    с разными наборами заголовков.
+    """
+
+    def __init__(self, max_per_key: int = HTTP_POOL_SIZE) -> None:
+        self._max_per_key = max_per_key
+        self._cond = threading.Condition()
+        self._idle: dict[_PoolKey, list[_PooledSession]] = {}
+        self._created: dict[_PoolKey, int] = {}
+
+    @contextmanager
+    def session(
+        self,
+        cookie_manager: CookieManager | None = None,
+        *,
+        impersonate: str = "chrome",
+    ) -> Iterator[curl_cffi.Session]:
+        """Выдаёт сессию на время блока ``with``.
+
+        С *cookie_manager* в сессии будут его актуальные cookies (при смене
+        поколения они переприменяются); без него — сессия без cookies.
+        """
+        key = (str(cookie_manager.path) if cookie_manager else None, impersonate)
+        pooled = self._checkout(key)
+        try:
+            self._sync_cookies(pooled, cookie_manager)
+            yield pooled.session
+        except curl_cffi.CurlError:
+            # Сетевая ошибка: соединения сессии могли остаться в плохом
+            # состоянии, поэтому она не возвращается в пул.
+            self._discard(key, pooled)
+            raise
+        finally:
+            self._checkin(key, pooled)
+
+    def close(self) -> None:
+        """Закрывает свободные сессии (при выходе из приложения)."""
+        with self._cond:
+            idle, self._idle = self._idle, {}
+            for key, items in idle.items():
+                self._created[key] -= len(items)
+        for items in idle.values():
+            for pooled in items:
+                _close_quietly(pooled.session)
+
+    # -- Внутренние методы -----------------------------------------------------
+
+    def _checkout(self, key: _PoolKey) -> _PooledSession:
+        with self._cond:
+            while True:
+                idle = self._idle.get(key)
+                if idle:
+                    return idle.pop()
+                if self._created.get(key, 0) < self._max_per_key:
+                    self._created[key] = self._created.get(key, 0) + 1
+                    break
+                self._cond.wait()
+        # Один curl-хэндл на сессию (а не на поток): соединения переживают
+        # потоки пула, из которых сессия использовалась.
+        session = curl_cffi.Session(impersonate=key[1], use_thread_local_curl=False)
+        return _PooledSession(session)
+
+    def _checkin(self, key: _PoolKey, pooled: _PooledSession) -> None:
+        if pooled.discarded:
+            return
+        with self._cond:
+            self._idle.setdefault(key, []).append(pooled)
+            self._cond.notify()
+
+    def _discard(self, key: _PoolKey, pooled: _PooledSession) -> None:
+        pooled.discarded = True
+        _close_quietly(pooled.session)
+        with self._cond:
+            self._created[key] -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _sync_cookies(pooled: _PooledSession, cookie_manager: CookieManager | None) -> None:
+        if cookie_manager is None:
+            return
+        if pooled.cookie_owner is cookie_manager:
+            pooled.cookie_generation = cookie_manager.sync_session(
+                pooled.session, pooled.cookie_generation,
+            )
+            return
+        # Сессию раньше заполнял другой CookieManager того же файла —
+        # его поколения с нашими не сравнимы, применяем заново.
+        pooled.session.cookies.clear()
+        pooled.cookie_generation = cookie_manager.apply_to_session(pooled.session)
+        pooled.cookie_owner = cookie_manager
+
+
+def _close_quietly(session: curl_cffi.Session) -> None:
+    try:
+        session.close()
+    except Exception as exc:
+        logger.debug("Ошибка при закрытии HTTP-сессии: %s", exc)
+
+
+http_pool = SessionPool()
+atexit.register(http_pool.close)
@@ -0,0 +1,319 @@
+"""
+Журнал текущей задачи скачивания на диске.
+
+Журнал фиксирует параметры задачи и состояние каждой главы
+(``pending`` → ``downloading`` → ``downloaded`` → ``archived``) в момент
+его изменения. Снимок задачи (``job_journal.json``) пишется атомарно
+(временный файл + ``os.replace`` с ``fsync``), а смены состояний глав
+дописываются строками в ``job_journal.json.log``: запись стоит O(1), а не
+переписывания всего журнала. Каждые ``JOURNAL_COMPACT_EVERY`` строк лог
+сворачивается в новый снимок. Строки лога помечены случайным id снимка,
+так что устаревший лог (например, от прошлой задачи) при чтении не
+применяется.
+``downloaded`` и ``archived`` дописываются с ``fsync``, поэтому после
+падения приложения или перезагрузки журнал описывает ровно то, что
+успело произойти. Завершённая задача удаляет журнал; найденный при
+старте журнал означает прерванную задачу.
+
+Дополнение существующего CBZ защищено копией хвоста архива (центральный
+каталог ZIP): если запись оборвалась, архив откатывается к исходному
+состоянию и главы дописываются заново без дублей страниц.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from manga_downloader.cbz import volume_paths
+from manga_downloader.config import JOURNAL_COMPACT_EVERY, JOURNAL_FILE
+
+logger = logging.getLogger(__name__)
+
+_CURRENT_VERSION = 1
+
+PENDING = "pending"
+DOWNLOADING = "downloading"
+DOWNLOADED = "downloaded"
+ARCHIVED = "archived"
+
+# Состояния, которые нельзя потерять при падении: по ним решается, что
+# докачивать и что дописывать в архив. Остальные дописываются без fsync.
+_DURABLE_STATES = frozenset({DOWNLOADED, ARCHIVED})
+
+
+class JobJournal:
+    """Журнал одной (текущей) задачи скачивания."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self._path = path or JOURNAL_FILE
+        self._tail_path = self._path.with_name(self._path.name + ".cbz_tail")
+        self._log_path = self._path.with_name(self._path.name + ".log")
+        self._lock = threading.Lock()
+        self._job: dict[str, Any] | None = None
+        self._log_lines = 0  # строк в логе после последнего снимка
+        self._load()
+
+    # -- Задача ----------------------------------------------------------------
+
+    @property
+    def job(self) -> dict[str, Any] | None:
+        """Данные незавершённой задачи или ``None``."""
+        return self._job
+
+    def begin(
+        self,
+        *,
+        url: str,
+        title: str,
+        news_id: str,
+        download_mode: str,
+        cbz_path: str,
+        chapter_range: tuple[int, int] | None,
+        chapters: list[tuple[int, dict[str, Any]]],
+        chapter_ids: list[int] | None = None,
+    ) -> bool:
+        """Начинает задачу; *chapters* — пары (номер главы, глава).
+
+        Если журнал описывает ту же задачу (прерванную), состояния глав
+        сохраняются, а недописанный CBZ откатывается. Возвращает ``True``
+        при продолжении прерванной задачи.
+        """
+        with self._lock:
+            previous: dict[str, str] = {}
+            resumed = bool(
+                self._job
+                and self._job.get("url") == url
+                and self._job.get("news_id") == news_id
+            )
+            if resumed:
+                self._restore_archive()
+                previous = {
+                    str(ch["id"]): ch["state"] for ch in self._job["chapters"]
+                }
+            elif self._job:
+                self._restore_archive()
+                self._drop_partial_archive()
+
+            self._job = {
+                "version": _CURRENT_VERSION,
+                "url": url,
+                "title": title,
+                "news_id": news_id,
+                "download_mode": download_mode,
+                "cbz_path": cbz_path,
+                "chapter_range": list(chapter_range) if chapter_range else None,
+                "chapter_ids": list(chapter_ids) if chapter_ids else None,
+                "started": datetime.now().isoformat(timespec="seconds"),
+                "chapters": [
+                    {
+                        "index": index,
+                        "id": chapter["id"],
+                        "title": chapter["title"],
+                        # Недокачанная глава докачивается заново (через .part).
+                        "state": _resume_state(previous.get(str(chapter["id"]), PENDING)),
+                    }
+                    for index, chapter in chapters
+                ],
+            }
+            self._save()
+            return resumed
+
+    def finish(self) -> None:
+        """Задача завершена: журнал больше не нужен."""
+        with self._lock:
+            self._job = None
+            self._path.unlink(missing_ok=True)
+            self._log_path.unlink(missing_ok=True)
+            self._tail_path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        """Отказ от продолжения прерванной задачи (архив откатывается)."""
+        with self._lock:
+            self._restore_archive()
+            self._drop_partial_archive()
+        self.finish()
+
+    # -- Состояния глав --------------------------------------------------------
+
+    def state(self, chapter_id: int | str) -> str:
+        chapter = self._find(chapter_id)
+        return chapter["state"] if chapter else PENDING
+
+    def mark(self, chapter_ids: list[int | str] | int | str, state: str) -> None:
+        """Записывает новое состояние одной или нескольких глав.
+
+        Пишет на диск (строкой лога, возможно с ``fsync``), поэтому из цикла
+        событий вызывается через ``asyncio.to_thread``.
+        """
+        if not isinstance(chapter_ids, list):
+            chapter_ids = [chapter_ids]
+        with self._lock:
+            changed = []
+            for chapter_id in chapter_ids:
+                chapter = self._find(chapter_id)
+                if chapter and chapter["state"] != state:
+                    chapter["state"] = state
+                    changed.append(chapter["id"])
+            if changed:
+                self._append(changed, state)
+
+    def count(self, *states: str) -> int:
+        if not self._job:
+            return 0
+        return sum(1 for ch in self._job["chapters"] if ch["state"] in states)
+
+    # -- Защита дополняемого архива --------------------------------------------
+
+    def protect_archive(self, cbz_path: Path) -> None:
+        """Сохраняет хвост *cbz_path* перед дополнением на месте.
+
+        ZIP в режиме ``"a"`` пишет новые файлы поверх центрального каталога;
+        копии каталога достаточно, чтобы вернуть архив в исходный вид.
+        """
+        with zipfile.ZipFile(cbz_path, "r") as zf:
+            offset = zf.start_dir
+        with open(cbz_path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+        with self._lock:
+            _write_durable(self._tail_path, tail)
+            if self._job is not None:
+                self._job["archive_guard"] = {"path": str(cbz_path), "offset": offset}
+                self._save()
+
+    def release_archive(self) -> None:
+        """Дополнение архива завершено и записано на диск."""
+        with self._lock:
+            if self._job is not None and self._job.pop("archive_guard", None):
+                self._save()
+            self._tail_path.unlink(missing_ok=True)
+
+    def restore_archive(self) -> bool:
+        """Откатывает недописанный архив. Возвращает ``True``, если откат был."""
+        with self._lock:
+            return self._restore_archive()
+
+    # -- Внутренние методы -----------------------------------------------------
+
+    def _find(self, chapter_id: int | str) -> dict[str, Any] | None:
+        if not self._job:
+            return None
+        key = str(chapter_id)
+        for chapter in self._job["chapters"]:
+            if str(chapter["id"]) == key:
+                return chapter
+        return None
+
+    def _restore_archive(self) -> bool:
+        guard = self._job.pop("archive_guard", None) if self._job else None
+        if not guard or not self._tail_path.exists():
+            return False
+        tail = self._tail_path.read_bytes()
+        with open(guard["path"], "r+b") as f:
+            f.seek(guard["offset"])
+            f.write(tail)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+        self._tail_path.unlink(missing_ok=True)
+        logger.info("Недописанный архив %s восстановлен", guard["path"])
+        self._save()
+        return True
+
+    def _drop_partial_archive(self) -> None:
+        """Удаляет недописанный новый архив (``<cbz>.part``) или том прерванной задачи."""
+        if self._job and self._job.get("cbz_path"):
+            cbz_path = Path(self._job["cbz_path"])
+            for part in [cbz_path.with_name(cbz_path.name + ".part"), *volume_paths(cbz_path, ".part")]:
+                part.unlink(missing_ok=True)
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                self._job = json.load(f)
+        except Exception as exc:
+            logger.error("Ошибка чтения журнала задачи: %s", exc)
+            return
+        self._replay_log()
+
+    def _replay_log(self) -> None:
+        """Применяет к снимку строки лога, записанные после него."""
+        log_id = self._job.get("log_id")
+        try:
+            with open(self._log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        line_id, chapter_ids, state = json.loads(line)
+                    except ValueError:
+                        break  # строка оборвана падением — дальше ничего нет
+                    if line_id != log_id:
+                        continue
+                    for chapter_id in chapter_ids:
+                        chapter = self._find(chapter_id)
+                        if chapter:
+                            chapter["state"] = state
+                    self._log_lines += 1
+        except FileNotFoundError:
+            pass
+        except Exception as exc:
+            logger.error("Ошибка чтения лога журнала задачи: %s", exc)
+
+    def _append(self, chapter_ids: list[int | str], state: str) -> None:
+        """Дописывает смену состояния в лог (или сворачивает лог в снимок)."""
+        if self._job is None:
+            return
+        if self._log_lines >= JOURNAL_COMPACT_EVERY:
+            self._save()
+            return
+        line = json.dumps(
+            [self._job.get("log_id"), chapter_ids, state], ensure_ascii=False,
+        )
+        try:
+            with open(self._log_path, "ab") as f:
+                f.write(line.encode("utf-8") + b"\n")
+                f.flush()
+                if state in _DURABLE_STATES:
+                    os.fsync(f.fileno())
+            self._log_lines += 1
+        except Exception as exc:
+            logger.error("Ошибка записи журнала задачи: %s", exc)
+
+    def _save(self) -> None:
+        """Записывает снимок задачи с новым id лога и обнуляет лог."""
+        if self._job is None:
+            return
+        log_id = uuid.uuid4().hex
+        try:
+            data = json.dumps({**self._job, "log_id": log_id}, ensure_ascii=False)
+            _write_durable(self._path, data.encode("utf-8"))
+        except Exception as exc:
+            logger.error("Ошибка записи журнала задачи: %s", exc)
+            return
+        self._job["log_id"] = log_id
+        self._log_path.unlink(missing_ok=True)
+        self._log_lines = 0
+
+
+def _resume_state(state: str) -> str:
+    return PENDING if state == DOWNLOADING else state
+
+
+def _write_durable(path: Path, data: bytes) -> None:
+    """Атомарно и с ``fsync`` записывает *data* в *path*."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
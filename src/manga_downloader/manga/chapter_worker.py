@@ -4,20 +4,31 @@ QThread-воркер для скачивания манги.
 Управляет жизненным циклом:
 1. Открытие браузера и авторизация.
 2. Мониторинг страниц манги.
-3. Скачивание глав через FallbackDownloader.
-4. Сборка CBZ-архива (новый или дополнение существующего).
+3. Скачивание глав через FallbackDownloader (уже скачанные берутся из
+   постоянного кэша глав).
+4. Сборка CBZ-архива (новый или дополнение существующего) по мере
+   скачивания глав.
+
+Ход задачи пишется в журнал (:mod:`manga_downloader.job_journal`), поэтому
+прерванная падением задача продолжается без повторных загрузок и дублей
+страниц в архиве.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
+import math
 import os
 import re
 import shutil
 import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from threading import Event
+from typing import Any, Coroutine, TypeVar
 
 from PyQt5.QtCore import QThread, pyqtSignal
 from selenium import webdriver
@@ -27,21 +38,44 @@ from selenium.webdriver.support.ui import WebDriverWait
 
 from manga_downloader.config import (
     BASE_URL,
+    CANCEL_POLL_INTERVAL,
+    CBZ_COMPACT_THRESHOLD,
+    CBZ_LAYOUT,
+    CBZ_REORDER_WINDOW,
     DOWNLOADS_DIR,
-    IMAGE_EXTENSIONS,
     LOGIN_WAIT_TIMEOUT,
+    MAX_PARALLEL_DOWNLOADS,
     OUTPUT_DIR,
     PAGE_LOAD_DELAY,
     POLL_INTERVAL,
-    REQUEST_DELAY,
+    PREFETCH_DEPTH,
     SELENIUM_WAIT_TIMEOUT,
     TEMP_DIR,
 )
+from manga_downloader.cbz import (
+    LAYOUT_FOLDERS,
+    CbzIndex,
+    PagePacker,
+    VolumeLimits,
+    chapter_size,
+    compact,
+    dead_bytes,
+    detach_chapter,
+    reattach_chapter,
+    volume_base,
+    volume_number,
+    volume_path,
+    volume_paths,
+)
+from manga_downloader.chapter_cache import ChapterCache
 from manga_downloader.driver import ChromeDriverError, create_chrome_driver
 from manga_downloader.cookies import CookieManager
 from manga_downloader.downloaders import FallbackDownloader
+from manga_downloader.downloaders.prefetch import UrlPrefetcher
+from manga_downloader.downloaders.streaming import ProgressCallback
+from manga_downloader.job_journal import ARCHIVED, DOWNLOADED, DOWNLOADING, PENDING, JobJournal
 from manga_downloader.manga.parser import MangaInfo, MangaParser
-from manga_downloader.utils import sanitize_filename
+from manga_downloader.utils import sanitize_filename, validate_zip_file
 
 
 # JS-код для замены кнопки «Отслеживать» на «Скачать»
@@ -60,6 +94,46 @@ arguments[0].onclick = function() {
 
 _PAGE_INDEX_RE = re.compile(r"^(\d+)\.")
 
+_BYTES_PROGRESS_INTERVAL = 0.25  # не чаще одного сигнала о байтах за интервал
+_VOLUME_QUEUE_SIZE = 2  # глав в очереди записи одного тома
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _CbzBuild:
+    """CBZ (или том), который наполняется главами по мере скачивания."""
+
+    final: Path
+    target: Path
+    cbz: zipfile.ZipFile
+    index: int  # номер следующей страницы
+    contents: CbzIndex  # оглавление, сохраняемое в комментарии архива
+    present: set[str]  # id глав, которые были в архиве до задачи
+    size: int = 0  # примерный размер с уже назначенными главами
+    routed: int = 0  # глав в томе с уже назначенными
+    pages: int = 0
+    attempted: int = 0
+    archived: list[int | str] = field(default_factory=list)
+    replaced: int = 0
+    committed: bool = False
+    error: Exception | None = None
+    # Очередь глав на запись и её писатель (в цикле событий задачи).
+    queue: asyncio.Queue[tuple[str, Path, int | str] | None] | None = None
+    writer: asyncio.Future[None] | None = None
+
+
+@dataclass
+class _CbzOutput:
+    """Куда пишутся главы задачи: один CBZ или серия томов."""
+
+    base: Path  # итоговый CBZ или путь серии без номера тома
+    chapters: list[int]  # номера глав для архивации, по порядку
+    limits: VolumeLimits
+    volumes: list[_CbzBuild] = field(default_factory=list)  # последний — открыт
+    sealing: list[asyncio.Future[None]] = field(default_factory=list)
+    error: Exception | None = None
+
 
 class ChapterWorker(QThread):
     """Фоновый поток загрузки манги.
@@ -71,9 +145,11 @@ class ChapterWorker(QThread):
         chapters_found(int, str, str): (кол-во глав, название, URL).
         cancellation_info(int): кол-во пропущенных глав при частичном завершении.
         chapter_progress(int, int, str): (текущая глава, всего глав, название).
+        bytes_downloaded(qint64): байт архивов глав записано на диск за задачу.
         cbz_ready(str): абсолютный путь к готовому CBZ-файлу.
-        download_complete_info(str, str, str, str, int):
-            (url, title, news_id, json-список скачанных индексов, total_on_site).
+        download_complete_info(str, str, str, str, int, str):
+            (url, title, news_id, json-список скачанных индексов, total_on_site,
+            json-список id скачанных глав).
     """
 
     log = pyqtSignal(str)
@@ -83,8 +159,9 @@ class ChapterWorker(QThread):
     manga_info_ready = pyqtSignal(int, str, str)
     cancellation_info = pyqtSignal(int)
     chapter_progress = pyqtSignal(int, int, str)
+    bytes_downloaded = pyqtSignal("qint64")
     cbz_ready = pyqtSignal(str)
-    download_complete_info = pyqtSignal(str, str, str, str, int)
+    download_complete_info = pyqtSignal(str, str, str, str, int, str)
 
     def __init__(self) -> None:
         super().__init__()
@@ -94,13 +171,30 @@ class ChapterWorker(QThread):
         self._confirm_event = Event()
         self._failed_chapters: list[str] = []
         self._chapter_range: tuple[int, int] | None = None
+        self._chapter_ids: list[int] | None = None
+        # Номер на сайте каждой главы задачи (по порядку задачи).
+        self._chapter_numbers: list[int] = []
         self._driver: webdriver.Chrome | None = None
         self._cookie_manager = CookieManager()
 
         self._download_mode: str = "new"
         self._existing_cbz_path: Path | None = None
         self._downloaded_indices: list[int] = []
+        self._downloaded_ids: list[int] = []
         self._library_mode: bool = False
+        self._max_parallel: int = MAX_PARALLEL_DOWNLOADS
+        self._chapter_bytes: dict[int, int] = {}
+        self._last_bytes_emit: float = 0.0
+        self._cache = ChapterCache()
+        # Номер главы в задаче -> (подпись для лога, путь к архиву, id главы).
+        self._chapter_files: dict[int, tuple[str, Path, int | str]] = {}
+        self._offline: bool = False
+        self._journal = JobJournal()
+        self._packer = PagePacker()
+        self._volumes = VolumeLimits()
+        # Номер главы, которую ждёт сборщик CBZ (окно переупорядочивания).
+        self._archive_next: float = 0
+        self._archive_cond: asyncio.Condition | None = None
 
     # -- Публичный API ---------------------------------------------------------
 
@@ -120,6 +214,16 @@ class ChapterWorker(QThread):
             self._chapter_range = None
             self.log.emit("📊 Установлено скачивание всех глав")
 
+    def set_chapter_ids(self, chapter_ids: list[int] | None) -> None:
+        """Скачивать только главы с этими id на сайте (вместо диапазона).
+
+        Так докачиваются ровно новые и пропущенные главы, найденные
+        проверкой обновлений, даже если номера глав на сайте сдвинулись.
+        """
+        self._chapter_ids = list(chapter_ids) if chapter_ids else None
+        if self._chapter_ids:
+            self.log.emit(f"📊 Установлены главы по id: {len(self._chapter_ids)}")
+
     def set_download_mode(self, mode: str, existing_cbz_path: str | None = None) -> None:
         """Устанавливает режим: ``'new'`` или ``'append'``."""
         self._download_mode = mode
@@ -144,7 +248,8 @@ class ChapterWorker(QThread):
     # -- QThread ---------------------------------------------------------------
 
     def run(self) -> None:
-        self._cleanup()
+        # Недокачанные архивы прошлой задачи остаются для докачки.
+        self._cleanup(keep_downloads=True)
         try:
             if self._library_mode and self._initial_url:
                 self._run_library_download()
@@ -159,28 +264,39 @@ class ChapterWorker(QThread):
         self.url = self._initial_url
 
         self.log.emit("🍪 Загрузка cookies...")
-        if not self._cookie_manager.load():
-            self.log.emit("❌ Не удалось загрузить cookies. Попробуйте режим с браузером.")
-            self.finished_ok.emit(False)
-            return
-
+        cookies_loaded = self._cookie_manager.load()
         parser = MangaParser(self._cookie_manager)
-        try:
+        info: MangaInfo | None = None
+        if cookies_loaded:
             self.log.emit(f"📥 Получение данных манги: {self.url}")
             info = parser.fetch(self.url)
 
-            if not info:
+        if not info:
+            info = self._cached_manga_info()
+            if info:
+                self._offline = True
+                self.log.emit("📴 Сайт недоступен — собираю архив из кэша глав")
+
+        if not info:
+            if not cookies_loaded:
+                self.log.emit("❌ Не удалось загрузить cookies. Попробуйте режим с браузером.")
+            else:
                 self.log.emit("❌ Не удалось получить данные манги. Cookies могли устареть.")
                 self.log.emit("💡 Попробуйте «Открыть сайт и начать» для обновления сессии.")
-                self.finished_ok.emit(False)
-                return
+            self.finished_ok.emit(False)
+            return
 
-            self.log.emit(f"📍 Начинаем скачивание манги: {self.url}")
-            self.chapters_found.emit(info.total_chapters, info.title, self.url)
-            self._download_manga_with_info(parser, info)
-            self.finished_ok.emit(not self.is_cancelled)
-        finally:
-            parser.close()
+        self.log.emit(f"📍 Начинаем скачивание манги: {self.url}")
+        self.chapters_found.emit(info.total_chapters, info.title, self.url)
+        self._download_manga_with_info(parser, info)
+        self.finished_ok.emit(not self.is_cancelled)
+
+    def _cached_manga_info(self) -> MangaInfo | None:
+        """Метаданные манги из кэша глав (для офлайн-пересборки)."""
+        meta = self._cache.manga(self.url or "")
+        if not meta:
+            return None
+        return MangaInfo(title=meta["title"], news_id=meta["news_id"], chapters=meta["chapters"])
 
     def _run_browser_flow(self) -> None:
         """Стандартный режим: открытие браузера и мониторинг."""
@@ -341,7 +457,7 @@ class ChapterWorker(QThread):
 
     def _download_manga_with_info(self, parser: MangaParser, info: MangaInfo) -> None:
         """Скачивание с уже полученными метаданными манги."""
-        if not self._cookie_manager.cookies:
+        if not self._offline and not self._cookie_manager.cookies:
             self.log.emit("⚠️ Cookies не заданы — загружаю из файла")
             if not self._cookie_manager.load():
                 self.log.emit("❌ Не удалось загрузить cookies")
@@ -350,19 +466,32 @@ class ChapterWorker(QThread):
         self.download_started.emit()
 
         chapters = info.chapters
+        if not self._offline:
+            self._cache.remember_manga(self.url or "", info.title, info.news_id, chapters)
         self.log.emit(f"📊 Название: {info.title}")
         self.log.emit(f"📊 ID манги: {info.news_id}")
         self.log.emit(f"📊 Всего глав: {info.total_chapters}")
 
-        if self._chapter_range:
+        numbered = list(enumerate(chapters, 1))
+        if self._chapter_ids:
+            wanted = set(self._chapter_ids)
+            numbered = [(n, ch) for n, ch in numbered if int(ch["id"]) in wanted]
+            self.log.emit(f"📊 Выбраны главы по id (всего {len(numbered)} глав)")
+            if len(numbered) < len(wanted):
+                self.log.emit(f"⚠️ Глав больше нет на сайте: {len(wanted) - len(numbered)}")
+        elif self._chapter_range:
             start, end = self._chapter_range
-            chapters = chapters[max(0, start - 1):min(len(chapters), end)]
-            self.log.emit(f"📊 Выбран диапазон глав: {start}-{end} (всего {len(chapters)} глав)")
+            numbered = numbered[max(0, start - 1):min(len(chapters), end)]
+            self.log.emit(f"📊 Выбран диапазон глав: {start}-{end} (всего {len(numbered)} глав)")
         else:
-            self.log.emit(f"📊 Выбраны все главы (всего {len(chapters)} глав)")
+            self.log.emit(f"📊 Выбраны все главы (всего {len(numbered)} глав)")
+        self._chapter_numbers = [n for n, _ in numbered]
+        chapters = [ch for _, ch in numbered]
 
         if self._download_mode == "append":
             self.log.emit("📦 Режим: дополнение существующего архива")
+        elif self._download_mode == "replace":
+            self.log.emit("📦 Режим: замена глав в существующем архиве")
         else:
             self.log.emit("📦 Режим: новый архив")
 
@@ -370,17 +499,34 @@ class ChapterWorker(QThread):
         OUTPUT_DIR.mkdir(exist_ok=True)
         final_cbz = OUTPUT_DIR / f"{title_safe}.cbz"
 
-        if self._download_mode == "append" and self._existing_cbz_path:
+        if self._in_place_mode and self._existing_cbz_path:
             final_cbz = self._existing_cbz_path
+        if self._volumes.enabled:
+            final_cbz = volume_base(final_cbz)
 
         DOWNLOADS_DIR.mkdir(exist_ok=True)
-        TEMP_DIR.mkdir(exist_ok=True)
+
+        resumed = self._journal.begin(
+            url=self.url or "",
+            title=info.title,
+            news_id=info.news_id,
+            download_mode=self._download_mode,
+            cbz_path=str(final_cbz),
+            chapter_range=self._chapter_range,
+            chapter_ids=self._chapter_ids,
+            chapters=numbered,
+        )
+        if resumed:
+            done = self._journal.count(DOWNLOADED, ARCHIVED)
+            self.log.emit(f"♻️ Продолжаю прерванную задачу: готово {done} из {len(chapters)} глав")
+        if self._volumes.enabled and self._download_mode == "new":
+            self._start_volume_series(final_cbz)
 
         self._failed_chapters = []
         self._downloaded_indices = []
+        self._downloaded_ids = []
 
-        with FallbackDownloader(self.url, self._cookie_manager, self.log.emit) as dl:
-            self._download_chapters(chapters, info.news_id, dl)
+        output = self._download_chapters(chapters, info.news_id, final_cbz)
 
         if self._failed_chapters and not self.is_cancelled:
             self.log.emit(f"\n⚠️ Не удалось скачать {len(self._failed_chapters)} глав:")
@@ -388,12 +534,18 @@ class ChapterWorker(QThread):
                 self.log.emit(f"  • {ch}")
             self.log.emit("")
 
-        if not self.is_cancelled:
-            if self._failed_chapters:
-                self.log.emit("⚠️ Некоторые главы не удалось скачать, но архив будет создан из успешных")
-            self._create_cbz(final_cbz)
-
-        self._cleanup()
+        if self._failed_chapters and not self.is_cancelled:
+            self.log.emit("⚠️ Некоторые главы не удалось скачать, архив собран из успешных")
+        if output is not None:
+            self._finish_output(output)
+        if self._volumes.enabled:
+            final_cbz = (volume_paths(final_cbz) or [final_cbz])[-1]
+
+        self._cache.unpin_all()
+        self._cache.evict()
+        self._cleanup(keep_downloads=self.is_cancelled or bool(self._failed_chapters))
+        if self.is_cancelled:
+            self._journal.finish()
 
         if not self.is_cancelled:
             if self._failed_chapters:
@@ -413,100 +565,666 @@ class ChapterWorker(QThread):
                 info.news_id,
                 indices_json,
                 info.total_chapters,
+                json.dumps(self._downloaded_ids),
             )
+            self._journal.finish()
 
     def _download_chapters(
+        self, chapters: list[dict], news_id: str, final_cbz: Path,
+    ) -> _CbzOutput | None:
+        """Скачивает главы и по мере готовности дописывает их в CBZ.
+
+        Главы, которые уже есть в кэше, не скачиваются (и не запрашиваются
+        у API). Остальные качаются корутинами в цикле событий этого QThread,
+        а сборщик в том же цикле добавляет главы в архив строго по порядку,
+        как только готовы она и все предыдущие. Результаты собираются по
+        номеру главы, и ``_downloaded_indices`` / ``_downloaded_ids`` /
+        ``_failed_chapters`` сохраняют порядок глав независимо от порядка завершения.
+
+        При делении на тома *final_cbz* — путь серии: дописывается только
+        последний том, заполненные лишь учитываются при пропуске глав.
+
+        Возвращает открытый архив для :meth:`_finish_output` или ``None``,
+        если добавлять в архив нечего.
+        """
+        total = len(chapters)
+        if not total:
+            return None
+        self._chapter_bytes = {}
+        self._chapter_files = {}
+
+        current, sealed = final_cbz, set()
+        if self._volumes.enabled:
+            volumes = volume_paths(final_cbz)
+            current = volumes[-1] if volumes else volume_path(final_cbz, 1)
+            sealed = self._sealed_chapters(volumes[:-1])
+        contents = self._load_cbz_index(current)
+        to_archive = self._chapters_to_archive(chapters, current, contents, sealed)
+        # Заменяемые главы качаются заново, а не берутся из кэша (если
+        # только свежая копия не скачана до сбоя этой же задачи).
+        refresh = {
+            ch["id"] for ch in chapters
+            if self._replacing(contents) and ch["id"] in contents
+            and self._journal.state(ch["id"]) != DOWNLOADED
+        }
+        results: dict[int, bool] = {}
+        queue: list[tuple[int, dict]] = []
+        cached_count = 0
+        from_cache: list[int | str] = []
+        for i, chapter in enumerate(chapters, 1):
+            if i not in to_archive:
+                # Уже в архиве: ни скачивать, ни добавлять не нужно.
+                results[i] = True
+                continue
+            cached = None
+            if chapter["id"] not in refresh:
+                cached = self._cache.get(news_id, chapter["id"], pin=True)
+                if cached is None:
+                    cached = self._adopt_finished_download(news_id, chapter["id"])
+            if cached is not None:
+                if self._journal.state(chapter["id"]) != ARCHIVED:
+                    from_cache.append(chapter["id"])
+                self._chapter_files[i] = (
+                    self._chapter_label(self._chapter_numbers[i - 1], chapter), cached, chapter["id"],
+                )
+                results[i] = True
+                cached_count += 1
+            else:
+                queue.append((i, chapter))
+
+        if from_cache:
+            self._journal.mark(from_cache, DOWNLOADED)
+        if cached_count:
+            self.log.emit(f"\n💾 Из кэша: {cached_count} глав")
+        if results:
+            self.chapter_progress.emit(len(results), total, chapters[max(results) - 1]["title"])
+
+        if queue and self._offline:
+            self.log.emit(f"📴 Нет в кэше: {len(queue)} глав — без сайта их не скачать")
+            results.update((i, False) for i, _ in queue)
+            queue = []
+
+        output = None
+        if to_archive:
+            output = self._open_output(final_cbz, current, to_archive, contents)
+        if queue:
+            workers = min(self._max_parallel, len(queue))
+            self.log.emit(f"\n🔢 Начинаем скачивание {len(queue)} глав (параллельно: {workers})...")
+            self.log.emit("📡 Используются методы: curl_cffi → cloudscraper → Selenium\n")
+        if queue or output is not None:
+            try:
+                self._run_event_loop(
+                    self._download_and_archive(queue, total, news_id, results, output)
+                )
+            except BaseException:
+                if output is not None:
+                    self._packer.close()
+                    for build in output.volumes:
+                        if build.cbz.fp is not None:
+                            build.cbz.close()
+                            self._discard_cbz(build)
+                raise
+        if queue:
+            self.bytes_downloaded.emit(sum(self._chapter_bytes.values()))
+
+        for i, chapter in enumerate(chapters, 1):
+            if i not in results:
+                continue
+            if results[i]:
+                self._downloaded_indices.append(self._chapter_numbers[i - 1])
+                self._downloaded_ids.append(int(chapter["id"]))
+            else:
+                self._failed_chapters.append(f"Глава {i}: {chapter['title']}")
+        return output
+
+    def _run_event_loop(self, coro: Coroutine[Any, Any, _T]) -> _T:
+        """Выполняет корутину в собственном цикле событий потока.
+
+        В отличие от :func:`asyncio.run`, не ждёт завершения синхронных
+        загрузчиков в пуле потоков — отмена освобождает воркер сразу.
+        """
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(
+            # +3: предзагрузка ссылок, запись CBZ и закрытие заполненного тома.
+            ThreadPoolExecutor(max_workers=self._max_parallel + 3)
+        )
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            try:
+                loop.run_until_complete(loop.shutdown_asyncgens())
+            finally:
+                loop.close()
+
+    async def _download_and_archive(
         self,
-        chapters: list[dict],
+        queue: list[tuple[int, dict]],
+        total: int,
         news_id: str,
-        downloader: FallbackDownloader,
+        results: dict[int, bool],
+        output: _CbzOutput | None,
     ) -> None:
-        total = len(chapters)
-        self.log.emit(f"\n🔢 Начинаем скачивание {total} глав...")
-        self.log.emit("📡 Используются методы: curl_cffi → cloudscraper → Selenium\n")
+        """Скачивание *queue* и сборка *output*, работающие одновременно."""
+        loop = asyncio.get_running_loop()
+        downloads: dict[int, asyncio.Future[bool]] = {
+            i: loop.create_future() for i, _ in queue
+        }
+        self._archive_cond = asyncio.Condition()
+        archiver = None
+        if output is not None:
+            self._archive_next = output.chapters[0]
+            self._start_writer(output.volumes[0])
+            archiver = asyncio.ensure_future(self._archive_in_order(output, downloads))
+        else:
+            self._archive_next = math.inf
 
-        range_start = self._chapter_range[0] if self._chapter_range else 1
+        try:
+            if queue:
+                workers = min(self._max_parallel, len(queue))
+                await self._download_chapters_async(
+                    queue, total, news_id, workers, results, downloads,
+                )
+        finally:
+            for future in downloads.values():
+                if not future.done():
+                    future.set_result(False)
+            if archiver is not None:
+                # Сборщик сам останавливается при отмене; дожидаемся, чтобы
+                # архив не закрывался посреди записи главы.
+                await archiver
+
+    async def _download_chapters_async(
+        self,
+        queue: list[tuple[int, dict]],
+        total: int,
+        news_id: str,
+        workers: int,
+        results: dict[int, bool],
+        downloads: dict[int, asyncio.Future[bool]],
+    ) -> None:
+        """Скачивает главы *queue* (номер, глава); итоги пишет в *results*
+        и в *downloads* (для сборщика CBZ)."""
+        chapters = dict(queue)
+        semaphore = asyncio.Semaphore(workers)
+
+        # Лимит AsyncSession: параллельные загрузки плюс запросы предзагрузки.
+        max_clients = self._max_parallel + PREFETCH_DEPTH
+        async with FallbackDownloader(
+            self.url, self._cookie_manager, self.log.emit, max_clients,
+        ) as dl:
+            prefetcher = UrlPrefetcher(dl, news_id, [ch["id"] for _, ch in queue])
+            tasks = {
+                asyncio.ensure_future(
+                    self._download_one(
+                        i, total, chapter, news_id, dl, prefetcher, position, semaphore,
+                    )
+                ): i
+                for position, (i, chapter) in enumerate(queue)
+            }
+            pending = set(tasks)
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        timeout=CANCEL_POLL_INTERVAL,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if self.is_cancelled:
+                        self.log.emit("❌ Скачивание отменено")
+                        break
+                    for task in done:
+                        i = tasks[task]
+                        try:
+                            results[i] = task.result()
+                        except Exception as exc:
+                            self.log.emit(f"  ❌ Глава {i}: {exc}")
+                            results[i] = False
+                        downloads[i].set_result(results[i])
+                        self.chapter_progress.emit(
+                            len(results), total, chapters[i]["title"],
+                        )
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                prefetcher.close()
 
-        for i, chapter in enumerate(chapters, 1):
+    async def _download_one(
+        self,
+        i: int,
+        total: int,
+        chapter: dict,
+        news_id: str,
+        downloader: FallbackDownloader,
+        prefetcher: UrlPrefetcher,
+        position: int,
+        semaphore: asyncio.Semaphore,
+    ) -> bool:
+        """Скачивает одну главу, занимая один слот параллельности.
+
+        Ссылку на архив берёт из предзагрузки (*position* — место главы в
+        очереди), если она успела подготовиться. Скачанный архив переносится
+        в кэш глав. Глава не начинает скачиваться, пока опережает сборку
+        CBZ больше чем на ``CBZ_REORDER_WINDOW`` глав.
+        """
+        window = max(CBZ_REORDER_WINDOW, self._max_parallel)
+        async with self._archive_cond:
+            await self._archive_cond.wait_for(lambda: i < self._archive_next + window)
+
+        async with semaphore:
             if self.is_cancelled:
-                self.log.emit("❌ Скачивание отменено")
-                return
+                return False
 
             title = chapter["title"]
             chapter_id = chapter["id"]
-            filename = sanitize_filename(f"{i:04}_{title}") + ".zip"
-            zip_path = DOWNLOADS_DIR / filename
-
-            global_index = range_start + i - 1
+            # Имя не зависит от выбранного диапазона: недокачанный архив
+            # докачивается и в следующей задаче.
+            zip_path = DOWNLOADS_DIR / f"{news_id}_{chapter_id}.zip"
 
-            self.chapter_progress.emit(i, total, title)
             self.log.emit(f"📖 Глава {i}/{total}: {title}")
             self.log.emit(f"   ID: {chapter_id}")
 
-            success = downloader.download(chapter_id, news_id, zip_path, title)
+            url = await prefetcher.take(position)
+            await asyncio.to_thread(self._journal.mark, chapter_id, DOWNLOADING)
+            success = await downloader.download_async(
+                chapter_id, news_id, zip_path, title, self._make_progress_fn(i), url,
+            )
 
             if success:
-                self.log.emit("  ✅ Успешно\n")
-                self._downloaded_indices.append(global_index)
+                cached = await asyncio.to_thread(
+                    self._cache.put, news_id, chapter_id, zip_path, pin=True,
+                )
+                # Отметка до передачи сборке: иначе она могла бы затереть
+                # ``archived``, если том закроется раньше, чем она запишется.
+                await asyncio.to_thread(self._journal.mark, chapter_id, DOWNLOADED)
+                self._chapter_files[i] = (
+                    self._chapter_label(self._chapter_numbers[i - 1], chapter), cached, chapter_id,
+                )
+                self.log.emit(f"  ✅ Глава {i}: успешно\n")
             else:
-                self._failed_chapters.append(f"Глава {i}: {title}")
-                self.log.emit("  ❌ Не удалось скачать\n")
+                await asyncio.to_thread(self._journal.mark, chapter_id, PENDING)
+                self.log.emit(f"  ❌ Глава {i}: не удалось скачать\n")
+        return success
 
-            time.sleep(REQUEST_DELAY)
+    def _adopt_finished_download(self, news_id: str, chapter_id: int | str) -> Path | None:
+        """Переносит в кэш архив, скачанный до падения, но не попавший в кэш."""
+        zip_path = DOWNLOADS_DIR / f"{news_id}_{chapter_id}.zip"
+        if not validate_zip_file(zip_path):
+            return None
+        return self._cache.put(news_id, chapter_id, zip_path, pin=True)
 
-    # -- CBZ -------------------------------------------------------------------
+    @staticmethod
+    def _chapter_label(number: int, chapter: dict) -> str:
+        """Подпись главы (номер на сайте + название); это же имя её папки в CBZ."""
+        return sanitize_filename(f"{number:04}_{chapter['title']}")
 
-    def _create_cbz(self, final_cbz: Path) -> None:
-        self.log.emit("📦 Архивация в CBZ...")
-        zip_files = sorted(DOWNLOADS_DIR.glob("*.zip"))
+    def _make_progress_fn(self, i: int) -> ProgressCallback:
+        """Колбэк прогресса главы *i*: суммирует байты всех глав задачи."""
+        def report(bytes_written: int) -> None:
+            self._chapter_bytes[i] = bytes_written
+            now = time.monotonic()
+            if now - self._last_bytes_emit >= _BYTES_PROGRESS_INTERVAL:
+                self._last_bytes_emit = now
+                self.bytes_downloaded.emit(sum(self._chapter_bytes.values()))
 
-        if not zip_files:
-            self.log.emit("❌ Нет файлов для архивации")
-            return
+        return report
 
+    # -- CBZ -------------------------------------------------------------------
+
+    @property
+    def _in_place_mode(self) -> bool:
+        """Режим, в котором меняется существующий архив."""
+        return self._download_mode in ("append", "replace")
+
+    def _replacing(self, contents: CbzIndex) -> bool:
+        """Заменять ли главы, которые уже есть в архиве."""
+        return self._download_mode == "replace" and contents.layout == LAYOUT_FOLDERS
+
+    def _load_cbz_index(self, final_cbz: Path) -> CbzIndex:
+        """Оглавление дополняемого архива (для нового архива — пустое)."""
+        if not self._in_place_mode or not final_cbz.exists():
+            return CbzIndex(layout=CBZ_LAYOUT)
+        contents = CbzIndex.read(final_cbz)
+        if contents is None:
+            # Архив собран без оглавления: следующий номер страницы ищется
+            # по именам файлов, состав глав неизвестен.
+            contents = CbzIndex(next_page=self._get_max_page_index(final_cbz) + 1)
+        return contents
+
+    def _sealed_chapters(self, volumes: list[Path]) -> set[str]:
+        """id глав из заполненных томов (они больше не открываются)."""
+        sealed: set[str] = set()
+        for path in volumes:
+            contents = CbzIndex.read(path)
+            if contents is not None:
+                sealed.update(str(entry[0]) for entry in contents.chapters)
+        return sealed
+
+    def _start_volume_series(self, base: Path) -> None:
+        """Готовит новую серию томов: удаляет старую, если задача не продолжается.
+
+        Серия всегда дописывается по тому, поэтому дальше задача идёт как
+        дополнение (пустой или уже начатой до сбоя серии).
+        """
+        old = volume_paths(base)
+        if old and not self._journal.count(ARCHIVED):
+            for path in old:
+                path.unlink(missing_ok=True)
+            self.log.emit(f"🗑️ Старые тома удалены: {len(old)}")
+        self._download_mode = "append"
+
+    def _chapters_to_archive(
+        self,
+        chapters: list[dict],
+        final_cbz: Path,
+        contents: CbzIndex,
+        sealed: set[str],
+    ) -> set[int]:
+        """Номера глав, которые нужно добавить в архив.
+
+        При дополнении пропускаются главы, которые уже есть в оглавлении
+        архива (или в заполненных томах *sealed*) или которые журнал отметил
+        как добавленные; при замене главы из оглавления, наоборот, пишутся
+        заново (только в раскладке по папкам). Новый архив пишется целиком,
+        если только он не был уже полностью собран до сбоя.
+        """
+        pending = {
+            i for i, ch in enumerate(chapters, 1)
+            if self._journal.state(ch["id"]) != ARCHIVED
+        }
+        if sealed:
+            done = {i for i in pending if str(chapters[i - 1]["id"]) in sealed}
+            if done:
+                self.log.emit(f"📚 Уже в заполненных томах: {len(done)} глав — пропускаю")
+                pending -= done
+        if self._in_place_mode:
+            present = {i for i in pending if chapters[i - 1]["id"] in contents}
+            if present and self._replacing(contents):
+                self.log.emit(f"🔁 Будет заменено глав: {len(present)}")
+            elif present:
+                if self._download_mode == "replace":
+                    self.log.emit(
+                        "⚠️ Замена глав возможна только в архиве с папками глав"
+                        " (CBZ_LAYOUT = \"folders\")"
+                    )
+                self.log.emit(f"📑 Уже в архиве: {len(present)} глав — пропускаю")
+                pending -= present
+        if not final_cbz.exists() and not sealed:
+            return set(range(1, len(chapters) + 1))
+        if not pending:
+            self.log.emit("✅ Все главы уже в архиве")
+        if self._in_place_mode or not pending:
+            return pending
+        return set(range(1, len(chapters) + 1))
+
+    def _open_output(
+        self, base: Path, current: Path, to_archive: set[int], contents: CbzIndex,
+    ) -> _CbzOutput | None:
+        """Открывает архив (или последний том серии) на запись.
+
+        Если последний том уже заполнен, сразу начинается следующий.
+        """
+        self.log.emit("📦 Архивация в CBZ по мере скачивания...")
+        output = _CbzOutput(base, sorted(to_archive), self._volumes)
+        if output.limits.enabled and self._in_place_mode and current.exists():
+            if not output.limits.fits(len(contents.chapters), current.stat().st_size, 0):
+                current = volume_path(base, volume_number(current) + 1)
+                contents = CbzIndex(layout=CBZ_LAYOUT)
+        build = self._open_cbz(current, contents)
+        if build is None:
+            return None
+        output.volumes.append(build)
+        return output
+
+    def _open_cbz(self, final_cbz: Path, contents: CbzIndex) -> _CbzBuild | None:
+        """Открывает CBZ (или том) на запись.
+
+        Новый архив пишется во временный файл и заменяет итоговый только
+        целиком. Дополнение идёт на месте, но под защитой журнала: при
+        падении архив откатывается к исходному.
+        """
         start_index = 1
         zip_mode = "w"
+        target = final_cbz.with_name(final_cbz.name + ".part")
+        if volume_number(final_cbz):
+            self.log.emit(f"📚 Том: {final_cbz.name}")
 
-        if self._download_mode == "append" and final_cbz.exists():
+        if self._in_place_mode and final_cbz.exists():
             zip_mode = "a"
-            start_index = self._get_max_page_index(final_cbz) + 1
-            self.log.emit(f"📦 Дополнение архива, начиная со страницы {start_index}")
+            target = final_cbz
+            start_index = contents.next_page
+            if contents.layout == LAYOUT_FOLDERS:
+                self.log.emit("📦 Дополнение архива (папка на главу)")
+            else:
+                self.log.emit(f"📦 Дополнение архива, начиная со страницы {start_index}")
 
-        index = start_index
-        successful = 0
-        total_pages = 0
+        try:
+            if zip_mode == "a":
+                self._journal.protect_archive(final_cbz)
+            cbz = zipfile.ZipFile(target, zip_mode, zipfile.ZIP_DEFLATED)
+        except Exception as exc:
+            self.log.emit(f"❌ Ошибка при создании CBZ: {exc}")
+            if zip_mode == "a":
+                self._journal.release_archive()
+            return None
+        present = {str(entry[0]) for entry in contents.chapters}
+        return _CbzBuild(
+            final_cbz, target, cbz, start_index, contents, present,
+            size=final_cbz.stat().st_size if zip_mode == "a" else 0,
+            routed=len(contents.chapters),
+        )
+
+    async def _archive_in_order(
+        self, output: _CbzOutput, downloads: dict[int, asyncio.Future[bool]],
+    ) -> None:
+        """Передаёт главы писателям томов по порядку по мере их готовности.
 
+        Готовые главы, которые ждут предыдущих, лежат в ``_chapter_files``
+        (буфер переупорядочивания); скачивание не уходит вперёд сборки
+        больше чем на ``CBZ_REORDER_WINDOW`` глав. Заполненный том
+        закрывается в фоне, пока пишется следующий.
+        """
         try:
-            with zipfile.ZipFile(final_cbz, zip_mode, zipfile.ZIP_DEFLATED) as cbz:
-                for zip_file in zip_files:
-                    if self.is_cancelled:
-                        self.log.emit("❌ Архивация отменена")
-                        break
+            for i in output.chapters:
+                await self._advance_archive(i)
+                if i in downloads:
+                    await downloads[i]
+                if self.is_cancelled:
+                    break
+                entry = self._chapter_files.pop(i, None)
+                if entry is not None:
+                    build = await self._volume_for(output, entry[1], entry[2])
+                    await build.queue.put(entry)
+        except Exception as exc:
+            output.error = exc
+        finally:
+            await self._advance_archive(math.inf)
+            current = output.volumes[-1]
+            await current.queue.put(None)
+            await current.writer
+            await asyncio.gather(*output.sealing)
+
+    async def _advance_archive(self, i: float) -> None:
+        async with self._archive_cond:
+            self._archive_next = i
+            self._archive_cond.notify_all()
+
+    async def _volume_for(
+        self, output: _CbzOutput, zip_file: Path, chapter_id: int | str,
+    ) -> _CbzBuild:
+        """Том для следующей главы; при необходимости начинает новый.
+
+        Заменяемая глава остаётся в своём томе, даже если он заполнен.
+        """
+        build = output.volumes[-1]
+        if str(chapter_id) in build.present or not output.limits.enabled:
+            return build
+        size = await asyncio.to_thread(chapter_size, zip_file) if output.limits.max_bytes else 0
+        if not output.limits.fits(build.routed, build.size, size):
+            build = await self._next_volume(output)
+        build.routed += 1
+        build.size += size
+        return build
+
+    async def _next_volume(self, output: _CbzOutput) -> _CbzBuild:
+        """Закрывает текущий том в фоне и открывает следующий."""
+        full = output.volumes[-1]
+        await full.queue.put(None)
+        output.sealing.append(asyncio.ensure_future(self._seal_volume(full)))
+
+        path = volume_path(output.base, volume_number(full.final) + 1)
+        build = await asyncio.to_thread(self._open_cbz, path, CbzIndex(layout=CBZ_LAYOUT))
+        if build is None:
+            raise RuntimeError(f"не удалось создать том {path.name}")
+        self._start_writer(build)
+        output.volumes.append(build)
+        return build
+
+    def _start_writer(self, build: _CbzBuild) -> None:
+        build.queue = asyncio.Queue(maxsize=_VOLUME_QUEUE_SIZE)
+        build.writer = asyncio.ensure_future(self._write_volume(build))
+
+    async def _write_volume(self, build: _CbzBuild) -> None:
+        """Пишет в том главы из его очереди до ``None``.
+
+        Записанная глава открепляется в кэше, и кэш сразу ужимается до
+        лимита, а не только в конце задачи.
+        """
+        while (entry := await build.queue.get()) is not None:
+            if build.error is not None or self.is_cancelled:
+                continue
+            try:
+                await asyncio.to_thread(self._archive_chapter, build, *entry)
+            except Exception as exc:
+                build.error = exc
+            self._cache.unpin(entry[1])
+            await asyncio.to_thread(self._cache.evict, flush=False)
 
-                    self.log.emit(f"📦 Обработка: {zip_file.name}")
-                    try:
-                        chapter_pages, index = self._process_chapter_zip(
-                            zip_file, cbz, index,
-                        )
-                        self.log.emit(f"  📄 Страниц в главе: {chapter_pages}")
-                        successful += 1
-                        total_pages += chapter_pages
-                    except Exception as exc:
-                        self.log.emit(f"  ⚠️ Ошибка при обработке {zip_file.name}: {exc}")
+    async def _seal_volume(self, build: _CbzBuild) -> None:
+        """Дописывает заполненный том и фиксирует его."""
+        await build.writer
+        await asyncio.to_thread(self._finish_cbz, build)
 
-            self.log.emit(f"\n📊 Статистика:")
-            self.log.emit(f"  • Всего страниц: {total_pages}")
-            self.log.emit(f"  • Успешно обработано глав: {successful}/{len(zip_files)}")
+    def _archive_chapter(
+        self, build: _CbzBuild, label: str, zip_file: Path, chapter_id: int | str,
+    ) -> None:
+        """Дописывает в архив одну главу (в потоке пула).
 
-            if successful == 0:
-                self.log.emit("❌ Не удалось обработать ни одной главы")
-                if zip_mode == "w" and final_cbz.exists():
-                    final_cbz.unlink()
+        В раскладке по папкам глава, которая уже есть в архиве, заменяется:
+        её старые страницы убираются из каталога, а если новые записать не
+        удалось — возвращаются обратно.
+        """
+        build.attempted += 1
+        folder = label if build.contents.layout == LAYOUT_FOLDERS else ""
+        first_page = 1 if folder else build.index
+        self.log.emit(f"📦 Обработка: {label}")
+        old = detach_chapter(build.cbz, build.contents, chapter_id) if folder else None
+        try:
+            chapter_pages, next_index = self._packer.add_chapter(
+                zip_file, build.cbz, first_page, folder,
+            )
+        except Exception as exc:
+            if old is not None:
+                reattach_chapter(build.cbz, build.contents, old)
+            self.log.emit(f"  ⚠️ Ошибка при обработке {label}: {exc}")
+            return
+        if not folder:
+            build.index = next_index
+        if old is not None:
+            build.replaced += 1
+            self.log.emit(f"  🔁 Старая версия главы заменена ({len(old.infos)} стр.)")
+        self.log.emit(f"  📄 Страниц в главе: {chapter_pages}")
+        build.pages += chapter_pages
+        build.archived.append(chapter_id)
+        build.contents.add(chapter_id, first_page, chapter_pages, folder)
+
+    def _finish_cbz(self, build: _CbzBuild) -> None:
+        """Закрывает архив (том): фиксирует его или, при отмене, откатывает."""
+        try:
+            build.cbz.comment = build.contents.to_comment()
+            dead = dead_bytes(build.cbz) if build.target == build.final else 0
+            build.cbz.close()
+            if build.error is not None:
+                raise build.error
+
+            if self.is_cancelled or not build.archived:
+                self._discard_cbz(build)
+                return
+
+            self._commit_cbz(build.target, build.final)
+            build.committed = True
+            self._journal.mark(build.archived, ARCHIVED)
+            if volume_number(build.final):
+                self.log.emit(f"📚 Том готов: {build.final.name} ({len(build.contents.chapters)} глав)")
+            self._compact_if_needed(build.final, dead)
 
         except Exception as exc:
             self.log.emit(f"❌ Ошибка при создании CBZ: {exc}")
-            if zip_mode == "w" and final_cbz.exists():
-                final_cbz.unlink()
+            if self._discard_cbz(build):
+                self.log.emit("↩️ Архив возвращён к состоянию до дополнения")
+
+    def _finish_output(self, output: _CbzOutput) -> None:
+        """Закрывает последний том и подводит итог сборки."""
+        current = output.volumes[-1]
+        if current.cbz.fp is not None:
+            self._finish_cbz(current)
+        self._packer.close()
+        if output.error is not None:
+            self.log.emit(f"❌ Ошибка при создании CBZ: {output.error}")
+
+        if self.is_cancelled:
+            self.log.emit("❌ Архивация отменена")
+            return
+
+        committed = [b for b in output.volumes if b.committed]
+        archived = sum(len(b.archived) for b in committed)
+        attempted = sum(b.attempted for b in output.volumes)
+        replaced = sum(b.replaced for b in committed)
+        self.log.emit(f"\n📊 Статистика:")
+        self.log.emit(f"  • Всего страниц: {sum(b.pages for b in committed)}")
+        self.log.emit(f"  • Успешно обработано глав: {archived}/{attempted}")
+        if replaced:
+            self.log.emit(f"  • Заменено глав: {replaced}")
+        if output.limits.enabled:
+            self.log.emit(f"  • Затронуто томов: {len(committed)}")
+
+        if not archived:
+            if attempted:
+                self.log.emit("❌ Не удалось обработать ни одной главы")
+            else:
+                self.log.emit("❌ Нет файлов для архивации")
+
+    def _compact_if_needed(self, cbz_path: Path, dead: int) -> None:
+        """Сжимает архив, если заменённые главы заняли больше порога места."""
+        size = cbz_path.stat().st_size
+        if not dead or dead < size * CBZ_COMPACT_THRESHOLD:
+            return
+        self.log.emit(f"🧹 Сжатие архива: {dead / 1024 / 1024:.1f} МБ занято старыми главами")
+        try:
+            freed = compact(cbz_path)
+        except Exception as exc:
+            self.log.emit(f"  ⚠️ Не удалось сжать архив: {exc}")
+            return
+        self.log.emit(f"  ✅ Освобождено {freed / 1024 / 1024:.1f} МБ")
+
+    def _discard_cbz(self, build: _CbzBuild) -> bool:
+        """Удаляет недописанный новый архив или откатывает дополнение.
+
+        Возвращает ``True``, если дополненный архив был откачен.
+        """
+        if build.target != build.final:
+            build.target.unlink(missing_ok=True)
+            return False
+        return self._journal.restore_archive()
+
+    def _commit_cbz(self, target: Path, final_cbz: Path) -> None:
+        """Сбрасывает архив на диск и делает его итоговым."""
+        with open(target, "rb+") as f:
+            os.fsync(f.fileno())
+        if target == final_cbz:
+            self._journal.release_archive()
+        else:
+            os.replace(target, final_cbz)
 
     @staticmethod
     def _get_max_page_index(cbz_path: Path) -> int:
@@ -522,42 +1240,16 @@ class ChapterWorker(QThread):
             pass
         return max_idx
 
-    @staticmethod
-    def _process_chapter_zip(
-        zip_file: Path,
-        cbz: zipfile.ZipFile,
-        start_index: int,
-    ) -> tuple[int, int]:
-        """Извлекает изображения из ZIP главы и добавляет в CBZ.
-
-        Возвращает (кол-во страниц, следующий индекс).
-        """
-        index = start_index
-        pages = 0
-
-        with zipfile.ZipFile(zip_file, "r") as zf:
-            for name in sorted(zf.namelist()):
-                ext = os.path.splitext(name)[1].lower()
-                if ext not in IMAGE_EXTENSIONS:
-                    continue
-
-                out_name = f"{index:06}{ext}"
-                src = TEMP_DIR / name
-                dst = TEMP_DIR / out_name
-
-                zf.extract(name, path=TEMP_DIR)
-                if src.exists():
-                    src.rename(dst)
-                    cbz.write(dst, arcname=out_name)
-                    index += 1
-                    pages += 1
-
-        return pages, index
-
     # -- Очистка ---------------------------------------------------------------
 
     @staticmethod
-    def _cleanup() -> None:
-        for dir_path in (DOWNLOADS_DIR, TEMP_DIR):
+    def _cleanup(*, keep_downloads: bool = False) -> None:
+        """Удаляет временные файлы.
+
+        С *keep_downloads* недокачанные архивы (``.part``) остаются в
+        ``DOWNLOADS_DIR`` до следующей задачи.
+        """
+        dirs = (TEMP_DIR,) if keep_downloads else (DOWNLOADS_DIR, TEMP_DIR)
+        for dir_path in dirs:
             if dir_path.exists():
                 shutil.rmtree(dir_path)
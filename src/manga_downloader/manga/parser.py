@@ -2,6 +2,13 @@
 Парсинг данных манги из HTML-страницы com-x.life.
 
 Извлекает ``window.__DATA__`` и возвращает список глав, название и news_id.
+
+Страница читается по мере получения: объект ищется прямо в приходящих
+кусках ответа и выделяется по балансу фигурных скобок. Остаток страницы
+после объекта не разбирается, а по возможности и не скачивается (см.
+:class:`_PageReader`). Запрос идёт через ``content_callback`` на сессии
+из пула, поэтому keep-alive соединение переиспользуется (ответ с
+``stream=True`` curl_cffi выполняет на копии handle без соединения).
 """
 
 from __future__ import annotations
@@ -13,13 +20,20 @@ from dataclasses import dataclass
 from typing import Any
 
 import curl_cffi
+from curl_cffi.const import CurlHttpVersion, CurlInfo
+from curl_cffi.curl import CURL_WRITEFUNC_ERROR
 
-from manga_downloader.config import BROWSE_HEADERS, HTTP_TIMEOUT
+from manga_downloader.config import BROWSE_HEADERS, HTTP_TIMEOUT, PAGE_DRAIN_MAX_BYTES
 from manga_downloader.cookies import CookieManager
+from manga_downloader.http_pool import http_pool
+from manga_downloader.rate_limiter import site_rate_limiter
 
 logger = logging.getLogger(__name__)
 
-_DATA_RE = re.compile(r"window\.__DATA__\s*=\s*({.*?})\s*;", re.DOTALL)
+_DATA_MARKER = b"window.__DATA__"
+_ASSIGN_RE = re.compile(rb"\s*(=\s*)?")
+_OBJECT_TOKEN_RE = re.compile(rb'[{}"]')
+_STRING_TOKEN_RE = re.compile(rb'["\\]')
 _NEWS_ID_RE = re.compile(r"/(\d+)-")
 
 
@@ -37,26 +51,17 @@ class MangaInfo:
 
 
 class MangaParser:
-    """Парсит HTML-страницу манги и извлекает метаданные."""
+    """Парсит HTML-страницу манги и извлекает метаданные.
+
+    HTTP-сессии берутся из общего пула (:mod:`manga_downloader.http_pool`),
+    поэтому парсер дешёвый и его можно использовать из нескольких потоков.
+    """
 
     def __init__(self, cookie_manager: CookieManager) -> None:
         self._cookie_manager = cookie_manager
-        self._session: curl_cffi.Session | None = None
-
-    def _get_session(self, *, use_cookies: bool = True) -> curl_cffi.Session:
-        """Возвращает переиспользуемую сессию (keep-alive, один TLS handshake)."""
-        if self._session is None:
-            self._session = curl_cffi.Session()
-            self._session.headers.update(BROWSE_HEADERS)
-            if use_cookies:
-                self._cookie_manager.apply_to_session(self._session)
-        return self._session
 
     def close(self) -> None:
-        """Закрывает сессию."""
-        if self._session is not None:
-            self._session.close()
-            self._session = None
+        """Ничего не закрывает: соединения принадлежат общему пулу."""
 
     def fetch(self, url: str) -> MangaInfo | None:
         """Загружает страницу и парсит данные манги.
@@ -67,8 +72,8 @@ class MangaParser:
         """
         for use_cookies in (True, False):
             try:
-                html = self._fetch_html(url, use_cookies=use_cookies)
-                result = self._parse_html(html, url)
+                data = self._fetch_data(url, use_cookies=use_cookies)
+                result = self._parse_data(data, url) if data else None
                 if result:
                     return result
             except Exception as exc:
@@ -79,27 +84,53 @@ class MangaParser:
     def fetch_quick(self, url: str, timeout: int = 10) -> MangaInfo | None:
         """Быстрая проверка: одна попытка с cookies и коротким таймаутом."""
         try:
-            html = self._fetch_html(url, use_cookies=True, timeout=timeout)
-            return self._parse_html(html, url)
+            data = self._fetch_data(url, use_cookies=True, timeout=timeout)
+            return self._parse_data(data, url) if data else None
         except Exception as exc:
             logger.debug("Быстрая проверка не удалась для %s: %s", url, exc)
             return None
 
-    def _fetch_html(self, url: str, *, use_cookies: bool = True, timeout: int = HTTP_TIMEOUT) -> str:
-        session = self._get_session(use_cookies=use_cookies)
-        response = session.get(url, impersonate="chrome", timeout=timeout)
+    def _fetch_data(
+        self, url: str, *, use_cookies: bool = True, timeout: int = HTTP_TIMEOUT,
+    ) -> dict[str, Any] | None:
+        """Загружает страницу и возвращает объект ``window.__DATA__``.
+
+        Возвращает ``None``, если на странице его нет.
+        """
+        cookie_manager = self._cookie_manager if use_cookies else None
+        limited = site_rate_limiter.applies_to(url)
+        if limited:
+            site_rate_limiter.acquire()
+        with http_pool.session(cookie_manager) as session:
+            reader = _PageReader(session.curl)
+            try:
+                response = session.get(
+                    url, headers=BROWSE_HEADERS, impersonate="chrome", timeout=timeout,
+                    content_callback=reader,
+                )
+            except curl_cffi.CurlError as exc:
+                # Обрыв передачи после объекта — не ошибка (и сессия
+                # остаётся в пуле).
+                if not reader.aborted or exc.response is None:
+                    raise
+                response = exc.response
+        if limited:
+            site_rate_limiter.record(
+                response.status_code, response.headers.get("Retry-After"),
+            )
         if response.status_code != 200:
             raise RuntimeError(f"HTTP {response.status_code}")
-        return response.text
-
-    @staticmethod
-    def _parse_html(html: str, url: str) -> MangaInfo | None:
-        match = _DATA_RE.search(html)
-        if not match:
+        if reader.data is None:
             logger.debug("Не найден window.__DATA__ на странице %s", url)
             return None
+        logger.debug(
+            "window.__DATA__ прочитан на %s: разобрано %d байт%s",
+            url, reader.scanned, ", передача оборвана" if reader.aborted else "",
+        )
+        return json.loads(reader.data)
 
-        data = json.loads(match.group(1))
+    @staticmethod
+    def _parse_data(data: dict[str, Any], url: str) -> MangaInfo | None:
         chapters = data["chapters"][::-1]  # от первой к последней
         title = data.get("title", "Manga").strip()
 
@@ -113,3 +144,129 @@ class MangaParser:
                 return None
 
         return MangaInfo(title=title, news_id=str(news_id), chapters=chapters)
+
+
+class _PageReader:
+    """``content_callback`` запроса страницы: ищет в ней ``window.__DATA__``.
+
+    Когда объект прочитан, остальные куски не разбираются. По HTTP/2
+    передача сразу обрывается: сбрасывается только поток, соединение
+    остаётся в пуле. По HTTP/1.1 обрыв закрыл бы соединение, поэтому
+    остаток до ``PAGE_DRAIN_MAX_BYTES`` дочитывается вхолостую, а
+    больший (или неизвестной длины) обрывается.
+    """
+
+    def __init__(self, curl: curl_cffi.Curl) -> None:
+        self._curl = curl
+        self._scanner = _DataScanner()
+        self.data: bytes | None = None
+        self.aborted = False
+
+    @property
+    def scanned(self) -> int:
+        """Сколько байт страницы разобрано."""
+        return self._scanner.received
+
+    def __call__(self, chunk: bytes) -> int:
+        if self.data is None:
+            self.data = self._scanner.feed(chunk)
+            if self.data is not None and not self._keep_reading():
+                self.aborted = True
+                return CURL_WRITEFUNC_ERROR
+        return len(chunk)
+
+    def _keep_reading(self) -> bool:
+        """Дочитать ли остаток ответа, чтобы не потерять соединение."""
+        if self._curl.getinfo(CurlInfo.HTTP_VERSION) >= CurlHttpVersion.V2_0:
+            return False
+        length = self._curl.getinfo(CurlInfo.CONTENT_LENGTH_DOWNLOAD_T)
+        if length < 0:
+            return False
+        return length - self._curl.getinfo(CurlInfo.SIZE_DOWNLOAD_T) <= PAGE_DRAIN_MAX_BYTES
+
+
+class _DataScanner:
+    """Ищет ``window.__DATA__`` в кусках ответа по мере их получения.
+
+    До маркера хранится только хвост последнего куска (маркер может
+    разорваться между кусками). Объект выделяется по балансу фигурных
+    скобок; скобки внутри JSON-строк (с учётом экранирования) не считаются.
+    Маркер и скобки — ASCII, поэтому искать можно прямо в байтах UTF-8.
+    """
+
+    def __init__(self) -> None:
+        self.received = 0  # байт получено всего
+        self._tail = b""
+        self._started = False
+        self._parts: list[bytes] = []  # прочитанная часть объекта
+        self._depth = 0
+        self._in_string = False
+        self._escape = False  # кусок закончился на обратной косой черте
+
+    def feed(self, chunk: bytes) -> bytes | None:
+        """Обрабатывает кусок; возвращает JSON объекта, как только он прочитан целиком."""
+        self.received += len(chunk)
+        if self._started:
+            data = chunk
+        else:
+            data = self._find_start(self._tail + chunk)
+            if data is None:
+                return None
+        end = self._scan(data)
+        if end < 0:
+            self._parts.append(data)
+            return None
+        self._parts.append(data[:end])
+        return b"".join(self._parts)
+
+    def _find_start(self, data: bytes) -> bytes | None:
+        """Данные с открывающей скобки объекта или ``None`` (ждём ещё)."""
+        pos = 0
+        while True:
+            marker = data.find(_DATA_MARKER, pos)
+            if marker < 0:
+                self._tail = data[-(len(_DATA_MARKER) - 1):]
+                return None
+            assign = _ASSIGN_RE.match(data, marker + len(_DATA_MARKER))
+            if assign.end() == len(data):
+                # Присваивание разорвано между кусками.
+                self._tail = data[marker:]
+                return None
+            if assign.group(1) and data[assign.end()] == ord("{"):
+                self._started = True
+                return data[assign.end():]
+            pos = marker + 1
+
+    def _scan(self, data: bytes) -> int:
+        """Позиция за закрывающей скобкой объекта в *data* или ``-1``."""
+        pos = 0
+        if self._escape:
+            self._escape = False
+            pos = 1
+        while True:
+            if self._in_string:
+                match = _STRING_TOKEN_RE.search(data, pos)
+                if match is None:
+                    return -1
+                pos = match.end()
+                if match.group() == b"\\":
+                    if pos == len(data):
+                        self._escape = True
+                        return -1
+                    pos += 1  # экранированный символ
+                    continue
+                self._in_string = False
+                continue
+            match = _OBJECT_TOKEN_RE.search(data, pos)
+            if match is None:
+                return -1
+            pos = match.end()
+            token = match.group()
+            if token == b'"':
+                self._in_string = True
+            elif token == b"{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
@@ -0,0 +1,145 @@
+"""
+Адаптивное ограничение частоты запросов к com-x.life.
+
+Token bucket, скорость которого регулируется по принципу AIMD: пока сайт
+отвечает успешно, скорость растёт на постоянную величину; на 429/403/5xx
+она уменьшается в разы, а ``Retry-After`` приостанавливает все запросы
+на указанное сервером время.
+
+Лимитер общий для всего процесса: его используют все загрузчики,
+:class:`~manga_downloader.manga.parser.MangaParser` и, через парсер,
+фоновая проверка обновлений.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from manga_downloader.config import (
+    BASE_URL,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_DECREASE,
+    RATE_LIMIT_INCREASE,
+    RATE_LIMIT_INITIAL,
+    RATE_LIMIT_MAX,
+    RATE_LIMIT_MAX_RETRY_AFTER,
+    RATE_LIMIT_MIN,
+)
+
+logger = logging.getLogger(__name__)
+
+_BACKOFF_STATUSES = frozenset({403, 429})
+
+
+class AdaptiveRateLimiter:
+    """Потокобезопасный token bucket с AIMD-регулировкой скорости."""
+
+    def __init__(
+        self,
+        host: str,
+        *,
+        rate: float = RATE_LIMIT_INITIAL,
+        min_rate: float = RATE_LIMIT_MIN,
+        max_rate: float = RATE_LIMIT_MAX,
+        burst: float = RATE_LIMIT_BURST,
+        increase: float = RATE_LIMIT_INCREASE,
+        decrease: float = RATE_LIMIT_DECREASE,
+    ) -> None:
+        self.host = host
+        self._rate = rate
+        self._min_rate = min_rate
+        self._max_rate = max_rate
+        self._burst = burst
+        self._increase = increase
+        self._decrease = decrease
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Текущая скорость, запросов в секунду."""
+        return self._rate
+
+    def applies_to(self, url: str) -> bool:
+        """``True``, если *url* ведёт на ограничиваемый хост (или его поддомен)."""
+        hostname = urlparse(url).hostname or ""
+        return hostname == self.host or hostname.endswith("." + self.host)
+
+    # -- Получение разрешения на запрос ---------------------------------------
+
+    def acquire(self) -> None:
+        """Блокирует поток до момента, когда можно отправить запрос."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Асинхронный вариант :meth:`acquire`."""
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _reserve(self) -> float:
+        """Забирает токен (возможно, в долг) и возвращает время ожидания."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            delay = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            return max(delay, self._blocked_until - now)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+
+    # -- Обратная связь от ответов --------------------------------------------
+
+    def record(self, status_code: int, retry_after: str | None = None) -> None:
+        """Корректирует скорость по статусу ответа сайта."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if status_code in _BACKOFF_STATUSES or status_code >= 500:
+                self._rate = max(self._min_rate, self._rate * self._decrease)
+                # Отменяем накопленный запас, чтобы не отправить пачку сразу.
+                self._tokens = min(self._tokens, 0.0)
+                pause = _parse_retry_after(retry_after)
+                if pause:
+                    self._blocked_until = max(
+                        self._blocked_until, time.monotonic() + pause,
+                    )
+                logger.debug(
+                    "%s: HTTP %d, скорость снижена до %.2f req/s",
+                    self.host, status_code, self._rate,
+                )
+            elif 200 <= status_code < 400:
+                self._rate = min(self._max_rate, self._rate + self._increase)
+
+
+def _parse_retry_after(value: str | None) -> float:
+    """Переводит ``Retry-After`` (секунды или HTTP-дата) в секунды."""
+    if not value:
+        return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0.0
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        seconds = (moment - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), RATE_LIMIT_MAX_RETRY_AFTER)
+
+
+site_rate_limiter = AdaptiveRateLimiter(urlparse(BASE_URL).hostname or "com-x.life")
@@ -0,0 +1,86 @@
+"""Тесты истории: чтение не ждёт записи пачки изменений."""
+
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from manga_downloader.history import DownloadHistory
+
+URL = "https://com-x.life/1-test.html"
+
+
+class SlowWriteTest(unittest.TestCase):
+    """Запись в хранилище задерживается, пока тест её не отпустит."""
+
+    backend = "sqlite"
+    filename = "history.db"
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.history = DownloadHistory(Path(self._tmp.name) / self.filename, backend=self.backend)
+        self.history.upsert(URL, "Старое", "1", [1, 2], "old.cbz")
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        store = self.history._store
+        write = store.write
+
+        def slow_write(changes):
+            self.writing.set()
+            self.release.wait(5)
+            return write(changes)
+
+        store.write = slow_write
+
+    def tearDown(self) -> None:
+        self.release.set()
+        self.history.close()
+        self._tmp.cleanup()
+
+    def _upsert_in_background(self) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.history.upsert, args=(URL, "Новое", "1", [3], "new.cbz"),
+        )
+        thread.start()
+        self.assertTrue(self.writing.wait(5))
+        return thread
+
+    def _timed(self, fn):
+        started = time.monotonic()
+        result = fn()
+        return result, time.monotonic() - started
+
+    def test_get_does_not_wait_for_write(self) -> None:
+        writer = self._upsert_in_background()
+        entry, elapsed = self._timed(lambda: self.history.get(URL))
+        self.assertLess(elapsed, 1.0)
+        self.assertTrue(writer.is_alive())
+        self.assertEqual(entry["title"], "Новое")
+        self.release.set()
+        writer.join(5)
+        self.assertEqual(self.history.get(URL)["title"], "Новое")
+
+    def test_get_all_does_not_wait_for_write(self) -> None:
+        writer = self._upsert_in_background()
+        entries, elapsed = self._timed(self.history.get_all)
+        self.assertLess(elapsed, 1.0)
+        self.assertTrue(writer.is_alive())
+        self.assertEqual([e["title"] for e in entries], ["Новое"])
+        self.release.set()
+        writer.join(5)
+
+    def test_failed_write_keeps_changes(self) -> None:
+        self.history._store.write = lambda changes: False
+        self.history.upsert(URL, "Новое", "1", [3], "new.cbz")
+        self.assertEqual(self.history.get(URL)["title"], "Новое")
+        self.assertIn(URL, self.history._pending)
+
+
+class JsonSlowWriteTest(SlowWriteTest):
+    backend = "json"
+    filename = "history.json"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Тесты журнала задачи: лог состояний глав и его свёртка."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from manga_downloader import job_journal
+from manga_downloader.job_journal import ARCHIVED, DOWNLOADED, DOWNLOADING, PENDING, JobJournal
+
+
+def _begin(journal: JobJournal, url: str = "https://com-x.life/1-test.html", count: int = 10) -> None:
+    journal.begin(
+        url=url,
+        title="Тест",
+        news_id="1",
+        download_mode="new",
+        cbz_path="Тест.cbz",
+        chapter_range=None,
+        chapters=[(i, {"id": 100 + i, "title": f"Глава {i}"}) for i in range(1, count + 1)],
+    )
+
+
+class JobJournalLogTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "job_journal.json"
+        self.log_path = self.path.with_name(self.path.name + ".log")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_marks_are_appended_not_rewritten(self) -> None:
+        journal = JobJournal(self.path)
+        _begin(journal)
+        snapshot = self.path.read_bytes()
+        journal.mark(101, DOWNLOADING)
+        journal.mark(101, DOWNLOADED)
+        journal.mark([101, 102], ARCHIVED)
+        self.assertEqual(self.path.read_bytes(), snapshot)
+        self.assertEqual(len(self.log_path.read_text(encoding="utf-8").splitlines()), 3)
+
+        reloaded = JobJournal(self.path)
+        self.assertEqual(reloaded.state(101), ARCHIVED)
+        self.assertEqual(reloaded.state(102), ARCHIVED)
+        self.assertEqual(reloaded.state(103), PENDING)
+
+    def test_torn_last_line_is_ignored(self) -> None:
+        journal = JobJournal(self.path)
+        _begin(journal)
+        journal.mark(101, DOWNLOADED)
+        with open(self.log_path, "ab") as f:
+            f.write(b'["')
+        reloaded = JobJournal(self.path)
+        self.assertEqual(reloaded.state(101), DOWNLOADED)
+
+    def test_log_is_compacted_into_snapshot(self) -> None:
+        with mock.patch.object(job_journal, "JOURNAL_COMPACT_EVERY", 3):
+            journal = JobJournal(self.path)
+            _begin(journal)
+            for chapter_id in range(101, 106):
+                journal.mark(chapter_id, DOWNLOADED)
+            self.assertLess(len(self.log_path.read_text(encoding="utf-8").splitlines()), 3)
+        reloaded = JobJournal(self.path)
+        self.assertEqual(reloaded.count(DOWNLOADED), 5)
+
+    def test_stale_log_is_not_applied_to_new_job(self) -> None:
+        journal = JobJournal(self.path)
+        _begin(journal)
+        journal.mark(101, ARCHIVED)
+        stale = self.log_path.read_bytes()
+        _begin(journal, url="https://com-x.life/2-other.html")
+        # Падение между записью нового снимка и удалением старого лога.
+        self.log_path.write_bytes(stale)
+        reloaded = JobJournal(self.path)
+        self.assertEqual(reloaded.state(101), PENDING)
+
+
+if __name__ == "__main__":
+    unittest.main()